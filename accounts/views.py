@@ -4,8 +4,6 @@ from django.contrib.auth import authenticate, login, logout
 from django.http import HttpResponse
 from django.shortcuts import redirect
 
-from p_v_App.middleware import UserSessionTracker
-
 
 def login_user(request):
     logout(request)
@@ -19,9 +17,8 @@ def login_user(request):
 
         user = authenticate(username=username, password=password)
         if user is not None and user.is_active:
+            # O sinal user_logged_in registra a sessão e encerra as demais
             login(request, user)
-            UserSessionTracker.invalidate_other_sessions(
-                user, request.session.session_key)
             resp['status'] = 'success'
         else:
             resp['msg'] = 'Nome de usuário ou senha incorretos'
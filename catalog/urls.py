@@ -26,6 +26,7 @@ urlpatterns = [
         name='upload-products-xml',
     ),
     path('products', views.products, name='product-page'),
+    path('export_products', views.export_products, name='export-products'),
     path('manage_products', views.manage_products, name='manage_products-page'),
     path('test', views.test, name='test-page'),
     path('save_product', views.save_product, name='save-product-page'),
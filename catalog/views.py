@@ -13,6 +13,7 @@ from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.views import View
 
+from core.exports import export_queryset, get_export_format
 from core.utils import get_user_company
 from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font
@@ -883,6 +884,22 @@ class ProductsXMLUploadView(View):
         )
 
 
+def _filter_products(request, company):
+    """Produtos da empresa com os filtros da listagem (busca, categoria e status)."""
+    query = request.GET.get('q', '').strip()
+    category_filter = request.GET.get('category', '').strip()
+    status_filter = request.GET.get('status', '').strip()
+
+    qs = Products.objects.filter(company=company)
+    if query:
+        qs = qs.filter(Q(name__icontains=query) | Q(code__icontains=query))
+    if category_filter.isnumeric():
+        qs = qs.filter(category_id=int(category_filter))
+    if status_filter in ['0', '1']:
+        qs = qs.filter(status=int(status_filter))
+    return qs
+
+
 @login_required
 def products(request):
     user_company = get_user_company(request)
@@ -896,15 +913,7 @@ def products(request):
     status_filter = request.GET.get('status', '').strip()
     page = request.GET.get('page', 1)
 
-    base_qs = Products.objects.filter(
-        company=user_company).select_related('category_id')
-    if query:
-        base_qs = base_qs.filter(
-            Q(name__icontains=query) | Q(code__icontains=query))
-    if category_filter.isnumeric():
-        base_qs = base_qs.filter(category_id=int(category_filter))
-    if status_filter in ['0', '1']:
-        base_qs = base_qs.filter(status=int(status_filter))
+    base_qs = _filter_products(request, user_company).select_related('category_id')
 
     products_qs = base_qs.order_by('-id')
     paginator = Paginator(products_qs, 20)
@@ -936,6 +945,32 @@ def products(request):
     return render(request, 'catalog/products.html', context)
 
 
+@login_required
+def export_products(request):
+    user_company = get_user_company(request)
+    if not user_company:
+        messages.error(
+            request, 'Usuário não está associado a nenhuma empresa.')
+        return redirect('home-page')
+
+    return export_queryset(
+        _filter_products(request, user_company).order_by('name'),
+        [
+            ('Código', 'code'),
+            ('Produto', 'name'),
+            ('Categoria', 'category_id__name'),
+            ('Preço', 'price'),
+            ('Custo', 'custo'),
+            ('Combo', 'is_combo'),
+            ('Status', 'status'),
+            ('Cadastrado em', 'date_added'),
+        ],
+        filename=f'produtos_{user_company.name}',
+        fmt=get_export_format(request),
+        title='Produtos',
+    )
+
+
 @login_required
 def manage_products(request):
     user_company = get_user_company(request)
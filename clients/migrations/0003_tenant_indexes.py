@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_remove_client_email_client_cpf'),
+        ('p_v_App', '0017_usersession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['company', 'name'], name='client_company_name_idx'),
+        ),
+    ]
@@ -20,6 +20,10 @@ class Client(TenantMixin):
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['company', 'name'],
+                         name='client_company_name_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from clients.views import ClientListView
+from clients.views import ClientExportView, ClientListView
 
 urlpatterns = [
     path('clients/', ClientListView.as_view(), name='clients-list'),
+    path('clients/exportar/', ClientExportView.as_view(), name='clients-export'),
 ]
@@ -8,6 +8,8 @@ from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.views import View
 
+from core.exports import export_queryset, get_export_format
+from core.search import filter_search
 from core.utils import get_user_company
 from clients.models import Client
 from debts.models import Debt
@@ -25,7 +27,7 @@ class ClientListView(LoginRequiredMixin, View):
         search_term = (request.GET.get('q') or '').strip()
         base_qs = Client.objects.filter(company=company)
         if search_term:
-            base_qs = base_qs.filter(name__icontains=search_term)
+            base_qs = filter_search(base_qs, 'clients', search_term)
 
         clients = base_qs.order_by('name')
         stats = {
@@ -117,3 +119,29 @@ class ClientListView(LoginRequiredMixin, View):
             or 0
         )
         return Decimal(str(total))
+
+
+class ClientExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        company = get_user_company(request)
+        if not company:
+            messages.error(request, 'Usuário não está associado a nenhuma empresa.')
+            return redirect('home-page')
+
+        clients = Client.objects.filter(company=company)
+        search_term = (request.GET.get('q') or '').strip()
+        if search_term:
+            clients = filter_search(clients, 'clients', search_term)
+        return export_queryset(
+            clients.order_by('name'),
+            [
+                ('Nome', 'name'),
+                ('CPF', 'cpf'),
+                ('Telefone', 'phone'),
+                ('Endereço', 'address'),
+                ('Cadastrado em', 'created_at'),
+            ],
+            filename=f'clientes_{company.name}',
+            fmt=get_export_format(request),
+            title='Clientes',
+        )
@@ -0,0 +1,193 @@
+"""
+Exportação de planilhas (XLSX) e CSV sem carregar os dados em memória.
+
+As linhas vêm de `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`.
+O CSV é enviado em streaming conforme as linhas são lidas; o XLSX é gerado
+com o openpyxl em modo write-only em um arquivo temporário, devolvido com
+FileResponse.
+"""
+from __future__ import annotations
+
+import csv
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Sequence
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('xlsx', 'csv')
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Um valor de texto começando com estes caracteres seria interpretado como
+# fórmula pelo Excel/LibreOffice ao abrir o CSV.
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+@dataclass(frozen=True)
+class CsvFormat:
+    """Formato das datas, BOM e fim de linha do CSV exportado."""
+    datetime_format: str = '%d/%m/%Y %H:%M:%S'
+    date_format: str = '%d/%m/%Y'
+    # Converte as datas para o fuso local antes de formatar.
+    local_time: bool = True
+    # BOM para o Excel reconhecer o arquivo como UTF-8.
+    bom: bool = True
+    line_terminator: str = '\r\n'
+
+
+DEFAULT_CSV_FORMAT = CsvFormat()
+
+
+class _Echo:
+    """Buffer de escrita que apenas devolve o texto, para o csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_format(request, default: str = 'xlsx') -> str:
+    """Formato pedido em ?format=, limitado a EXPORT_FORMATS."""
+    fmt = (request.GET.get('format') or default).lower()
+    return fmt if fmt in EXPORT_FORMATS else default
+
+
+def _local(value: datetime) -> datetime:
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.replace(tzinfo=None)
+
+
+def _xlsx_value(sheet, value):
+    if isinstance(value, datetime):
+        return _local(value)
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub('', value)
+        if value.startswith('='):
+            # Texto vindo do usuário nunca deve virar fórmula na planilha.
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.data_type = 's'
+            return cell
+    return value
+
+
+def _csv_value(value, csv_format: CsvFormat = DEFAULT_CSV_FORMAT):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if csv_format.local_time:
+            value = _local(value)
+        return value.strftime(csv_format.datetime_format)
+    if isinstance(value, date):
+        return value.strftime(csv_format.date_format)
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return value
+    value = str(value)
+    if value.startswith(CSV_FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _counting(rows: Iterable[Sequence], on_complete: Callable[[int], None] | None):
+    count = 0
+    for row in rows:
+        count += 1
+        yield row
+    if on_complete is not None:
+        on_complete(count)
+
+
+def _stream_csv(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    filename: str,
+    csv_format: CsvFormat = DEFAULT_CSV_FORMAT,
+):
+    writer = csv.writer(_Echo(), lineterminator=csv_format.line_terminator)
+
+    def _generate():
+        yield ('\ufeff' if csv_format.bom else '') + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_csv_value(value, csv_format) for value in row])
+
+    response = StreamingHttpResponse(_generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = content_disposition_header(True, f'{filename}.csv')
+    return response
+
+
+def _xlsx_file(header: Sequence[str], rows: Iterable[Sequence], filename: str, title: str):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=(title or 'Dados')[:31])
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append([_xlsx_value(sheet, value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def export_rows(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    *,
+    filename: str,
+    fmt: str = 'xlsx',
+    title: str = '',
+    on_complete: Callable[[int], None] | None = None,
+    csv_format: CsvFormat = DEFAULT_CSV_FORMAT,
+):
+    """
+    Resposta de download com as linhas informadas.
+
+    filename vai sem extensão. on_complete recebe a quantidade de linhas
+    exportadas; no CSV é chamado ao final do streaming. csv_format permite
+    manter o formato de datas de exportações já consumidas por outros
+    sistemas.
+    """
+    rows = _counting(rows, on_complete)
+    if fmt == 'csv':
+        return _stream_csv(header, rows, filename, csv_format)
+    return _xlsx_file(header, rows, filename, title)
+
+
+def export_queryset(
+    queryset,
+    columns: Sequence[tuple[str, str]],
+    *,
+    filename: str,
+    fmt: str = 'xlsx',
+    title: str = '',
+    on_complete: Callable[[int], None] | None = None,
+    csv_format: CsvFormat = DEFAULT_CSV_FORMAT,
+):
+    """
+    Exporta o queryset com as colunas (cabeçalho, campo) informadas.
+
+    Os campos aceitam lookups (ex.: 'client__name') e são lidos com
+    values_list em blocos, sem instanciar os modelos.
+    """
+    rows = queryset.values_list(*[field for _, field in columns]).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE)
+    return export_rows(
+        [label for label, _ in columns],
+        rows,
+        filename=filename,
+        fmt=fmt,
+        title=title,
+        on_complete=on_complete,
+        csv_format=csv_format,
+    )
@@ -18,7 +18,7 @@ class ConfiguracaoSistemaForm(forms.ModelForm):
             'default_printer': forms.TextInput(
                 attrs={
                     'class': 'form-control ds-input',
-                    'placeholder': 'Ex.: EPSON_TM-T20, PDF, Microsoft Print to PDF',
+                    'placeholder': 'Ex.: EPSON_TM-T20, tcp://192.168.0.50:9100, cups://Cozinha',
                 }
             ),
             'auto_open_print': forms.CheckboxInput(
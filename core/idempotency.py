@@ -0,0 +1,127 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+from core.utils import get_user_company
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+
+
+def idempotency_ttl() -> timedelta:
+    return timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def idempotent(scope: str):
+    """
+    Torna uma view JSON de POST idempotente pela chave enviada pelo cliente.
+
+    A chave vem do cabeçalho Idempotency-Key (ou do campo idempotency_key)
+    e é registrada por (empresa, scope, chave) na mesma transação da view:
+    uma requisição duplicada concorrente espera a primeira terminar e recebe
+    a resposta gravada. Só respostas de sucesso são guardadas; em caso de
+    falha a chave é liberada para uma nova tentativa. A chave guarda o hash
+    do corpo da requisição: reutilizá-la com outro corpo responde 422. Sem
+    chave, a view roda normalmente.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            # O corpo é lido antes de request.POST (multipart não permite depois).
+            body_hash = request_hash(request) if request.method == 'POST' else ''
+            key = (
+                request.headers.get(IDEMPOTENCY_HEADER)
+                or request.POST.get(IDEMPOTENCY_FIELD)
+                or ''
+            ).strip()
+            company = get_user_company(request)
+            if request.method != 'POST' or not key or not company:
+                return view_func(request, *args, **kwargs)
+            if len(key) > 64:
+                return JsonResponse(
+                    {'status': 'failed', 'msg': 'Chave de idempotência inválida.'},
+                    status=400,
+                )
+
+            with transaction.atomic():
+                record = _claim_key(company, scope, key, body_hash)
+                if record.request_hash != body_hash:
+                    return JsonResponse(
+                        {
+                            'status': 'failed',
+                            'msg': 'Chave de idempotência já usada em outra requisição.',
+                        },
+                        status=422,
+                    )
+                if record.response_body is not None:
+                    response = JsonResponse(
+                        record.response_body, status=record.status_code)
+                    response['Idempotent-Replayed'] = 'true'
+                    return response
+
+                response = view_func(request, *args, **kwargs)
+                body = _success_body(response)
+                if body is None:
+                    record.delete()
+                else:
+                    record.response_body = body
+                    record.status_code = response.status_code
+                    record.save(update_fields=['response_body', 'status_code'])
+            return response
+        return wrapper
+    return decorator
+
+
+def request_hash(request) -> str:
+    """SHA-256 do corpo da requisição, guardado junto com a chave."""
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _claim_key(company, scope: str, key: str, body_hash: str) -> IdempotencyKey:
+    """
+    Registra a chave ou, se ela já existe, trava o registro até a requisição
+    que a detém terminar. Chaves expiradas são reaproveitadas.
+    """
+    lookup = {'company': company, 'scope': scope, 'key': key}
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(**lookup, request_hash=body_hash)
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.select_for_update().filter(**lookup).first()
+    if record is None:
+        # A requisição original falhou e liberou a chave.
+        return IdempotencyKey.objects.create(**lookup, request_hash=body_hash)
+    if record.created_at < timezone.now() - idempotency_ttl():
+        record.delete()
+        return IdempotencyKey.objects.create(**lookup, request_hash=body_hash)
+    return record
+
+
+def _success_body(response):
+    """Corpo JSON da resposta quando ela representa uma operação concluída."""
+    if not isinstance(response, JsonResponse) or response.status_code >= 400:
+        return None
+    try:
+        body = json.loads(response.content)
+    except ValueError:
+        return None
+    if isinstance(body, dict) and body.get('status') == 'success':
+        return body
+    return None
+
+
+def purge_expired_keys() -> int:
+    """Remove as chaves cuja janela de reenvio já passou."""
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - idempotency_ttl()
+    ).delete()
+    return deleted
@@ -0,0 +1,18 @@
+"""
+Remove as chaves de idempotência expiradas (ver settings.IDEMPOTENCY_KEY_TTL).
+
+Para usar:
+    python manage.py purge_idempotency_keys
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Remove as chaves de idempotência expiradas'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chave(s) removida(s).'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=30)),
+                ('period', models.CharField(blank=True, default='', max_length=10)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+            ],
+            options={
+                'verbose_name': 'Contador sequencial',
+                'verbose_name_plural': 'Contadores sequenciais',
+                'constraints': [models.UniqueConstraint(fields=('company', 'namespace', 'period'), name='sequence_company_ns_period_uniq')],
+            },
+        ),
+    ]
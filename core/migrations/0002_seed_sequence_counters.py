@@ -0,0 +1,68 @@
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+
+def _max_suffix(queryset, field, prefix):
+    """Maior sufixo numérico dos valores de `field` iniciados por `prefix`."""
+    max_value = (
+        queryset.filter(**{f'{field}__startswith': prefix})
+        .aggregate(max_value=Max(field))
+        .get('max_value')
+    )
+    suffix = str(max_value or '')[len(prefix):]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def seed_sequence_counters(apps, schema_editor):
+    """Inicia os contadores do período atual a partir dos códigos já emitidos."""
+    Company = apps.get_model('p_v_App', 'Company')
+    Sales = apps.get_model('p_v_App', 'Sales')
+    Pedido = apps.get_model('p_v_App', 'Pedido')
+    CatalogOrder = apps.get_model('public_catalog', 'CatalogOrder')
+    SequenceCounter = apps.get_model('core', 'SequenceCounter')
+
+    sale_prefix = str(timezone.now().year * 2)
+    catalog_prefix = timezone.localtime().strftime('%Y%m%d')
+
+    counters = []
+    for company_id in Company.objects.values_list('id', flat=True):
+        last_sale = max(
+            _max_suffix(Sales.objects.filter(company_id=company_id), 'code', sale_prefix),
+            _max_suffix(Pedido.objects.filter(company_id=company_id), 'code', sale_prefix),
+        )
+        if last_sale:
+            counters.append(SequenceCounter(
+                company_id=company_id,
+                namespace='sale',
+                period=sale_prefix,
+                last_value=last_sale,
+            ))
+
+        last_order = _max_suffix(
+            CatalogOrder.objects.filter(company_id=company_id),
+            'order_number',
+            f'{catalog_prefix}-',
+        )
+        if last_order:
+            counters.append(SequenceCounter(
+                company_id=company_id,
+                namespace='catalog_order',
+                period=catalog_prefix,
+                last_value=last_order,
+            ))
+
+    SequenceCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_sequence_counter'),
+        ('p_v_App', '0020_estoque_unique_produto'),
+        ('public_catalog', '0005_catalogorder_number_per_company'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sequence_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+import logging
+
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+# (modelo, campo, expressão indexada) usados por core.search
+SEARCH_INDEXES = (
+    ('p_v_App', 'Sales', 'code', 'core_unaccent(lower({column}))'),
+    ('p_v_App', 'Sales', 'customer_name', 'core_unaccent(lower({column}))'),
+    ('p_v_App', 'Pedido', 'customer_name', 'core_unaccent(lower({column}))'),
+    ('clients', 'Client', 'name', 'core_unaccent(lower({column}))'),
+    ('clients', 'Client', 'cpf', 'core_digits({column})'),
+    ('clients', 'Client', 'phone', 'core_digits({column})'),
+    ('public_catalog', 'CatalogOrder', 'customer_phone', 'core_digits({column})'),
+)
+
+CREATE_FUNCTIONS = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE OR REPLACE FUNCTION core_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+CREATE OR REPLACE FUNCTION core_digits(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT regexp_replace($1, '[^0-9]', '', 'g') $$;
+"""
+
+
+def _index_name(model, field):
+    return f'search_{model._meta.model_name}_{field}_trgm'
+
+
+def create_search_indexes(apps, schema_editor):
+    """
+    Instala pg_trgm/unaccent e cria os índices GIN trigram da busca.
+
+    Só no PostgreSQL; se o usuário do banco não puder criar as extensões,
+    nada é criado e core.search continua usando icontains.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(CREATE_FUNCTIONS)
+            for app_label, model_name, field_name, expression in SEARCH_INDEXES:
+                model = apps.get_model(app_label, model_name)
+                column = quote(model._meta.get_field(field_name).column)
+                schema_editor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {quote(_index_name(model, field_name))} '
+                    f'ON {quote(model._meta.db_table)} '
+                    f'USING gin ({expression.format(column=column)} gin_trgm_ops)'
+                )
+    except DatabaseError as exc:
+        logger.warning('Busca sem acentos indisponível (%s); usando icontains.', exc)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for app_label, model_name, field_name, _ in SEARCH_INDEXES:
+        model = apps.get_model(app_label, model_name)
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {quote(_index_name(model, field_name))}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS core_unaccent(text)')
+    schema_editor.execute('DROP FUNCTION IF EXISTS core_digits(text)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_idempotency_key'),
+        ('p_v_App', '0021_cash_session_running_totals'),
+        ('clients', '0003_tenant_indexes'),
+        ('public_catalog', '0005_catalogorder_number_per_company'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
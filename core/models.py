@@ -1,2 +1,108 @@
+from typing import Callable, Optional
 
-# Create your models here.
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+from p_v_App.models_tenant import TenantMixin
+
+
+class SequenceCounter(TenantMixin):
+    """
+    Contador sequencial por empresa, namespace e período
+
+    Substitui a busca pelo maior código existente: cada número é obtido com
+    um UPDATE atômico na linha do contador, sem colisões entre vendas
+    simultâneas.
+    """
+    SALE = 'sale'
+    CATALOG_ORDER = 'catalog_order'
+
+    namespace = models.CharField(max_length=30)
+    period = models.CharField(max_length=10, blank=True, default='')
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contador sequencial'
+        verbose_name_plural = 'Contadores sequenciais'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'namespace', 'period'],
+                name='sequence_company_ns_period_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.namespace}:{self.period} = {self.last_value}'
+
+    @classmethod
+    def next_value(
+        cls,
+        company,
+        namespace: str,
+        period: str = '',
+        seed: Optional[Callable[[], int]] = None,
+        count: int = 1,
+    ) -> int:
+        """
+        Reserva e retorna o próximo número da sequência.
+
+        O incremento é feito no banco e a linha fica travada até o fim da
+        transação, então chamadas concorrentes nunca recebem o mesmo número.
+        Na primeira chamada do período o contador é criado a partir de seed()
+        (o maior número já usado), quando informado. Com count > 1 reserva um
+        bloco de números e retorna o último deles.
+        """
+        company_id = getattr(company, 'pk', company)
+        counter = cls.objects.filter(
+            company_id=company_id, namespace=namespace, period=period)
+
+        with transaction.atomic():
+            if counter.update(last_value=F('last_value') + count):
+                return counter.values_list('last_value', flat=True).get()
+
+            last_value = (seed() if seed else 0) + count
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        company_id=company_id,
+                        namespace=namespace,
+                        period=period,
+                        last_value=last_value,
+                    )
+                return last_value
+            except IntegrityError:
+                # Outra transação criou o contador primeiro.
+                counter.update(last_value=F('last_value') + count)
+                return counter.values_list('last_value', flat=True).get()
+
+
+class IdempotencyKey(TenantMixin):
+    """
+    Resposta registrada para uma chave de idempotência enviada pelo cliente
+
+    Reenvios da mesma requisição (duplo clique, nova tentativa após falha de
+    rede) recebem a resposta original em vez de repetir a operação.
+    """
+    key = models.CharField(max_length=64)
+    scope = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=64, blank=True, default='')
+    response_body = models.JSONField(null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(default=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Chave de idempotência'
+        verbose_name_plural = 'Chaves de idempotência'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'scope', 'key'],
+                name='idempotency_company_key_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'],
+                         name='idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope}:{self.key}'
@@ -0,0 +1,181 @@
+"""
+Busca por texto em vendas, pedidos, clientes e pedidos do catálogo.
+
+No PostgreSQL os campos de texto são comparados como
+core_unaccent(lower(campo)) LIKE '%termo%' e os de telefone/CPF como
+core_digits(campo) LIKE '%123%'. As duas expressões são cobertas pelos
+índices GIN trigram (pg_trgm) criados na migração core 0004, então a busca
+ignora acentos e não percorre a tabela. Em outros bancos, ou se as
+extensões não puderam ser instaladas, a busca usa icontains.
+
+Os resultados são paginados por keyset (id decrescente): a próxima página
+é pedida com o último id recebido, sem OFFSET.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+from django.db.models import CharField, Func, Q
+from django.db.models.functions import Lower
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_SIZE_MAX = 100
+# Trigramas precisam de pelo menos 3 caracteres para usar o índice.
+SEARCH_MIN_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SearchTarget:
+    model: str
+    text_fields: tuple[str, ...] = ()
+    digit_fields: tuple[str, ...] = ()
+    # Campos devolvidos pela busca global (além do id)
+    columns: tuple[str, ...] = ()
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+SEARCH_TARGETS = {
+    'sales': SearchTarget(
+        'p_v_App.Sales',
+        text_fields=('code', 'customer_name'),
+        columns=('code', 'customer_name', 'grand_total', 'date_added'),
+    ),
+    'pedidos': SearchTarget(
+        'p_v_App.Pedido',
+        text_fields=('customer_name',),
+        columns=('code', 'customer_name', 'grand_total', 'status', 'date_added'),
+    ),
+    'clients': SearchTarget(
+        'clients.Client',
+        text_fields=('name',),
+        digit_fields=('cpf', 'phone'),
+        columns=('name', 'cpf', 'phone'),
+    ),
+    'catalog_orders': SearchTarget(
+        'public_catalog.CatalogOrder',
+        digit_fields=('customer_phone',),
+        columns=('order_number', 'customer_name', 'customer_phone', 'total_value', 'created_at'),
+    ),
+}
+
+
+class Unaccent(Func):
+    """core_unaccent(texto): unaccent() imutável, criado pela migração core 0004."""
+    function = 'core_unaccent'
+    output_field = CharField()
+
+
+class Digits(Func):
+    """core_digits(texto): apenas os dígitos, criado pela migração core 0004."""
+    function = 'core_digits'
+    output_field = CharField()
+
+
+_indexed_search: dict[str, bool] = {}
+
+
+def has_indexed_search(using: str = 'default') -> bool:
+    """Indica se o banco tem as funções (e índices) da busca sem acentos."""
+    if using not in _indexed_search:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT to_regprocedure('core_unaccent(text)') IS NOT NULL"
+                        " AND to_regprocedure('core_digits(text)') IS NOT NULL"
+                    )
+                    available = bool(cursor.fetchone()[0])
+            except DatabaseError:
+                available = False
+        _indexed_search[using] = available
+    return _indexed_search[using]
+
+
+def normalize_search_text(value: str) -> str:
+    """Texto em minúsculas e sem acentos, como core_unaccent(lower(...))."""
+    normalized = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+def _search_digits(query: str) -> str:
+    """Dígitos do termo, quando ele parece um CPF ou telefone (só números e pontuação)."""
+    if re.search(r'[^\d\s().+/-]', query):
+        return ''
+    return re.sub(r'\D', '', query)
+
+
+def filter_search(queryset, kind: str, query: str):
+    """
+    Filtra o queryset pelos campos de busca do tipo informado.
+
+    Termos curtos também funcionam, mas só usam os índices a partir de
+    SEARCH_MIN_LENGTH caracteres.
+    """
+    target = SEARCH_TARGETS[kind]
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    digits = _search_digits(query)
+    condition = Q()
+    if has_indexed_search(queryset.db):
+        text = normalize_search_text(query)
+        aliases = {}
+        for field in target.text_fields:
+            aliases[f'_search_{field}'] = Unaccent(Lower(field))
+            condition |= Q(**{f'_search_{field}__contains': text})
+        if digits:
+            for field in target.digit_fields:
+                aliases[f'_search_{field}'] = Digits(field)
+                condition |= Q(**{f'_search_{field}__contains': digits})
+        queryset = queryset.alias(**aliases)
+    else:
+        for field in target.text_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        if digits:
+            for field in target.digit_fields:
+                condition |= Q(**{f'{field}__icontains': query})
+                if digits != query:
+                    condition |= Q(**{f'{field}__icontains': digits})
+
+    if not condition:
+        return queryset.none()
+    return queryset.filter(condition)
+
+
+def search_page(
+    company,
+    kind: str,
+    query: str,
+    *,
+    after: int | None = None,
+    limit: int = SEARCH_PAGE_SIZE,
+) -> tuple[list[dict], int | None]:
+    """
+    Uma página de resultados do tipo informado: (linhas, cursor).
+
+    As linhas trazem o id e as colunas do alvo; o cursor é o id a passar em
+    `after` para a próxima página, ou None na última.
+    """
+    target = SEARCH_TARGETS[kind]
+    if len((query or '').strip()) < SEARCH_MIN_LENGTH:
+        return [], None
+
+    limit = max(1, min(limit, SEARCH_PAGE_SIZE_MAX))
+    queryset = filter_search(
+        target.get_model().objects.filter(company=company), kind, query)
+    if after is not None:
+        queryset = queryset.filter(pk__lt=after)
+    rows = list(queryset.order_by('-pk').values('id', *target.columns)[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1]['id']
+    return rows, None
@@ -1,2 +1,172 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from clients.models import Client
+from core.models import SequenceCounter
+from core.search import (
+    SEARCH_PAGE_SIZE_MAX,
+    has_indexed_search,
+    normalize_search_text,
+    search_page,
+)
+from core.utils import generate_sale_code, generate_sale_codes
+from p_v_App.models import Pedido, Sales
+from p_v_App.models_tenant import Company, UserProfile
+
+
+class SequenceCounterTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+
+    def test_next_value_reserves_blocks(self):
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste'), 1)
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste', count=3), 4)
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste'), 5)
+
+    def test_seed_is_used_only_on_first_call(self):
+        calls = []
+
+        def seed():
+            calls.append(1)
+            return 41
+
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste', seed=seed), 42)
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste', seed=seed), 43)
+        self.assertEqual(len(calls), 1)
+
+    def test_counters_are_independent_per_company_and_period(self):
+        other = Company.objects.create(name='Outra Empresa')
+
+        SequenceCounter.next_value(self.company, 'teste', '2026', count=5)
+
+        self.assertEqual(SequenceCounter.next_value(other, 'teste', '2026'), 1)
+        self.assertEqual(SequenceCounter.next_value(self.company, 'teste', '2027'), 1)
+
+
+class SaleCodeTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+        self.prefix = str(timezone.now().year * 2)
+
+    def _sale(self, code):
+        return Sales.objects.create(company=self.company, code=code, sub_total=10, grand_total=10)
+
+    def _pedido(self, code):
+        return Pedido.objects.create(company=self.company, code=code, sub_total=10, grand_total=10)
+
+    def test_counter_is_seeded_from_existing_codes(self):
+        self._sale(f'{self.prefix}00007')
+        self._pedido(f'{self.prefix}00012')
+
+        self.assertEqual(generate_sale_code(self.company), f'{self.prefix}00013')
+
+    def test_block_of_codes_is_consecutive(self):
+        self._sale(f'{self.prefix}00003')
+
+        codes = generate_sale_codes(self.company, 3)
+
+        self.assertEqual(codes, [f'{self.prefix}{idx:05d}' for idx in (4, 5, 6)])
+        self.assertEqual(generate_sale_code(self.company), f'{self.prefix}00007')
+
+    def test_sales_and_orders_never_share_a_code(self):
+        codes = []
+        for index in range(6):
+            code = generate_sale_code(self.company)
+            if index % 2:
+                self._pedido(code)
+            else:
+                self._sale(code)
+            codes.append(code)
+        codes.extend(generate_sale_codes(self.company, 2))
+
+        self.assertEqual(len(set(codes)), len(codes))
+        used = set(Sales.objects.filter(company=self.company).values_list('code', flat=True))
+        self.assertFalse(used & set(
+            Pedido.objects.filter(company=self.company).values_list('code', flat=True)))
+        self.assertEqual(codes, sorted(codes))
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+
+    def _clients(self, *names):
+        return Client.objects.bulk_create(
+            [Client(company=self.company, name=name) for name in names])
+
+    def _names(self, query, **kwargs):
+        rows, _ = search_page(self.company, 'clients', query, **kwargs)
+        return [row['name'] for row in rows]
+
+    def test_normalize_search_text(self):
+        self.assertEqual(normalize_search_text('JOSÉ Conceição'), 'jose conceicao')
+
+    def test_case_insensitive_match(self):
+        self._clients('Maria Souza', 'Pedro Lima')
+
+        self.assertEqual(self._names('MARIA'), ['Maria Souza'])
+        self.assertEqual(self._names('souza'), ['Maria Souza'])
+
+    def test_accent_insensitive_match(self):
+        # core_unaccent só existe no PostgreSQL com as extensões instaladas.
+        if not has_indexed_search():
+            self.skipTest('busca sem acentos indisponível neste banco')
+        self._clients('José Conceição', 'Joao Silva')
+
+        self.assertEqual(self._names('jose conceicao'), ['José Conceição'])
+        self.assertEqual(self._names('JOÃO'), ['Joao Silva'])
+
+    def test_short_terms_are_ignored(self):
+        self._clients('Ana Souza')
+
+        self.assertEqual(search_page(self.company, 'clients', 'an'), ([], None))
+        self.assertEqual(search_page(self.company, 'clients', '  an  '), ([], None))
+        self.assertEqual(self._names('ana'), ['Ana Souza'])
+
+    def test_limit_is_capped(self):
+        self._clients(*(f'Cliente {index:03d}' for index in range(SEARCH_PAGE_SIZE_MAX + 5)))
+
+        rows, cursor = search_page(self.company, 'clients', 'cliente', limit=1000)
+
+        self.assertEqual(len(rows), SEARCH_PAGE_SIZE_MAX)
+        self.assertEqual(cursor, rows[-1]['id'])
+        self.assertEqual(len(self._names('cliente', limit=0)), 1)
+
+    def test_keyset_pagination(self):
+        clients = self._clients(*(f'Cliente {index}' for index in range(5)))
+        other = Company.objects.create(name='Outra Empresa')
+        Client.objects.create(company=other, name='Cliente de outra empresa')
+
+        pages, after = [], None
+        while True:
+            rows, after = search_page(self.company, 'clients', 'cliente', after=after, limit=2)
+            pages.append([row['id'] for row in rows])
+            if after is None:
+                break
+
+        expected = sorted((client.pk for client in clients), reverse=True)
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_global_search_view(self):
+        user = get_user_model().objects.create_user('caixa', password='senha-123')
+        UserProfile.objects.create(user=user, company=self.company)
+        self.client.force_login(user)
+        self._clients(*(f'Cliente {index}' for index in range(3)))
+
+        first = self.client.get(
+            reverse('global-search'), {'q': 'cliente', 'tipo': 'clients', 'limit': 2}).json()
+        cursor = first['results']['clients']['next']
+        second = self.client.get(
+            reverse('global-search'),
+            {'q': 'cliente', 'tipo': 'clients', 'limit': 2, 'after': cursor}).json()
+        short = self.client.get(reverse('global-search'), {'q': 'cl'}).json()
+
+        self.assertEqual(len(first['results']['clients']['items']), 2)
+        self.assertEqual(len(second['results']['clients']['items']), 1)
+        self.assertIsNone(second['results']['clients']['next'])
+        self.assertTrue(all(not result['items'] for result in short['results'].values()))
@@ -1,27 +1,30 @@
 from decimal import Decimal, InvalidOperation
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Iterable, Optional, Sequence
 
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import connection, transaction
-from django.db.models import Q, Sum, Max
-from django.db.models.functions import TruncDate
+from django.db.models import F, Max, Sum
 from django.db.utils import OperationalError, ProgrammingError
 from django.shortcuts import redirect
 from django.utils import timezone
 
-from p_v_App.models import Garcom, Estoque, Sales, Table, TableOrder, TableOrderItem, salesItems
-from p_v_App.models_tenant import Company
-from sales.utils import register_sale_payments
+from core.models import SequenceCounter
+from p_v_App.models import Garcom, Pedido, Sales, Table, TableOrder, TableOrderItem, salesItems
+from p_v_App.models_tenant import Company, get_current_company, get_default_company
+from sales.posting import build_line, post_sale, restore_sale_stock
+from sales.models import DailyProductSales
+from sales.rollups import apply_sale_rollups
 
 
 def get_user_company(request) -> Optional[Company]:
     """Return the company associated with the authenticated user."""
-    if hasattr(request.user, 'profile') and request.user.profile.company:
-        return request.user.profile.company
+    company = get_current_company(request)
+    if company:
+        return company
     if request.user.is_superuser:
-        return Company.objects.first()
+        return get_default_company()
     return None
 
 
@@ -56,36 +59,46 @@ def guard_tables_ready(request, redirect_name: str = 'mesas'):
     return redirect(redirect_name)
 
 
-def generate_sale_code(company: Company, extra_querysets=None) -> str:
-    if extra_querysets is None:
-        extra_querysets = []
-    prefix = timezone.now().year * 2
-    prefix_str = str(prefix)
+def max_code_sequence(queryset, prefix: str) -> int:
+    """Extract the highest numeric suffix for codes that start with the prefix."""
+    max_code = (
+        queryset.filter(code__startswith=prefix)
+        .aggregate(max_code=Max('code'))
+        .get('max_code')
+    )
+    if not max_code:
+        return 0
+    suffix = str(max_code)[len(prefix):]
+    return int(suffix) if suffix.isdigit() else 0
 
-    def _max_sequence(qs) -> int:
-        """Extract the highest numeric suffix for codes that start with the prefix."""
-        max_code = (
-            qs.filter(code__startswith=prefix_str)
-            .aggregate(max_code=Max('code'))
-            .get('max_code')
-        )
-        if not max_code:
-            return 0
-        suffix = str(max_code)[len(prefix_str):]
-        return int(suffix) if suffix.isdigit() else 0
 
-    max_idx = _max_sequence(Sales.objects.filter(company=company))
-    for qs in extra_querysets:
-        max_idx = max(max_idx, _max_sequence(qs))
+def generate_sale_code(company: Company) -> str:
+    """
+    Reserve the next sale/order code for the company.
+
+    Sales and Pedido share the same sequence, so a code is never reused by
+    either table. The counter is seeded from existing codes on first use of
+    each prefix.
+    """
+    return generate_sale_codes(company, 1)[0]
+
 
-    next_idx = max_idx + 1
-    while True:
-        code = f'{prefix}{next_idx:05d}'
-        if not Sales.objects.filter(company=company, code=code).exists() and all(
-            not qs.filter(code=code).exists() for qs in extra_querysets
-        ):
-            return code
-        next_idx += 1
+def generate_sale_codes(company: Company, count: int) -> list[str]:
+    """Reserve `count` consecutive sale codes with a single counter update."""
+    prefix = str(timezone.now().year * 2)
+
+    def seed() -> int:
+        return max(
+            max_code_sequence(Sales.objects.filter(company=company), prefix),
+            max_code_sequence(Pedido.objects.filter(company=company), prefix),
+        )
+
+    last_idx = SequenceCounter.next_value(
+        company, SequenceCounter.SALE, prefix, seed=seed, count=count)
+    return [
+        f'{prefix}{idx:05d}'
+        for idx in range(last_idx - count + 1, last_idx + 1)
+    ]
 
 
 def _to_decimal(value, default: str = '0') -> Decimal:
@@ -168,7 +181,7 @@ def create_sale_from_table_order(
     table = order.table
     sale_code = generate_sale_code(company)
 
-    sale = Sales.objects.create(
+    sale = Sales(
         company=company,
         code=sale_code,
         customer_name=f'Mesa {table.number}',
@@ -180,6 +193,7 @@ def create_sale_from_table_order(
         amount_change=float(change_total),
         forma_pagamento=primary_method or 'PIX',
         type=f'Mesa {table.number}',
+        channel=Sales.Channel.TABLE,
         status='entregue',
         delivery_fee=0,
         discount_total=float(order.discount_amount or 0),
@@ -189,26 +203,16 @@ def create_sale_from_table_order(
         table_order=order,
     )
 
-    register_sale_payments(sale, allocations, user)
-
-    items = order.items.select_related('product').all()
-    for item in items:
-        salesItems.objects.create(
-            sale_id=sale,
-            product_id=item.product,
-            price=float(item.unit_price),
-            qty=float(item.quantity),
-            total=float(item.total),
+    lines = [
+        build_line(
+            item.product,
+            item.quantity,
+            item.unit_price,
+            total=item.total,
         )
-        try:
-            estoque_item = Estoque.objects.get(
-                produto=item.product, company=company)
-            estoque_item.quantidade -= float(item.quantity)
-            estoque_item.save(update_fields=['quantidade'])
-        except Estoque.DoesNotExist:
-            pass
-
-    return sale
+        for item in order.items.select_related('product')
+    ]
+    return post_sale(sale, lines, allocations=allocations, user=user)
 
 
 def reopen_table_order(order: TableOrder, company: Company):
@@ -222,33 +226,8 @@ def reopen_table_order(order: TableOrder, company: Company):
         sale = order.sales.filter(
             company=company).order_by('-date_added').first()
         if sale:
-            sale_items = list(
-                salesItems.objects.filter(sale_id=sale)
-                .select_related('product_id')
-                .prefetch_related('combo_components__component')
-            )
-            for sale_item in sale_items:
-                if getattr(sale_item.product_id, 'is_combo', False):
-                    for combo in sale_item.combo_components.all():
-                        try:
-                            estoque_item = Estoque.objects.get(
-                                produto=combo.component,
-                                company=company,
-                            )
-                            estoque_item.quantidade += float(combo.quantity)
-                            estoque_item.save(update_fields=['quantidade'])
-                        except Estoque.DoesNotExist:
-                            pass
-                else:
-                    try:
-                        estoque_item = Estoque.objects.get(
-                            produto=sale_item.product_id,
-                            company=company,
-                        )
-                        estoque_item.quantidade += float(sale_item.qty)
-                        estoque_item.save(update_fields=['quantidade'])
-                    except Estoque.DoesNotExist:
-                        pass
+            restore_sale_stock(sale, table_order=order)
+            apply_sale_rollups(sale, sign=-1)
             salesItems.objects.filter(sale_id=sale).delete()
             sale.delete()
 
@@ -300,25 +279,62 @@ def get_date_range_from_request(request, delta_days: int = 30) -> tuple[datetime
     return start_date, end_date
 
 
+def parse_date_param(value) -> Optional[date]:
+    """Parse a `YYYY-MM-DD` querystring value, returning None when empty/invalid."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def get_datetime_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """Convert an inclusive date range into aware, half-open datetime bounds.
+
+    The bounds are midnight of `start` and midnight of the day after `end`
+    in the current timezone (America/Sao_Paulo), so filters compare the raw
+    column and can use its index instead of casting it with `__date`.
+    """
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(
+        datetime.combine(end + timedelta(days=1), time.min), tz)
+    return start_dt, end_dt
+
+
+def date_range_filter(field: str, start: Optional[date] = None,
+                      end: Optional[date] = None) -> dict:
+    """Build `field__gte`/`field__lt` lookups for an inclusive date range.
+
+    Either side may be omitted for open-ended ranges.
+    """
+    lookups = {}
+    if start is not None:
+        lookups[f'{field}__gte'] = get_datetime_bounds(start, start)[0]
+    if end is not None:
+        lookups[f'{field}__lt'] = get_datetime_bounds(end, end)[1]
+    return lookups
+
+
 def get_report_queryset(start, end, user_company=None):
-    qs = salesItems.objects.filter(
-        (Q(sale_id__type__in=['venda', 'pedido'])
-         | Q(sale_id__type__istartswith='Mesa')),
-        sale_id__date_added__date__gte=start,
-        sale_id__date_added__date__lte=end,
+    """Quantidade e receita por dia e produto, lidas dos resumos diários."""
+    qs = DailyProductSales.objects.filter(
+        day__gte=start,
+        day__lte=end,
     )
 
     if user_company:
-        qs = qs.filter(sale_id__company=user_company)
+        qs = qs.filter(company=user_company)
 
     return (
-        qs.annotate(sale_date=TruncDate('sale_id__date_added'))
-        .values(
-            'sale_date',
-            'product_id__code',
-            'product_id__name',
-            'product_id__category_id__name',
+        qs.values(
+            sale_date=F('day'),
+            product_id__code=F('product__code'),
+            product_id__name=F('product__name'),
+            product_id__category_id__name=F('product__category_id__name'),
         )
-        .annotate(total_quantity=Sum('qty'), total_revenue=Sum('total'))
-        .order_by('-sale_date', 'product_id__code')
+        .annotate(total_quantity=Sum('quantity'), total_revenue=Sum('revenue'))
+        .order_by('-day', 'product__code')
     )
@@ -2,14 +2,18 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Sum
+from django.http import JsonResponse
 from django.utils import timezone
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.views.generic import TemplateView
 
 from core.forms import ConfiguracaoSistemaForm
+from core.search import SEARCH_PAGE_SIZE, SEARCH_TARGETS, search_page
 from core.utils import get_user_company
-from p_v_App.models import Category, Products, Sales
+from p_v_App.models import Category, Products
+from sales.models import DailyPaymentSales
+from sales.printing import discover_printers
 from debts.models import Debt
 
 
@@ -21,8 +25,7 @@ def home(request):
     if user_company:
         categories = Category.objects.filter(company=user_company).count()
         products = Products.objects.filter(company=user_company).count()
-        today_sales = Sales.objects.filter(
-            date_added__date=today, company=user_company)
+        today_sales = DailyPaymentSales.objects.filter(company=user_company, day=today)
         debts_qs = Debt.objects.filter(company=user_company, status=Debt.Status.OPEN)
         debt_total_pending = Debt.aggregate_total(
             company=user_company, status=Debt.Status.OPEN)
@@ -36,17 +39,20 @@ def home(request):
     else:
         categories = 0
         products = 0
-        today_sales = Sales.objects.none()
+        today_sales = DailyPaymentSales.objects.none()
         debt_total_pending = 0
         debt_clients_with_pending = 0
         debt_overdue = 0
 
+    today_totals = today_sales.aggregate(
+        count=Sum('sales_count'), total=Sum('grand_total'))
+
     context = {
         'page_title': 'Início',
         'categories': categories,
         'products': products,
-        'transaction': today_sales.count(),
-        'total_sales': today_sales.aggregate(total=Sum('grand_total'))['total'] or 0,
+        'transaction': today_totals['count'] or 0,
+        'total_sales': today_totals['total'] or 0,
         'debt_total_pending': debt_total_pending,
         'debt_clients_with_pending': debt_clients_with_pending,
         'debt_overdue': debt_overdue,
@@ -67,21 +73,11 @@ class ConfiguracoesView(LoginRequiredMixin, TemplateView):
         return get_user_company(self.request)
 
     def get_printer_choices(self):
-        try:
-            import win32print
-
-            flags = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
-            printers = win32print.EnumPrinters(flags)
-            names = []
-            for printer in printers:
-                # EnumPrinters returns tuples where the last element is the printer name
-                name = printer[-1]
-                if name:
-                    names.append(str(name))
-            return sorted(set(names))
-        except Exception:
-            # Em ambientes sem suporte (Linux/containers), não falhar; manter entrada manual
-            return []
+        # Em ambientes sem impressoras detectáveis a lista vem vazia e a
+        # entrada manual continua disponível.
+        if not hasattr(self, '_printer_choices'):
+            self._printer_choices = discover_printers()
+        return self._printer_choices
 
     def get_form(self):
         return self.form_class(
@@ -120,3 +116,37 @@ class ConfiguracoesView(LoginRequiredMixin, TemplateView):
             return redirect('configuracoes-page')
 
         return self.render_to_response(self.get_context_data(form=form))
+
+
+@login_required
+def global_search(request):
+    """
+    Busca em vendas, pedidos, clientes e pedidos do catálogo (JSON).
+
+    ?q= termo; ?tipo= restringe a um tipo e permite ?after= (cursor devolvido
+    em "next") para as próximas páginas.
+    """
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse(
+            {'status': 'failed', 'msg': 'Usuário não está associado a nenhuma empresa.'},
+            status=403,
+        )
+
+    query = (request.GET.get('q') or '').strip()
+    kind = request.GET.get('tipo', '')
+    kinds = [kind] if kind in SEARCH_TARGETS else list(SEARCH_TARGETS)
+    try:
+        after = int(request.GET['after']) if kind in SEARCH_TARGETS else None
+    except (KeyError, ValueError):
+        after = None
+    try:
+        limit = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        limit = SEARCH_PAGE_SIZE
+
+    results = {}
+    for name in kinds:
+        rows, cursor = search_page(company, name, query, after=after, limit=limit)
+        results[name] = {'items': rows, 'next': cursor}
+    return JsonResponse({'query': query, 'results': results})
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_tenant_indexes'),
+        ('debts', '0002_debt_sale'),
+        ('p_v_App', '0018_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(fields=['company', 'status', 'created_at'], name='debt_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='debt',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['company', 'client'], name='debt_open_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from decimal import Decimal
 
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Q, Sum
 from django.utils import timezone
 
 from p_v_App.models_tenant import TenantMixin, TenantManager
@@ -48,6 +48,13 @@ class Debt(TenantMixin):
         verbose_name = 'Débito'
         verbose_name_plural = 'Débitos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'status', 'created_at'],
+                         name='debt_company_status_idx'),
+            models.Index(fields=['company', 'client'],
+                         condition=Q(status='open'),
+                         name='debt_open_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.client.name} - R$ {self.amount}'
@@ -8,6 +8,7 @@ from django.views import View
 from django.utils.dateparse import parse_date
 
 from clients.models import Client
+from core.exports import export_queryset, get_export_format
 from core.utils import get_user_company
 from debts.models import Debt
 
@@ -156,3 +157,40 @@ class DebtDeleteView(LoginRequiredMixin, View):
         debt.delete()
         messages.success(request, 'Débito removido.')
         return redirect(reverse('debts-list'))
+
+
+class DebtExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        company = get_user_company(request)
+        if not company:
+            messages.error(request, 'Usuário não está associado a nenhuma empresa.')
+            return redirect('home-page')
+
+        debts = Debt.objects.filter(company=company)
+        start_date = parse_date(request.GET.get('start_date') or '')
+        end_date = parse_date(request.GET.get('end_date') or '')
+        if start_date:
+            debts = debts.filter(due_date__gte=start_date)
+        if end_date:
+            debts = debts.filter(due_date__lte=end_date)
+        status_filter = request.GET.get('status', 'open')
+        if status_filter in {Debt.Status.OPEN, Debt.Status.PAID}:
+            debts = debts.filter(status=status_filter)
+
+        return export_queryset(
+            debts.order_by('-created_at'),
+            [
+                ('Cliente', 'client__name'),
+                ('Descrição', 'description'),
+                ('Valor', 'amount'),
+                ('Status', 'status'),
+                ('Vencimento', 'due_date'),
+                ('Venda', 'sale__code'),
+                ('Forma de pagamento', 'payment_method'),
+                ('Criado em', 'created_at'),
+                ('Pago em', 'paid_at'),
+            ],
+            filename=f'debitos_{company.name}',
+            fmt=get_export_format(request),
+            title='Débitos',
+        )
@@ -0,0 +1,84 @@
+"""
+Confere o saldo materializado em Estoque.quantidade contra o livro de estoque.
+
+Para usar:
+    python manage.py rebuild_stock_balances             # apenas relata divergências
+    python manage.py rebuild_stock_balances --company 3
+    python manage.py rebuild_stock_balances --fix       # grava a soma do livro no estoque
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from inventory.models import StockMovement
+from p_v_App.models import Estoque
+from p_v_App.models_tenant import Company
+from sales.catalog import bump_pos_catalog_version
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os saldos de estoque a partir das movimentações registradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID da empresa (padrão: todas)'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corrige Estoque.quantidade com o saldo calculado pelo livro'
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.order_by('id')
+        if options['company']:
+            companies = companies.filter(pk=options['company'])
+            if not companies.exists():
+                raise CommandError(f"Empresa {options['company']} não encontrada.")
+
+        total_drift = 0
+        for company in companies:
+            total_drift += self.rebuild_company(company, fix=options['fix'])
+
+        if not total_drift:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'{total_drift} saldo(s) corrigido(s).'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{total_drift} saldo(s) divergente(s). Use --fix para corrigir.'))
+
+    def rebuild_company(self, company, *, fix):
+        ledger = dict(
+            StockMovement.objects.filter(company=company)
+            .values('produto_id')
+            .annotate(total=Sum('delta'))
+            .values_list('produto_id', 'total')
+        )
+
+        with transaction.atomic():
+            stocks = Estoque.objects.filter(company=company).select_related('produto')
+            if fix:
+                stocks = stocks.select_for_update(of=('self',))
+
+            drifted = []
+            for estoque in stocks:
+                expected = int(ledger.get(estoque.produto_id) or 0)
+                current = estoque.quantidade or 0
+                if current == expected:
+                    continue
+                self.stdout.write(
+                    f'[{company.name}] {estoque.produto}: estoque {current}, '
+                    f'livro {expected} (diferença {current - expected:+})'
+                )
+                estoque.quantidade = expected
+                drifted.append(estoque)
+
+            if fix and drifted:
+                Estoque.objects.bulk_update(drifted, ['quantidade'])
+                bump_pos_catalog_version(company.id)
+
+        return len(drifted)
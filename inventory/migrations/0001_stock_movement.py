@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=0, max_digits=12)),
+                ('reason', models.CharField(choices=[('opening', 'Saldo inicial'), ('sale', 'Venda'), ('reopen', 'Reabertura de venda'), ('import', 'Importação'), ('adjustment', 'Ajuste manual')], max_length=10)),
+                ('reference', models.CharField(blank=True, help_text='Identificação da origem (ex.: pedido ou pedido do catálogo).', max_length=120, verbose_name='Referência')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='p_v_App.products')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='p_v_App.sales')),
+                ('table_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='p_v_App.tableorder')),
+            ],
+            options={
+                'verbose_name': 'Movimentação de estoque',
+                'verbose_name_plural': 'Movimentações de estoque',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['company', 'produto', 'created_at'], name='stockmove_company_prod_idx')],
+            },
+        ),
+    ]
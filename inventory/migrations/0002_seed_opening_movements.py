@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def seed_opening_movements(apps, schema_editor):
+    """Registra o saldo atual de cada estoque como movimentação de saldo inicial."""
+    Estoque = apps.get_model('p_v_App', 'Estoque')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    rows = Estoque.objects.exclude(quantidade=0).exclude(
+        quantidade__isnull=True
+    ).values_list('company_id', 'produto_id', 'quantidade')
+    StockMovement.objects.bulk_create(
+        [
+            StockMovement(
+                company_id=company_id,
+                produto_id=produto_id,
+                delta=quantidade,
+                reason='opening',
+                reference='Saldo existente na criação do livro de estoque',
+            )
+            for company_id, produto_id, quantidade in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+def drop_opening_movements(apps, schema_editor):
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockMovement.objects.filter(reason='opening').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_stock_movement'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_opening_movements, drop_opening_movements),
+    ]
@@ -1,2 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from p_v_App.models import Products
+from p_v_App.models_tenant import TenantMixin, TenantManager
+
+
+User = get_user_model()
+
+
+class StockMovement(TenantMixin):
+    """
+    Movimentação de estoque (registro somente de inclusão)
+
+    Estoque.quantidade é o saldo materializado da soma destas movimentações;
+    por isso delta tem a mesma precisão do saldo (unidades inteiras, ver
+    inventory.stock.round_stock_delta).
+    """
+    class Reason(models.TextChoices):
+        OPENING = 'opening', 'Saldo inicial'
+        SALE = 'sale', 'Venda'
+        REOPEN = 'reopen', 'Reabertura de venda'
+        IMPORT = 'import', 'Importação'
+        ADJUSTMENT = 'adjustment', 'Ajuste manual'
+
+    produto = models.ForeignKey(
+        Products,
+        related_name='stock_movements',
+        on_delete=models.CASCADE,
+    )
+    delta = models.DecimalField(max_digits=12, decimal_places=0)
+    reason = models.CharField(max_length=10, choices=Reason.choices)
+    sale = models.ForeignKey(
+        'p_v_App.Sales',
+        related_name='stock_movements',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    table_order = models.ForeignKey(
+        'p_v_App.TableOrder',
+        related_name='stock_movements',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    reference = models.CharField(
+        'Referência',
+        max_length=120,
+        blank=True,
+        help_text='Identificação da origem (ex.: pedido ou pedido do catálogo).',
+    )
+    recorded_by = models.ForeignKey(
+        User,
+        related_name='stock_movements',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Movimentação de estoque'
+        verbose_name_plural = 'Movimentações de estoque'
+        indexes = [
+            models.Index(fields=['company', 'produto', 'created_at'],
+                         name='stockmove_company_prod_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.produto} {self.delta:+} ({self.get_reason_display()})'
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Mapping
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from inventory.models import StockMovement
+from p_v_App.models import Estoque
+from sales.catalog import bump_pos_catalog_version
+
+
+class InsufficientStockError(ValueError):
+    """Baixa de estoque recusada por deixar algum produto com saldo negativo."""
+
+    def __init__(self, shortages: list[dict]):
+        self.shortages = shortages
+        names = ', '.join(
+            f"{item['name']} (disponível: {item['available']})" for item in shortages
+        )
+        super().__init__(f'Estoque insuficiente para: {names}.')
+
+
+def round_stock_delta(delta) -> Decimal:
+    """
+    Arredonda a variação para unidades inteiras, como Estoque.quantidade.
+
+    Componentes de combo podem gerar baixas fracionadas (ex.: meia porção).
+    O arredondamento é feito uma única vez, antes de atualizar o saldo e de
+    gravar o livro, para que os dois recebam o mesmo valor; meia unidade
+    conta como uma inteira (para longe do zero).
+    """
+    return Decimal(str(delta)).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+def merge_stock_deltas(entries: Iterable[tuple[int, Decimal]]) -> dict[int, Decimal]:
+    """Soma as variações por produto, descartando as que se anulam."""
+    deltas: dict[int, Decimal] = {}
+    for product_id, delta in entries:
+        deltas[product_id] = deltas.get(product_id, Decimal('0')) + Decimal(str(delta))
+    return {product_id: delta for product_id, delta in deltas.items() if delta}
+
+
+def _locked_stock_rows(queryset):
+    """(produto, quantidade, nome) das linhas de estoque, travadas em ordem de produto."""
+    return (
+        queryset.select_for_update(of=('self',))
+        .order_by('produto_id')
+        .values_list('produto_id', 'quantidade', 'produto__name')
+    )
+
+
+def _tracked_products(company, deltas: Mapping[int, Decimal], *, reject_oversell: bool) -> set[int]:
+    """
+    Retorna os produtos com registro de estoque entre os informados.
+
+    Com reject_oversell as linhas são travadas em ordem de produto, para que
+    vendas simultâneas do mesmo item sejam serializadas sem risco de deadlock,
+    e baixas acima do saldo levantam InsufficientStockError.
+    """
+    qs = Estoque.objects.filter(company=company, produto_id__in=list(deltas))
+    if not reject_oversell:
+        return set(qs.values_list('produto_id', flat=True))
+
+    rows = list(_locked_stock_rows(qs))
+    shortages = [
+        {'product_id': product_id, 'name': name, 'available': quantidade}
+        for product_id, quantidade, name in rows
+        if deltas[product_id] < 0 and quantidade + deltas[product_id] < 0
+    ]
+    if shortages:
+        raise InsufficientStockError(shortages)
+    return {product_id for product_id, _, _ in rows}
+
+
+def record_stock_movements(
+    company,
+    deltas: Mapping[int, Decimal],
+    *,
+    reason: str,
+    sale=None,
+    table_order=None,
+    reference: str = '',
+    user=None,
+) -> list[StockMovement]:
+    """
+    Grava no livro de estoque, em um único INSERT, as variações informadas.
+
+    As variações são arredondadas por round_stock_delta; as que arredondam
+    para zero não são gravadas.
+    """
+    company_id = getattr(company, 'pk', company)
+    rounded = {product_id: round_stock_delta(delta) for product_id, delta in deltas.items()}
+    movements = [
+        StockMovement(
+            company_id=company_id,
+            produto_id=product_id,
+            delta=delta,
+            reason=reason,
+            sale=sale,
+            table_order=table_order,
+            reference=reference[:120],
+            recorded_by=user if getattr(user, 'is_authenticated', False) else None,
+        )
+        for product_id, delta in rounded.items()
+        if delta
+    ]
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+    return movements
+
+
+def apply_stock_deltas(
+    company,
+    deltas: Mapping[int, Decimal],
+    *,
+    reason: str = StockMovement.Reason.ADJUSTMENT,
+    sale=None,
+    table_order=None,
+    reference: str = '',
+    user=None,
+    reject_oversell: bool | None = None,
+) -> int:
+    """
+    Aplica as variações de estoque (positivas ou negativas) em um único UPDATE.
+
+    O cálculo é feito no banco (quantidade = quantidade + delta), então vendas
+    simultâneas não sobrescrevem a baixa uma da outra. As variações são
+    arredondadas para unidades inteiras (round_stock_delta) antes do UPDATE e
+    do registro no livro, então os dois ficam iguais. Com reject_oversell
+    (padrão: settings.STOCK_REJECT_OVERSELL) a baixa que deixaria saldo
+    negativo levanta InsufficientStockError. Cada variação aplicada também é
+    registrada em StockMovement e o catálogo do PDV ganha nova versão;
+    produtos sem registro de estoque são ignorados. Retorna a quantidade de
+    linhas atualizadas.
+    """
+    rounded = {product_id: round_stock_delta(delta) for product_id, delta in deltas.items()}
+    deltas = {product_id: delta for product_id, delta in rounded.items() if delta}
+    if not deltas:
+        return 0
+
+    if reject_oversell is None:
+        reject_oversell = getattr(settings, 'STOCK_REJECT_OVERSELL', False)
+
+    with transaction.atomic():
+        tracked = _tracked_products(
+            company, deltas, reject_oversell=reject_oversell)
+        if not tracked:
+            return 0
+
+        whens = [
+            When(
+                produto_id=product_id,
+                then=F('quantidade') + Value(int(deltas[product_id])),
+            )
+            for product_id in tracked
+        ]
+        updated = Estoque.objects.filter(
+            company=company,
+            produto_id__in=list(tracked),
+        ).update(
+            quantidade=Case(*whens, default=F('quantidade'),
+                            output_field=IntegerField()),
+        )
+        record_stock_movements(
+            company,
+            {product_id: deltas[product_id] for product_id in tracked},
+            reason=reason,
+            sale=sale,
+            table_order=table_order,
+            reference=reference,
+            user=user,
+        )
+        bump_pos_catalog_version(getattr(company, 'pk', company))
+    return updated
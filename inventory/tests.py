@@ -1,2 +1,169 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Sum
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+
+from inventory.models import StockMovement
+from inventory.stock import (
+    InsufficientStockError,
+    _locked_stock_rows,
+    apply_stock_deltas,
+    round_stock_delta,
+)
+from p_v_App.models import Category, Estoque, Products, Sales
+from p_v_App.models_tenant import Company
+from sales.posting import build_line, post_sale
+
+
+def _create_stock(quantidade=100):
+    company = Company.objects.create(name='Empresa Teste')
+    category = Category.objects.create(company=company, name='Bebidas', description='')
+    product = Products.objects.create(
+        company=company, code='P1', category_id=category, name='Refrigerante', price=5)
+    estoque = Estoque.objects.create(
+        company=company, produto=product, categoria=category, quantidade=quantidade)
+    StockMovement.objects.create(
+        company=company, produto=product, delta=quantidade,
+        reason=StockMovement.Reason.OPENING)
+    return company, product, estoque
+
+
+def _run_concurrently(func, workers):
+    """Executa func(índice) em várias threads liberadas ao mesmo tempo."""
+    barrier = threading.Barrier(workers)
+
+    def _target(index):
+        try:
+            barrier.wait()
+            return func(index)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_target, index) for index in range(workers)]
+    return [future.exception() for future in futures]
+
+
+class StockDeltaTests(TestCase):
+
+    def setUp(self):
+        self.company, self.product, self.estoque = _create_stock(10)
+
+    def _ledger_total(self):
+        return StockMovement.objects.filter(
+            produto=self.product).aggregate(total=Sum('delta'))['total']
+
+    def test_round_stock_delta_rounds_half_away_from_zero(self):
+        self.assertEqual(round_stock_delta(Decimal('-0.5')), Decimal('-1'))
+        self.assertEqual(round_stock_delta(Decimal('0.5')), Decimal('1'))
+        self.assertEqual(round_stock_delta(Decimal('-0.4')), Decimal('0'))
+        self.assertEqual(round_stock_delta('2.5'), Decimal('3'))
+
+    def test_fractional_delta_reduces_balance_and_ledger_equally(self):
+        apply_stock_deltas(self.company, {self.product.id: Decimal('-0.5')})
+
+        self.estoque.refresh_from_db()
+        self.assertEqual(self.estoque.quantidade, 9)
+        self.assertEqual(self._ledger_total(), Decimal('9'))
+
+    def test_delta_rounded_to_zero_is_not_recorded(self):
+        updated = apply_stock_deltas(self.company, {self.product.id: Decimal('0.4')})
+
+        self.assertEqual(updated, 0)
+        self.assertEqual(StockMovement.objects.filter(produto=self.product).count(), 1)
+
+    def test_reject_oversell(self):
+        with self.assertRaises(InsufficientStockError) as ctx:
+            apply_stock_deltas(
+                self.company, {self.product.id: Decimal('-11')}, reject_oversell=True)
+
+        self.assertEqual(ctx.exception.shortages[0]['available'], 10)
+        self.estoque.refresh_from_db()
+        self.assertEqual(self.estoque.quantidade, 10)
+        self.assertEqual(self._ledger_total(), Decimal('10'))
+
+    def test_oversell_check_locks_rows_in_product_order(self):
+        # Roda em qualquer banco: confere a consulta que o PostgreSQL executa
+        # como SELECT ... FOR UPDATE OF na verificação de saldo.
+        query = _locked_stock_rows(Estoque.objects.filter(company=self.company)).query
+
+        self.assertTrue(query.select_for_update)
+        self.assertEqual(query.select_for_update_of, ('self',))
+        self.assertEqual(query.order_by, ('produto_id',))
+
+    def test_rejected_sale_rolls_back_everything(self):
+        sale = Sales(company=self.company, code='T1', sub_total=55, grand_total=55)
+
+        with self.assertRaises(InsufficientStockError):
+            post_sale(sale, [build_line(self.product, Decimal('11'), 5)], reject_oversell=True)
+
+        self.assertFalse(Sales.objects.filter(company=self.company).exists())
+        self.estoque.refresh_from_db()
+        self.assertEqual(self.estoque.quantidade, 10)
+        self.assertEqual(self._ledger_total(), Decimal('10'))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentStockTests(TransactionTestCase):
+    """
+    Baixas simultâneas do mesmo produto, cada uma em sua própria conexão.
+
+    Rodam no PostgreSQL (o banco de produção): o banco de teste do SQLite
+    fica em memória e não aceita escritas concorrentes.
+    """
+    workers = 8
+
+    def setUp(self):
+        self.company, self.product, self.estoque = _create_stock(100)
+
+    def _assert_balance(self, expected):
+        self.estoque.refresh_from_db()
+        ledger = StockMovement.objects.filter(
+            produto=self.product).aggregate(total=Sum('delta'))['total']
+        self.assertEqual(self.estoque.quantidade, expected)
+        self.assertEqual(ledger, Decimal(expected))
+
+    def test_concurrent_apply_stock_deltas(self):
+        errors = _run_concurrently(
+            lambda index: apply_stock_deltas(
+                self.company, {self.product.id: Decimal('-3')},
+                reason=StockMovement.Reason.SALE),
+            self.workers,
+        )
+
+        self.assertEqual(errors, [None] * self.workers)
+        self._assert_balance(100 - 3 * self.workers)
+
+    def test_concurrent_post_sale(self):
+        def _sell(index):
+            sale = Sales(company=self.company, code=f'T{index}', sub_total=10, grand_total=10)
+            post_sale(sale, [build_line(self.product, Decimal('2'), 5)])
+
+        errors = _run_concurrently(_sell, self.workers)
+
+        self.assertEqual(errors, [None] * self.workers)
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), self.workers)
+        self._assert_balance(100 - 2 * self.workers)
+
+    @override_settings(STOCK_REJECT_OVERSELL=True)
+    def test_concurrent_oversell_is_rejected(self):
+        # 8 baixas de 30 sobre 100 unidades: só 3 cabem no saldo.
+        errors = _run_concurrently(
+            lambda index: apply_stock_deltas(
+                self.company, {self.product.id: Decimal('-30')},
+                reason=StockMovement.Reason.SALE),
+            self.workers,
+        )
+
+        rejected = [error for error in errors if error is not None]
+        self.assertEqual(len(rejected), self.workers - 3)
+        self.assertTrue(all(isinstance(error, InsufficientStockError) for error in rejected))
+        self._assert_balance(10)
@@ -4,6 +4,7 @@ from inventory import views
 
 urlpatterns = [
     path('estoque', views.estoque, name='estoque'),
+    path('export_estoque', views.export_estoque, name='export-estoque'),
     path('delete_product_estoque', views.delete_product_estoque,
          name='delete-product-estoque'),
     path('manage_products_estoque', views.manage_products_estoque,
@@ -8,12 +8,16 @@ from io import BytesIO
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import transaction
 from django.db.models import F, Sum
 from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views import View
 
+from core.exports import export_queryset, get_export_format
 from core.utils import get_user_company
+from inventory.models import StockMovement
+from inventory.stock import merge_stock_deltas, record_stock_movements
 from p_v_App.models import Category, Estoque, Products
 
 from openpyxl import Workbook, load_workbook
@@ -162,6 +166,36 @@ def estoque(request):
     return render(request, 'inventory/estoque.html', context)
 
 
+@login_required
+def export_estoque(request):
+    user_company = get_user_company(request)
+    if not user_company:
+        messages.error(
+            request, 'Usuário não está associado a nenhuma empresa.')
+        return redirect('estoque')
+
+    query = request.GET.get('q', '').strip()
+    estoque_qs = Estoque.objects.filter(company=user_company)
+    if query:
+        estoque_qs = estoque_qs.filter(produto__name__icontains=query)
+    return export_queryset(
+        estoque_qs.order_by('produto__name'),
+        [
+            ('Código', 'produto__code'),
+            ('Produto', 'produto__name'),
+            ('Categoria', 'categoria__name'),
+            ('Quantidade', 'quantidade'),
+            ('Preço', 'produto__price'),
+            ('Custo', 'produto__custo'),
+            ('Validade', 'data_validade'),
+            ('Status', 'status'),
+        ],
+        filename=f'estoque_{user_company.name}',
+        fmt=get_export_format(request),
+        title='Estoque',
+    )
+
+
 @login_required
 def delete_product_estoque(request):
     data = request.POST
@@ -178,7 +212,17 @@ def delete_product_estoque(request):
         resp['msg'] = 'Produto não encontrado.'
         return JsonResponse(resp)
 
-    estoque.delete()
+    with transaction.atomic():
+        # Zera o saldo no livro, para que a soma das movimentações do
+        # produto continue igual ao estoque (agora inexistente).
+        record_stock_movements(
+            user_company,
+            {estoque.produto_id: -(estoque.quantidade or 0)},
+            reason=StockMovement.Reason.ADJUSTMENT,
+            reference='Registro de estoque excluído',
+            user=request.user,
+        )
+        estoque.delete()
     messages.success(request, 'Produto deletado com sucesso.')
     resp['status'] = 'success'
     return JsonResponse(resp)
@@ -247,6 +291,15 @@ def save_product_estoque(request):
     else:
         estoque = Estoque(company=user_company)
 
+    duplicate_qs = Estoque.objects.filter(company=user_company, produto=produto)
+    if estoque.pk:
+        duplicate_qs = duplicate_qs.exclude(pk=estoque.pk)
+    if duplicate_qs.exists():
+        resp['msg'] = 'Já existe um registro de estoque para este produto.'
+        return JsonResponse(resp)
+
+    previous_product_id = estoque.produto_id if estoque.pk else None
+    previous_quantity = (estoque.quantidade or 0) if estoque.pk else 0
     estoque.produto = produto
     estoque.categoria = categoria
     estoque.quantidade = int(quantidade) if quantidade.isnumeric() else 0
@@ -256,7 +309,23 @@ def save_product_estoque(request):
     estoque.status = int(status) if status in ('0', '1') else 1
 
     try:
-        estoque.save()
+        with transaction.atomic():
+            estoque.save()
+            if previous_product_id in (None, produto.id):
+                deltas = {produto.id: estoque.quantidade - previous_quantity}
+            else:
+                # O registro passou a ser de outro produto: o saldo anterior
+                # sai do produto antigo e o novo saldo entra no novo.
+                deltas = {
+                    previous_product_id: -previous_quantity,
+                    produto.id: estoque.quantidade,
+                }
+            record_stock_movements(
+                user_company,
+                deltas,
+                reason=StockMovement.Reason.ADJUSTMENT,
+                user=request.user,
+            )
         messages.success(request, 'Produto salvo com sucesso.')
         return JsonResponse({'status': 'success'})
     except Exception as exc:
@@ -336,6 +405,7 @@ def upload_estoque(request):
     created_count = 0
     updated_count = 0
     error_rows = []
+    stock_deltas = []
 
     def is_empty_row(row):
         return all(
@@ -424,6 +494,7 @@ def upload_estoque(request):
             estoque_obj = Estoque.objects.filter(
                 company=user_company, produto=product).first()
             if estoque_obj:
+                previous_quantity = estoque_obj.quantidade or 0
                 estoque_obj.categoria = category
                 estoque_obj.quantidade = quantity_value
                 estoque_obj.validade = validity_value
@@ -438,6 +509,8 @@ def upload_estoque(request):
                 estoque_obj.descricao = product
                 estoque_obj.status = status_value
                 estoque_obj.save()
+                stock_deltas.append(
+                    (product.id, quantity_value - previous_quantity))
                 updated_count += 1
             else:
                 Estoque.objects.create(
@@ -453,12 +526,21 @@ def upload_estoque(request):
                     status=status_value,
                     descricao=product,
                 )
+                stock_deltas.append((product.id, quantity_value))
                 created_count += 1
         except Exception as exc:
             error_rows.append(
                 f'Linha {row_number}: erro ao salvar estoque ({exc}).')
             continue
 
+    record_stock_movements(
+        user_company,
+        merge_stock_deltas(stock_deltas),
+        reason=StockMovement.Reason.IMPORT,
+        reference='Planilha de estoque',
+        user=request.user,
+    )
+
     if created_count or updated_count:
         if error_rows:
             messages.warning(
@@ -705,6 +787,7 @@ class EstoqueXMLUploadView(View):
         created = 0
         updated = 0
         errors: list[str] = []
+        stock_deltas = []
 
         for idx, item in enumerate(items, start=1):
             code = str(item.get('code') or '').strip()
@@ -756,6 +839,7 @@ class EstoqueXMLUploadView(View):
                 estoque_obj.descricao = product
                 estoque_obj.status = status_value if status_value in (0, 1) else estoque_obj.status
                 estoque_obj.save()
+                stock_deltas.append((product.id, qty_value))
                 updated += 1
             else:
                 Estoque.objects.create(
@@ -769,8 +853,17 @@ class EstoqueXMLUploadView(View):
                     status=status_value if status_value in (0, 1) else 1,
                     descricao=product,
                 )
+                stock_deltas.append((product.id, qty_value))
                 created += 1
 
+        record_stock_movements(
+            company,
+            merge_stock_deltas(stock_deltas),
+            reason=StockMovement.Reason.IMPORT,
+            reference='Importação XML',
+            user=self.request.user,
+        )
+
         status = 'success' if not errors else 'partial'
         msg = f'Estoque atualizado: {created} criado(s) e {updated} atualizado(s).'
         if not created and not updated:
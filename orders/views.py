@@ -13,16 +13,14 @@ from core.utils import (
     serialize_receipt_items,
 )
 from p_v_App.models import (
-    Estoque,
     Pedido,
     PedidoItem,
-    PedidoComboItem,
-    SaleComboItem,
     Sales,
-    salesItems,
     PedidoPayment,
 )
-from sales.utils import get_primary_payment_method, register_sale_payments
+from sales.posting import build_line, post_sale
+from sales.receipt_cache import cached_receipt_response
+from sales.utils import get_primary_payment_method
 
 
 @login_required
@@ -131,7 +129,7 @@ def finalizar_pedido(request, pedido_id):
             discount_reason = pedido.discount_reason if (
                 pedido.discount_total or 0) > 0 else ''
 
-            venda = Sales.objects.create(
+            venda = Sales(
                 code=sale_code,
                 sub_total=pedido.sub_total,
                 tax=pedido.tax,
@@ -146,47 +144,38 @@ def finalizar_pedido(request, pedido_id):
                 discount_total=pedido.discount_total,
                 discount_reason=discount_reason,
                 type='pedido',
+                channel=Sales.Channel.DELIVERY,
                 company=user_company,
             )
 
-            for item in PedidoItem.objects.filter(pedido=pedido).select_related('product'):
-                sale_item = salesItems.objects.create(
-                    sale_id=venda,
-                    product_id=item.product,
-                    qty=item.qty,
-                    price=item.price,
+            pedido_items = (
+                PedidoItem.objects.filter(pedido=pedido)
+                .select_related('product')
+                .prefetch_related('combo_components')
+            )
+            lines = [
+                build_line(
+                    item.product,
+                    item.qty,
+                    item.price,
                     total=item.total,
+                    components=[
+                        {
+                            'component_id': combo.component_id,
+                            'total_quantity': combo.quantity,
+                        }
+                        for combo in item.combo_components.all()
+                    ] if item.product.is_combo else None,
                 )
-                if item.product.is_combo:
-                    combo_components = list(
-                        PedidoComboItem.objects.filter(pedido_item=item)
-                        .select_related('component')
-                    )
-                    for combo in combo_components:
-                        SaleComboItem.objects.create(
-                            sale_item=sale_item,
-                            component=combo.component,
-                            quantity=combo.quantity,
-                        )
-                        try:
-                            estoque_item = Estoque.objects.get(
-                                produto=combo.component,
-                                company=user_company,
-                            )
-                            estoque_item.quantidade -= float(combo.quantity)
-                            estoque_item.save(update_fields=['quantidade'])
-                        except Estoque.DoesNotExist:
-                            pass
-                else:
-                    try:
-                        estoque_item = Estoque.objects.get(
-                            produto=item.product, company=user_company)
-                        estoque_item.quantidade -= item.qty
-                        estoque_item.save(update_fields=['quantidade'])
-                    except Estoque.DoesNotExist:
-                        pass
-
-            register_sale_payments(venda, allocations, request.user)
+                for item in pedido_items
+            ]
+            post_sale(
+                venda,
+                lines,
+                allocations=allocations,
+                user=request.user,
+                reference=f'Pedido {pedido.code}',
+            )
             PedidoItem.objects.filter(pedido=pedido).delete()
             pedido.delete()
     except ValueError as exc:
@@ -228,16 +217,26 @@ def view_pedido(request):
         pedido_id = None
 
     user_company = get_user_company(request)
+    response = cached_receipt_response(
+        request,
+        user_company,
+        'pedido',
+        pedido_id,
+        lambda: _render_pedido_receipt(request, user_company, pedido_id),
+    )
+    if response is None:
+        return render(request, 'core/receipt_not_found.html')
+    return response
+
+
+def _render_pedido_receipt(request, user_company, pedido_id):
     pedido_qs = Pedido.objects.all()
     if user_company:
         pedido_qs = pedido_qs.filter(company=user_company)
 
-    if not pedido_id:
-        return render(request, 'core/receipt_not_found.html')
-
     pedido = pedido_qs.filter(pk=pedido_id).first()
     if not pedido:
-        return render(request, 'core/receipt_not_found.html')
+        return None
 
     items_qs = (
         PedidoItem.objects.filter(pedido=pedido)
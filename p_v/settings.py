@@ -108,6 +108,13 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# O backend do tenant carrega usuário, perfil e empresa em uma única consulta;
+# o ModelBackend permanece para as sessões já abertas com ele.
+AUTHENTICATION_BACKENDS = [
+    'p_v_App.backends.TenantModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 LANGUAGE_CODE = 'pt-br'
 
@@ -154,6 +161,34 @@ else:
     }
     RATELIMIT_ENABLE = False
 
+# Recusa baixas que deixariam o estoque negativo (ver inventory.stock)
+STOCK_REJECT_OVERSELL = os.environ.get(
+    'STOCK_REJECT_OVERSELL', '').lower() in ('1', 'true', 'yes')
+
+# Janela (segundos) em que reenvios com a mesma Idempotency-Key são respondidos
+# com o resultado original (ver core.idempotency)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+
+# Backend usado pelo worker de impressão (manage.py process_print_jobs):
+# "win32" envia à impressora do Windows; "cups" usa o comando lp; "tcp" envia
+# ESC/POS direto à impressora de rede (porta 9100); "spool" grava os recibos em
+# PRINT_SPOOL_DIR/<impressora>/ (útil em testes). Impressoras com nome
+# "tcp://host:porta" ou "cups://fila" ignoram o backend padrão.
+PRINT_BACKEND = os.environ.get('PRINT_BACKEND', 'win32')
+PRINT_SPOOL_DIR = os.environ.get('PRINT_SPOOL_DIR', str(BASE_DIR / 'print_spool'))
+# Impressoras de rede no formato "Cozinha=192.168.0.50:9100,Caixa=192.168.0.51"
+PRINT_NETWORK_PRINTERS = {
+    name.strip(): address.strip()
+    for name, _, address in (
+        entry.partition('=')
+        for entry in os.environ.get('PRINT_NETWORK_PRINTERS', '').split(',')
+    )
+    if name.strip() and address.strip()
+}
+PRINT_ESCPOS_CODEPAGE = os.environ.get('PRINT_ESCPOS_CODEPAGE', 'cp860')
+PRINT_TCP_TIMEOUT = float(os.environ.get('PRINT_TCP_TIMEOUT', 5))
+PRINT_TCP_IDLE_TIMEOUT = float(os.environ.get('PRINT_TCP_IDLE_TIMEOUT', 60))
+
 CKEDITOR_UPLOAD_PATH = 'catalog_uploads/'
 CKEDITOR_CONFIGS = {
     'default': {
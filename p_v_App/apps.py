@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PVAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'p_v_App'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
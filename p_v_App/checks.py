@@ -0,0 +1,62 @@
+from django.apps import apps
+from django.core.checks import Tags, Warning, register
+
+from .models_tenant import TenantMixin
+
+
+def _leading_fields(model):
+    """Retorna o primeiro campo de cada índice/restrição composto do modelo."""
+    meta = model._meta
+    leading = []
+    for index in meta.indexes:
+        if index.fields:
+            leading.append(index.fields[0].lstrip('-'))
+        elif index.expressions:
+            expression = index.expressions[0]
+            leading.append(getattr(expression, 'name', None))
+    for constraint in meta.constraints:
+        fields = getattr(constraint, 'fields', None)
+        if fields:
+            leading.append(fields[0])
+    for fields in meta.unique_together:
+        leading.append(fields[0])
+    return leading
+
+
+@register(Tags.models, Tags.database)
+def check_tenant_indexes(app_configs=None, **kwargs):
+    """
+    Alerta sobre modelos de tenant sem índice composto iniciado por company
+
+    As listagens e relatórios filtram por empresa e por data/status; sem um
+    índice (company, ...) o banco recorre a varreduras sequenciais. Modelos
+    acessados apenas por outra chave podem declarar tenant_index_exempt = True.
+    """
+    if app_configs is None:
+        models = apps.get_models()
+    else:
+        models = [
+            model for app_config in app_configs
+            for model in app_config.get_models()
+        ]
+
+    errors = []
+    for model in models:
+        if not issubclass(model, TenantMixin) or model._meta.proxy:
+            continue
+        if getattr(model, 'tenant_index_exempt', False):
+            continue
+        if 'company' in _leading_fields(model):
+            continue
+        errors.append(
+            Warning(
+                'Modelo de tenant sem índice composto iniciado por "company".',
+                hint=(
+                    'Declare em Meta.indexes um índice (company, <filtro>) '
+                    'ou defina tenant_index_exempt = True.'
+                ),
+                obj=model,
+                id='p_v_App.W001',
+            )
+        )
+    return errors
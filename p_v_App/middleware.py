@@ -1,10 +1,13 @@
+from importlib import import_module
+
+from django.conf import settings
 from django.contrib.auth import logout
-from django.contrib.sessions.models import Session
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.contrib import messages
-from django.utils import timezone
+
+from .models_tenant import UserSession
 
 
 class SingleSessionMiddleware(MiddlewareMixin):
@@ -18,35 +21,18 @@ class SingleSessionMiddleware(MiddlewareMixin):
             # Obtém a chave da sessão atual
             current_session_key = request.session.session_key
 
-            # Busca todas as sessões ativas para este usuário
-            user_sessions = Session.objects.filter(
-                expire_date__gte=timezone.now()
-            )
-
-            # Verifica se há outras sessões para este usuário
-            for session in user_sessions:
-                session_data = session.get_decoded()
-                if session_data.get('_auth_user_id') == str(request.user.id):
-                    # Se encontrou uma sessão diferente da atual para o mesmo usuário
-                    if session.session_key != current_session_key:
-                        # Remove a sessão anterior
-                        session.delete()
-
-            # Verifica se a sessão atual ainda é válida
-            try:
-                current_session = Session.objects.get(
-                    session_key=current_session_key)
-                session_data = current_session.get_decoded()
-
-                # Se a sessão não pertence mais ao usuário atual, faz logout
-                if session_data.get('_auth_user_id') != str(request.user.id):
-                    logout(request)
-                    messages.warning(
-                        request, 'Sua sessão foi encerrada porque você fez login em outro dispositivo.')
-                    return HttpResponseRedirect(reverse('login'))
-
-            except Session.DoesNotExist:
-                # Se a sessão atual não existe mais, faz logout
+            # Consulta apenas as sessões registradas para este usuário
+            registered_keys = UserSessionTracker.get_session_keys(request.user)
+
+            if not registered_keys:
+                # Sessão anterior ao registro: adota a sessão atual
+                if current_session_key:
+                    UserSessionTracker.register_session(
+                        request.user, current_session_key)
+                return None
+
+            # Se a sessão atual não é a registrada, o usuário entrou em outro dispositivo
+            if current_session_key not in registered_keys:
                 logout(request)
                 messages.warning(
                     request, 'Sua sessão foi encerrada porque você fez login em outro dispositivo.')
@@ -61,37 +47,60 @@ class UserSessionTracker:
     """
 
     @staticmethod
-    def invalidate_other_sessions(user, current_session_key):
+    def _session_store():
         """
-        Invalida todas as outras sessões de um usuário, mantendo apenas a atual
+        Retorna a classe SessionStore do engine configurado (db, cache ou cached_db)
         """
-        from django.utils import timezone
+        return import_module(settings.SESSION_ENGINE).SessionStore
 
-        user_sessions = Session.objects.filter(
-            expire_date__gte=timezone.now()
+    @staticmethod
+    def get_session_keys(user):
+        """
+        Retorna as chaves de sessão registradas para o usuário
+        """
+        return set(
+            UserSession.objects.filter(user_id=user.pk)
+            .values_list('session_key', flat=True)
         )
 
-        for session in user_sessions:
-            session_data = session.get_decoded()
-            if (session_data.get('_auth_user_id') == str(user.id) and
-                    session.session_key != current_session_key):
-                session.delete()
+    @staticmethod
+    def register_session(user, session_key):
+        """
+        Registra a sessão informada como sessão ativa do usuário
+        """
+        UserSession.objects.get_or_create(
+            session_key=session_key, defaults={'user': user})
 
     @staticmethod
-    def get_active_sessions_count(user):
+    def unregister_session(session_key):
         """
-        Retorna o número de sessões ativas para um usuário
+        Remove a sessão informada do registro
         """
-        from django.utils import timezone
+        if session_key:
+            UserSession.objects.filter(session_key=session_key).delete()
 
-        count = 0
-        user_sessions = Session.objects.filter(
-            expire_date__gte=timezone.now()
+    @classmethod
+    def invalidate_other_sessions(cls, user, current_session_key):
+        """
+        Invalida todas as outras sessões de um usuário, mantendo apenas a atual
+        """
+        stale_keys = list(
+            UserSession.objects.filter(user_id=user.pk)
+            .exclude(session_key=current_session_key)
+            .values_list('session_key', flat=True)
         )
+        if stale_keys:
+            session_store = cls._session_store()
+            for session_key in stale_keys:
+                session_store(session_key=session_key).delete()
+            UserSession.objects.filter(session_key__in=stale_keys).delete()
 
-        for session in user_sessions:
-            session_data = session.get_decoded()
-            if session_data.get('_auth_user_id') == str(user.id):
-                count += 1
+        if current_session_key:
+            cls.register_session(user, current_session_key)
 
-        return count
+    @staticmethod
+    def get_active_sessions_count(user):
+        """
+        Retorna o número de sessões ativas para um usuário
+        """
+        return UserSession.objects.filter(user_id=user.pk).count()
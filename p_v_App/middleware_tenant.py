@@ -1,41 +1,47 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.shortcuts import redirect
 from django.contrib import messages
-from .models_tenant import get_current_company
-from .models import *
+from .models_tenant import (
+    get_current_company,
+    reset_current_tenant,
+    set_current_tenant,
+)
 
 
 class TenantMiddleware(MiddlewareMixin):
     """
     Middleware que configura o contexto de tenant (empresa) para cada requisição
+
+    A empresa é guardada em uma ContextVar (ver models_tenant.tenant_context),
+    isolada por thread e por tarefa assíncrona, e restaurada ao fim da resposta.
     """
 
     def process_request(self, request):
         # Define a empresa atual com base no usuário logado
+        company = None
         if request.user.is_authenticated:
             try:
                 company = get_current_company(request)
-                if company:
-                    # Define a empresa no contexto da requisição
-                    request.current_company = company
-
-                    # Configura os managers para filtrar por empresa
-                    Category.objects = Category.objects.set_company(company)
-                    Products.objects = Products.objects.set_company(company)
-                    Sales.objects = Sales.objects.set_company(company)
-                    Pedido.objects = Pedido.objects.set_company(company)
-                    Estoque.objects = Estoque.objects.set_company(company)
-                else:
-                    # Usuário não tem empresa associada
-                    request.current_company = None
             except Exception:
                 # Em caso de erro, não define empresa
-                request.current_company = None
-        else:
-            request.current_company = None
+                company = None
+
+        # Define a empresa no contexto da requisição
+        request.current_company = company
+        request._tenant_token = set_current_tenant(company)
 
         return None
 
+    def process_response(self, request, response):
+        token = getattr(request, '_tenant_token', None)
+        if token is not None:
+            try:
+                reset_current_tenant(token)
+            except ValueError:
+                # Token criado em outro contexto (ex.: ASGI); apenas limpa
+                set_current_tenant(None)
+        return response
+
     def process_view(self, request, view_func, view_args, view_kwargs):
         """
         Processa a view para garantir que apenas usuários com empresa possam acessar
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def rename_type_column(apps, schema_editor):
+    """
+    Renomeia a coluna type de CashMovement para movement_type quando preciso.
+
+    A 0006 cria a coluna como type e a 0008 só muda o estado para
+    db_column='movement_type', supondo que o banco já usava esse nome. Bancos
+    criados do zero (o de testes inclusive) ficam com type; os existentes já
+    têm movement_type e não são alterados.
+    """
+    CashMovement = apps.get_model('p_v_App', 'CashMovement')
+    table = CashMovement._meta.db_table
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = {
+            column.name
+            for column in connection.introspection.get_table_description(cursor, table)
+        }
+    if 'type' in columns and 'movement_type' not in columns:
+        quote = schema_editor.quote_name
+        schema_editor.execute(
+            f'ALTER TABLE {quote(table)} RENAME COLUMN {quote("type")} TO {quote("movement_type")}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0016_company_auto_open_print'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_type_column, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:49
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_tenant_indexes'),
+        ('p_v_App', '0017_cashmovement_movement_type_column'),
+        ('p_v_App', '0017_usersession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashmovement',
+            index=models.Index(fields=['session', 'type'], name='cashmovement_session_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashmovement',
+            index=models.Index(fields=['company', 'recorded_at'], name='cashmovement_company_rec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashregistersession',
+            index=models.Index(fields=['company', 'opened_at'], name='cashsession_company_opened_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashregistersession',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['company'], name='cashsession_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['company', 'status'], name='category_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estoque',
+            index=models.Index(fields=['company', 'produto'], name='estoque_company_produto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['company', 'status', 'date_added'], name='pedido_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['company', 'code'], name='pedido_company_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['company', 'code'], name='products_company_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(models.F('company'), django.db.models.functions.text.Upper('code'), name='products_company_ucode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['company', 'status', 'is_combo'], name='products_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['company', 'date_added'], name='sales_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sales',
+            index=models.Index(fields=['company', 'code'], name='sales_company_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tableorder',
+            index=models.Index(fields=['company', 'status', 'opened_at'], name='tableorder_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tableorder',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['company', 'table'], name='tableorder_open_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:51
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def backfill_sales_channel(apps, schema_editor):
+    """Preenche o canal das vendas existentes a partir do campo livre `type`."""
+    Sales = apps.get_model('p_v_App', 'Sales')
+    Sales.objects.filter(
+        Q(type__istartswith='mesa') | Q(table__isnull=False)
+    ).update(channel='table')
+    Sales.objects.filter(type='pedido').update(channel='delivery')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_tenant_indexes'),
+        ('p_v_App', '0018_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sales',
+            name='channel',
+            field=models.CharField(choices=[('counter', 'Balcão'), ('delivery', 'Pedido/Entrega'), ('table', 'Mesa'), ('catalog', 'Catálogo')], default='counter', help_text='Canal normalizado da venda, usado pelos relatórios.', max_length=10, verbose_name='Canal'),
+        ),
+        migrations.RunPython(backfill_sales_channel, migrations.RunPython.noop),
+    ]
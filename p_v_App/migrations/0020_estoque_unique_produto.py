@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:55
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_estoque(apps, schema_editor):
+    """Consolida registros de estoque repetidos para o mesmo produto da empresa."""
+    Estoque = apps.get_model('p_v_App', 'Estoque')
+    duplicates = (
+        Estoque.objects.values('company_id', 'produto_id')
+        .annotate(total=Sum('quantidade'), keep_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for entry in duplicates:
+        Estoque.objects.filter(pk=entry['keep_id']).update(
+            quantidade=entry['total'] or 0)
+        Estoque.objects.filter(
+            company_id=entry['company_id'],
+            produto_id=entry['produto_id'],
+        ).exclude(pk=entry['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0019_sales_channel'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_estoque, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='estoque',
+            name='estoque_company_produto_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='estoque',
+            constraint=models.UniqueConstraint(fields=('company', 'produto'), name='estoque_company_produto_uniq'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:31
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cashregistersession',
+            name='entries_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='cashregistersession',
+            name='exits_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+    ]
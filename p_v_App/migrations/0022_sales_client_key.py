@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_tenant_indexes'),
+        ('p_v_App', '0021_cash_session_running_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sales',
+            name='client_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Chave enviada pelo PDV offline; impede registrar a mesma venda duas vezes.', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='sales',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_key', ''), _negated=True), fields=('company', 'client_key'), name='sales_company_client_key_uniq'),
+        ),
+    ]
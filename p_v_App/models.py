@@ -4,7 +4,8 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Upper
 from django.utils import timezone
 from .models_tenant import TenantMixin, TenantManager
 
@@ -19,7 +20,13 @@ class Category(TenantMixin):
     date_added = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
 
-    objects = TenantManager()
+    objects = TenantManager(scoped=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'status'],
+                         name='category_company_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -49,7 +56,17 @@ class Products(TenantMixin):
     date_added = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
 
-    objects = TenantManager()
+    objects = TenantManager(scoped=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'code'],
+                         name='products_company_code_idx'),
+            models.Index(F('company'), Upper('code'),
+                         name='products_company_ucode_idx'),
+            models.Index(fields=['company', 'status', 'is_combo'],
+                         name='products_company_status_idx'),
+        ]
 
     def __str__(self):
         return self.code + ' - ' + self.name
@@ -83,6 +100,9 @@ class ProductComboItem(TenantMixin):
         help_text='Quantidade padrão consumida por combo.'
     )
 
+    # Consultado pelo combo (unique_together iniciado por combo)
+    tenant_index_exempt = True
+
     objects = TenantManager()
 
     class Meta:
@@ -112,6 +132,12 @@ class ProductComboItem(TenantMixin):
 
 
 class Sales(TenantMixin):
+    class Channel(models.TextChoices):
+        COUNTER = 'counter', 'Balcão'
+        DELIVERY = 'delivery', 'Pedido/Entrega'
+        TABLE = 'table', 'Mesa'
+        CATALOG = 'catalog', 'Catálogo'
+
     customer_name = models.CharField(
         'Nome do Cliente', max_length=100, blank=True, null=True)
     client = models.ForeignKey(
@@ -163,6 +189,13 @@ class Sales(TenantMixin):
         default='venda',
         help_text='Define a origem da venda (ex.: venda, pedido, Mesa 5)'
     )
+    channel = models.CharField(
+        'Canal',
+        max_length=10,
+        choices=Channel.choices,
+        default=Channel.COUNTER,
+        help_text='Canal normalizado da venda, usado pelos relatórios.'
+    )
     status = models.CharField(
         max_length=10,
         choices=ORDER_STATUS_CHOICES,
@@ -191,8 +224,30 @@ class Sales(TenantMixin):
         null=True,
         blank=True,
     )
+    client_key = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Chave enviada pelo PDV offline; impede registrar a mesma venda duas vezes.'
+    )
 
-    objects = TenantManager()
+    objects = TenantManager(scoped=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'date_added'],
+                         name='sales_company_date_idx'),
+            models.Index(fields=['company', 'code'],
+                         name='sales_company_code_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'client_key'],
+                condition=~models.Q(client_key=''),
+                name='sales_company_client_key_uniq',
+            ),
+        ]
 
     def __str__(self):
         return self.code
@@ -231,6 +286,9 @@ class SalePayment(TenantMixin):
     )
     recorded_at = models.DateTimeField(default=timezone.now)
 
+    # Consultado pela venda (índice da FK sale)
+    tenant_index_exempt = True
+
     objects = TenantManager()
 
     class Meta:
@@ -275,6 +333,9 @@ class PedidoPayment(TenantMixin):
     )
     recorded_at = models.DateTimeField(default=timezone.now)
 
+    # Consultado pelo pedido (índice da FK pedido)
+    tenant_index_exempt = True
+
     objects = TenantManager()
 
     class Meta:
@@ -324,7 +385,15 @@ class Pedido(TenantMixin):
     date_added = models.DateTimeField(default=timezone.now)
     date_updated = models.DateTimeField(auto_now=True)
 
-    objects = TenantManager()
+    objects = TenantManager(scoped=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'status', 'date_added'],
+                         name='pedido_company_status_idx'),
+            models.Index(fields=['company', 'code'],
+                         name='pedido_company_code_idx'),
+        ]
 
     def __str__(self):
         return self.code
@@ -440,7 +509,13 @@ class Estoque(TenantMixin):
     custo = models.FloatField(default=0)
     status = models.IntegerField(default=1)  # 1: Ativo, 0: Inativo
 
-    objects = TenantManager()
+    objects = TenantManager(scoped=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'produto'],
+                                    name='estoque_company_produto_uniq'),
+        ]
 
     def save(self, *args, **kwargs):
         # Garante que produto e categoria pertençam à mesma empresa
@@ -559,6 +634,13 @@ class TableOrder(TenantMixin):
 
     class Meta:
         ordering = ['-opened_at']
+        indexes = [
+            models.Index(fields=['company', 'status', 'opened_at'],
+                         name='tableorder_company_status_idx'),
+            models.Index(fields=['company', 'table'],
+                         condition=Q(status='open'),
+                         name='tableorder_open_idx'),
+        ]
 
     def __str__(self):
         return f'Comanda {self.id} - Mesa {self.table.number}'
@@ -728,6 +810,12 @@ class CashRegisterSession(TenantMixin):
         max_length=10, choices=Status.choices, default=Status.OPEN)
     opened_at = models.DateTimeField(default=timezone.now)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Totais dos movimentos, mantidos por sales.cash_totals a cada movimento
+    # registrado (ver o comando rebuild_cash_totals).
+    entries_total = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    exits_total = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'))
 
     objects = TenantManager()
 
@@ -735,15 +823,22 @@ class CashRegisterSession(TenantMixin):
         ordering = ['-opened_at']
         verbose_name = 'Sessão de caixa'
         verbose_name_plural = 'Sessões de caixa'
+        indexes = [
+            models.Index(fields=['company', 'opened_at'],
+                         name='cashsession_company_opened_idx'),
+            models.Index(fields=['company'],
+                         condition=Q(status='open'),
+                         name='cashsession_open_idx'),
+        ]
 
     def __str__(self):
         return f'Caixa {self.opened_at:%d/%m/%Y %H:%M}'
 
     def total_entries(self):
-        return self.movements.filter(type=CashMovement.Type.ENTRY).aggregate(total=Sum('amount')).get('total') or Decimal('0.00')
+        return self.entries_total
 
     def total_exits(self):
-        return self.movements.filter(type=CashMovement.Type.EXIT).aggregate(total=Sum('amount')).get('total') or Decimal('0.00')
+        return self.exits_total
 
     def expected_balance(self):
         return (Decimal(self.opening_amount) + self.total_entries() - self.total_exits()).quantize(Decimal('0.01'))
@@ -796,6 +891,12 @@ class CashMovement(TenantMixin):
         ordering = ['-recorded_at']
         verbose_name = 'Movimentação de caixa'
         verbose_name_plural = 'Movimentações de caixa'
+        indexes = [
+            models.Index(fields=['session', 'type'],
+                         name='cashmovement_session_type_idx'),
+            models.Index(fields=['company', 'recorded_at'],
+                         name='cashmovement_company_rec_idx'),
+        ]
 
     def __str__(self):
         return f'{self.get_type_display()} - {self.amount}'
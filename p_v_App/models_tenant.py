@@ -1,8 +1,19 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 
+# Empresa da requisição atual; isolada por thread e por tarefa assíncrona
+_current_tenant = ContextVar('current_tenant', default=None)
+
+COMPANY_CACHE_TIMEOUT = 300
+DEFAULT_COMPANY_CACHE_KEY = 'tenant:company:default'
+
+
 class Company(models.Model):
     """
     Modelo que representa uma empresa (tenant)
@@ -63,6 +74,23 @@ class UserProfile(models.Model):
         return f'{self.user.username} - {self.company.name}'
 
 
+class UserSession(models.Model):
+    """
+    Registro das sessões ativas de cada usuário, mantido pelos sinais de login/logout
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='active_sessions')
+    session_key = models.CharField('Chave da sessão', max_length=40, unique=True)
+    created_at = models.DateTimeField('Criado em', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Sessão de Usuário'
+        verbose_name_plural = 'Sessões de Usuários'
+
+    def __str__(self):
+        return f'{self.user.username} - {self.session_key}'
+
+
 class TenantMixin(models.Model):
     """
     Mixin para adicionar funcionalidade de tenant aos modelos existentes
@@ -83,22 +111,22 @@ class TenantMixin(models.Model):
 class TenantManager(models.Manager):
     """
     Manager personalizado para filtrar automaticamente por tenant
+
+    Quando criado com scoped=True, filtra pela empresa definida no contexto
+    da requisição (ver tenant_context/TenantMiddleware).
     """
 
-    def __init__(self, *args, **kwargs):
-        self._company = None
+    def __init__(self, *args, scoped=False, **kwargs):
+        self.scoped = scoped
         super().__init__(*args, **kwargs)
 
-    def set_company(self, company):
-        """Define a empresa para filtrar os dados"""
-        self._company = company
-        return self
-
     def get_queryset(self):
-        """Retorna queryset filtrado por empresa se definida"""
+        """Retorna queryset filtrado pela empresa do contexto, se definida"""
         qs = super().get_queryset()
-        if self._company:
-            qs = qs.filter(company=self._company)
+        if self.scoped:
+            company = get_current_tenant()
+            if company is not None:
+                qs = qs.filter(company=company)
         return qs
 
     def for_company(self, company):
@@ -106,13 +134,76 @@ class TenantManager(models.Manager):
         return self.get_queryset().filter(company=company)
 
 
+def get_current_tenant():
+    """
+    Retorna a empresa definida no contexto atual (ou None)
+    """
+    return _current_tenant.get()
+
+
+def set_current_tenant(company):
+    """
+    Define a empresa do contexto atual e retorna o token para restauração
+    """
+    return _current_tenant.set(company)
+
+
+def reset_current_tenant(token):
+    """
+    Restaura a empresa do contexto para o valor anterior ao token
+    """
+    _current_tenant.reset(token)
+
+
+@contextmanager
+def tenant_context(company):
+    """
+    Executa um bloco com a empresa informada como tenant do contexto
+    """
+    token = set_current_tenant(company)
+    try:
+        yield company
+    finally:
+        reset_current_tenant(token)
+
+
 def get_current_company(request):
     """
     Função utilitária para obter a empresa atual do usuário logado
+
+    O resultado fica memorizado na requisição; com o TenantModelBackend o
+    perfil e a empresa já chegam junto com o usuário, sem consultas extras.
+    """
+    if hasattr(request, '_current_company_cache'):
+        return request._current_company_cache
+
+    company = None
+    if request.user.is_authenticated:
+        profile = getattr(request.user, 'profile', None)
+        if profile is not None:
+            company = profile.company
+    request._current_company_cache = company
+    return company
+
+
+def get_default_company():
+    """
+    Retorna a primeira empresa cadastrada (usada como padrão para superusuários),
+    mantida em cache e invalidada pelos sinais de Company
+    """
+    company = cache.get(DEFAULT_COMPANY_CACHE_KEY)
+    if company is None:
+        company = Company.objects.first()
+        if company is not None:
+            cache.set(DEFAULT_COMPANY_CACHE_KEY, company, COMPANY_CACHE_TIMEOUT)
+    return company
+
+
+def clear_company_cache():
+    """
+    Remove as empresas mantidas em cache
     """
-    if request.user.is_authenticated and hasattr(request.user, 'profile'):
-        return request.user.profile.company
-    return None
+    cache.delete(DEFAULT_COMPANY_CACHE_KEY)
 
 
 def set_current_company(obj, company):
@@ -0,0 +1,31 @@
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .middleware import UserSessionTracker
+from .models_tenant import Company, clear_company_cache
+
+
+@receiver(user_logged_in)
+def register_user_session(sender, request, user, **kwargs):
+    """Mantém apenas a sessão recém-criada como sessão ativa do usuário."""
+    session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+    if not session_key:
+        return
+    UserSessionTracker.invalidate_other_sessions(user, session_key)
+
+
+@receiver(user_logged_out)
+def unregister_user_session(sender, request, user, **kwargs):
+    """Remove a sessão encerrada do registro de sessões ativas."""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return
+    UserSessionTracker.unregister_session(session.session_key)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_cache(sender, **kwargs):
+    """Descarta as empresas em cache quando uma empresa é alterada."""
+    clear_company_cache()
@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path
+
+from p_v_App.models import Sales
+from p_v_App.models_tenant import (
+    Company,
+    UserProfile,
+    get_current_tenant,
+    tenant_context,
+)
+
+
+def _failing_view(request):
+    _failing_view.tenant = get_current_tenant()
+    raise RuntimeError('falha na view')
+
+
+def _tenant_view(request):
+    return HttpResponse(getattr(get_current_tenant(), 'name', ''))
+
+
+urlpatterns = [
+    path('falha/', _failing_view),
+    path('empresa/', _tenant_view),
+]
+
+
+class TenantContextThreadTests(TransactionTestCase):
+    """Cada thread enxerga apenas as vendas da empresa do seu próprio contexto."""
+
+    def test_threads_keep_their_own_company(self):
+        companies = [Company.objects.create(name=f'Empresa {index}') for index in range(2)]
+        for company in companies:
+            Sales.objects.create(company=company, code=f'{company.name} V1',
+                                 sub_total=10, grand_total=10)
+        barrier = threading.Barrier(len(companies))
+
+        def _list_codes(company):
+            try:
+                with tenant_context(company):
+                    # As duas threads definem a empresa antes de qualquer consulta.
+                    barrier.wait(timeout=5)
+                    codes = list(Sales.objects.values_list('code', flat=True))
+                    return get_current_tenant(), codes
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(companies)) as executor:
+            results = list(executor.map(_list_codes, companies))
+
+        for company, (tenant, codes) in zip(companies, results):
+            self.assertEqual(tenant, company)
+            self.assertEqual(codes, [f'{company.name} V1'])
+        self.assertIsNone(get_current_tenant())
+
+
+@override_settings(ROOT_URLCONF='p_v_App.tests')
+class TenantMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+        user = get_user_model().objects.create_user('caixa', password='senha-123')
+        UserProfile.objects.create(user=user, company=self.company)
+        self.client.force_login(user)
+        self.client.raise_request_exception = False
+
+    def test_tenant_is_set_during_request(self):
+        response = self.client.get('/empresa/')
+
+        self.assertEqual(response.content.decode(), 'Empresa Teste')
+        self.assertIsNone(get_current_tenant())
+
+    def test_tenant_is_reset_when_view_raises(self):
+        response = self.client.get('/falha/')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(_failing_view.tenant, self.company)
+        self.assertIsNone(get_current_tenant())
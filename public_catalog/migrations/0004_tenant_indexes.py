@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0018_tenant_indexes'),
+        ('public_catalog', '0003_catalogorder_delivery_address_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogauditlog',
+            index=models.Index(fields=['company', 'created_at'], name='catalogaudit_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogcategory',
+            index=models.Index(fields=['company', 'is_visible_public', 'display_order'], name='catalogcat_company_vis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogorder',
+            index=models.Index(fields=['company', 'created_at'], name='catalogorder_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogorder',
+            index=models.Index(condition=models.Q(('status__in', ['novo', 'em_preparo'])), fields=['company', 'created_at'], name='catalogorder_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogproduct',
+            index=models.Index(fields=['company', 'is_visible_public', 'display_order'], name='catalogprod_company_vis_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+        ('public_catalog', '0004_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='catalogorder',
+            name='order_number',
+            field=models.CharField(max_length=20, verbose_name='Número do Pedido'),
+        ),
+        migrations.AddConstraint(
+            model_name='catalogorder',
+            constraint=models.UniqueConstraint(fields=('company', 'order_number'), name='catalogorder_company_number_uniq'),
+        ),
+    ]
@@ -11,6 +11,7 @@ from django.db import models
 from django.utils import timezone
 from PIL import Image
 
+from core.models import SequenceCounter
 from p_v_App.models import Category, Products, Sales
 from p_v_App.models_tenant import Company, TenantManager, TenantMixin
 
@@ -92,6 +93,9 @@ class CatalogSettings(TenantMixin):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Um registro por empresa (company é OneToOne)
+    tenant_index_exempt = True
+
     objects = TenantManager()
 
     class Meta:
@@ -137,6 +141,10 @@ class CatalogCategory(TenantMixin):
         verbose_name = 'Categoria do Catálogo'
         verbose_name_plural = 'Categorias do Catálogo'
         ordering = ['display_order', 'category__name']
+        indexes = [
+            models.Index(fields=['company', 'is_visible_public', 'display_order'],
+                         name='catalogcat_company_vis_idx'),
+        ]
 
     def __str__(self) -> str:
         status = 'Visível' if self.is_visible_public else 'Oculto'
@@ -180,6 +188,10 @@ class CatalogProduct(TenantMixin):
         verbose_name = 'Produto do Catálogo'
         verbose_name_plural = 'Produtos do Catálogo'
         ordering = ['display_order', 'product__name']
+        indexes = [
+            models.Index(fields=['company', 'is_visible_public', 'display_order'],
+                         name='catalogprod_company_vis_idx'),
+        ]
 
     def __str__(self) -> str:
         status = 'Visível' if self.is_visible_public else 'Oculto'
@@ -219,6 +231,9 @@ class ProductImage(TenantMixin):
         verbose_name='Texto Alternativo',
     )
 
+    # Consultado pelo produto (índice da FK product)
+    tenant_index_exempt = True
+
     objects = TenantManager()
 
     class Meta:
@@ -274,7 +289,6 @@ class CatalogOrder(TenantMixin):
 
     order_number = models.CharField(
         max_length=20,
-        unique=True,
         verbose_name='Número do Pedido',
     )
 
@@ -333,6 +347,17 @@ class CatalogOrder(TenantMixin):
         verbose_name = 'Pedido do Catálogo'
         verbose_name_plural = 'Pedidos do Catálogo'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'created_at'],
+                         name='catalogorder_company_idx'),
+            models.Index(fields=['company', 'created_at'],
+                         condition=models.Q(status__in=['novo', 'em_preparo']),
+                         name='catalogorder_open_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'order_number'],
+                                    name='catalogorder_company_number_uniq'),
+        ]
 
     def __str__(self) -> str:
         return f'Pedido #{self.order_number} - {self.customer_name}'
@@ -340,24 +365,29 @@ class CatalogOrder(TenantMixin):
     def save(self, *args: Any, **kwargs: Any) -> None:
         """Gera número do pedido antes de salvar, se necessário."""
         if not self.order_number:
-            self.order_number = self.generate_order_number()
+            self.order_number = self.generate_order_number(self.company_id)
         super().save(*args, **kwargs)
 
     @staticmethod
-    def generate_order_number() -> str:
-        """Gera número de pedido no formato YYYYMMDD-XXXX."""
+    def generate_order_number(company_id: int) -> str:
+        """Gera número de pedido no formato YYYYMMDD-XXXX, sequencial por empresa e dia."""
         date_prefix = timezone.localtime().strftime('%Y%m%d')
 
-        last_order = CatalogOrder.objects.filter(
-            order_number__startswith=date_prefix,
-        ).order_by('-order_number').first()
-
-        if last_order:
-            last_number = int(last_order.order_number.split('-')[1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
+        def seed() -> int:
+            last_number = (
+                CatalogOrder.objects.filter(
+                    company_id=company_id,
+                    order_number__startswith=f'{date_prefix}-',
+                )
+                .order_by('-order_number')
+                .values_list('order_number', flat=True)
+                .first()
+            )
+            suffix = last_number.split('-')[-1] if last_number else ''
+            return int(suffix) if suffix.isdigit() else 0
 
+        new_number = SequenceCounter.next_value(
+            company_id, SequenceCounter.CATALOG_ORDER, date_prefix, seed=seed)
         return f'{date_prefix}-{new_number:04d}'
 
 
@@ -405,6 +435,10 @@ class CatalogAuditLog(TenantMixin):
         verbose_name = 'Auditoria do Catálogo'
         verbose_name_plural = 'Auditorias do Catálogo'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'created_at'],
+                         name='catalogaudit_company_idx'),
+        ]
 
     def __str__(self) -> str:
         user_label = self.user.username if self.user else 'Sistema'
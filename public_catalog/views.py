@@ -9,7 +9,7 @@ from django.core.cache import cache
 from django.db import transaction
 from django.db.models import Avg, Count, Sum
 from django.db.models.functions import TruncDate
-from django.http import Http404, HttpResponse, JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -21,9 +21,17 @@ from django.utils.decorators import method_decorator
 from django_ratelimit.decorators import ratelimit
 from django.core.paginator import Paginator
 
-from core.utils import generate_sale_code, get_user_company
+from core.exports import CsvFormat, export_queryset, get_export_format
+from core.utils import (
+    date_range_filter,
+    generate_sale_code,
+    get_user_company,
+    parse_date_param,
+)
 from p_v_App.models import Category, Products
-from p_v_App.models import Estoque, Pedido, PedidoItem, Sales, salesItems
+from p_v_App.models import Pedido, PedidoItem, Sales
+from sales.combos import default_combo_components
+from sales.posting import build_line, load_products, post_sale
 
 from .forms import (
     CatalogCategoryForm,
@@ -456,10 +464,9 @@ class CatalogOrderListView(CompanyContextMixin, ListView):
             queryset = queryset.filter(customer_name__icontains=customer)
         if order_number:
             queryset = queryset.filter(order_number__icontains=order_number)
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
+        queryset = queryset.filter(
+            **date_range_filter('created_at', parse_date_param(start_date), parse_date_param(end_date))
+        )
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -540,7 +547,7 @@ class CatalogOrderDetailView(CompanyContextMixin, TemplateView):
 
         if action == 'convert_to_order':
             company = self.get_company()
-            pedido_code = generate_sale_code(company, extra_querysets=[Pedido.objects.filter(company=company)])
+            pedido_code = generate_sale_code(company)
             with transaction.atomic():
                 pedido = Pedido.objects.create(
                     company=company,
@@ -613,12 +620,12 @@ class CatalogAnalyticsView(CompanyContextMixin, TemplateView):
     template_name = 'public_catalog/admin/analytics.html'
 
     def get_date_range(self):
-        start_date = self.request.GET.get('start_date')
-        end_date = self.request.GET.get('end_date')
+        start_date = parse_date_param(self.request.GET.get('start_date'))
+        end_date = parse_date_param(self.request.GET.get('end_date'))
         if not start_date:
-            start_date = (timezone.localdate() - timedelta(days=30)).isoformat()
+            start_date = timezone.localdate() - timedelta(days=30)
         if not end_date:
-            end_date = timezone.localdate().isoformat()
+            end_date = timezone.localdate()
         return start_date, end_date
 
     def get_context_data(self, **kwargs):
@@ -628,8 +635,7 @@ class CatalogAnalyticsView(CompanyContextMixin, TemplateView):
 
         orders = CatalogOrder.objects.filter(
             company=company,
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
+            **date_range_filter('created_at', start_date, end_date),
         )
 
         total_orders = orders.count()
@@ -660,8 +666,8 @@ class CatalogAnalyticsView(CompanyContextMixin, TemplateView):
                 'chart_labels': chart_labels,
                 'chart_values': chart_values,
                 'top_viewed_products': top_viewed_products,
-                'selected_start_date': start_date,
-                'selected_end_date': end_date,
+                'selected_start_date': start_date.isoformat(),
+                'selected_end_date': end_date.isoformat(),
             }
         )
         return context
@@ -674,7 +680,7 @@ def finalize_catalog_order(order: CatalogOrder, company) -> bool:
     try:
         with transaction.atomic():
             sale_code = generate_sale_code(company)
-            venda = Sales.objects.create(
+            venda = Sales(
                 company=company,
                 code=sale_code,
                 sub_total=float(order.total_value),
@@ -690,28 +696,29 @@ def finalize_catalog_order(order: CatalogOrder, company) -> bool:
                 discount_total=0,
                 discount_reason='',
                 type='pedido',
+                channel=Sales.Channel.CATALOG,
             )
 
+            products = load_products(
+                company,
+                (item['product_id'] for item in order.items),
+            )
+            lines = []
             for item in order.items:
-                product = Products.objects.filter(company=company, id=item['product_id']).first()
+                product = products.get(int(item['product_id']))
                 if not product:
                     continue
-                qty = float(item['quantity'])
-                price = float(item['unit_price'])
-                total = float(item['subtotal'])
-                salesItems.objects.create(
-                    sale_id=venda,
-                    product_id=product,
-                    price=price,
-                    qty=qty,
-                    total=total,
+                lines.append(
+                    build_line(
+                        product,
+                        item['quantity'],
+                        item['unit_price'],
+                        total=item['subtotal'],
+                        components=default_combo_components(
+                            company, product, item['quantity']),
+                    )
                 )
-                try:
-                    estoque_item = Estoque.objects.get(produto=product, company=company)
-                    estoque_item.quantidade -= qty
-                    estoque_item.save(update_fields=['quantidade'])
-                except Estoque.DoesNotExist:
-                    pass
+            post_sale(venda, lines, reference=f'Catálogo {order.order_number}')
 
             order.delete()
     except Exception:
@@ -742,6 +749,18 @@ class CatalogOrderFinalizeView(CompanyContextMixin, TemplateView):
         return redirect('public-catalog-admin-orders')
 
 
+# Formato do catalog_orders.csv antes da camada de exportação (importado
+# por integrações): datas ISO como gravadas no banco (UTC), sem BOM e com
+# linhas terminadas em \n.
+CATALOG_ORDERS_CSV_FORMAT = CsvFormat(
+    datetime_format='%Y-%m-%d %H:%M:%S',
+    date_format='%Y-%m-%d',
+    local_time=False,
+    bom=False,
+    line_terminator='\n',
+)
+
+
 class CatalogOrdersExportView(CompanyContextMixin, TemplateView):
     """Exporta pedidos do catÃ¡logo para CSV."""
 
@@ -749,28 +768,35 @@ class CatalogOrdersExportView(CompanyContextMixin, TemplateView):
         company = self.get_company()
         start_date = request.GET.get('start_date')
         end_date = request.GET.get('end_date')
-        orders = CatalogOrder.objects.filter(company=company)
-        if start_date:
-            orders = orders.filter(created_at__date__gte=start_date)
-        if end_date:
-            orders = orders.filter(created_at__date__lte=end_date)
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=\"catalog_orders.csv\"'
-        response.write('order_number,customer_name,customer_phone,status,total_value,created_at\n')
-        for order in orders.order_by('-created_at'):
-            row = (
-                f'{order.order_number},{order.customer_name},{order.customer_phone},'
-                f'{order.status},{order.total_value},{order.created_at:%Y-%m-%d %H:%M:%S}\n'
+        orders = CatalogOrder.objects.filter(
+            company=company,
+            **date_range_filter('created_at', parse_date_param(start_date), parse_date_param(end_date)),
+        )
+
+        def _log_export(count):
+            log_admin_action(
+                request,
+                action='orders_exported',
+                message='Exportação de pedidos do catálogo realizada.',
+                metadata={'count': count},
             )
-            response.write(row)
-        log_admin_action(
-            request,
-            action='orders_exported',
-            message='Exportação de pedidos do catálogo realizada.',
-            metadata={'count': orders.count()},
+
+        return export_queryset(
+            orders.order_by('-created_at'),
+            [
+                ('order_number', 'order_number'),
+                ('customer_name', 'customer_name'),
+                ('customer_phone', 'customer_phone'),
+                ('status', 'status'),
+                ('total_value', 'total_value'),
+                ('created_at', 'created_at'),
+            ],
+            filename='catalog_orders',
+            fmt=get_export_format(request, default='csv'),
+            title='Pedidos do catálogo',
+            on_complete=_log_export,
+            csv_format=CATALOG_ORDERS_CSV_FORMAT,
         )
-        return response
 
 
 class CatalogOrderReceiptView(CompanyContextMixin, TemplateView):
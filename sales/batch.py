@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from clients.models import Client
+from core.utils import generate_sale_codes
+from p_v_App.models import Sales
+from sales.combos import resolve_combo_lines
+from sales.posting import build_line, load_products, post_sale
+from sales.utils import (
+    allocate_payments,
+    get_open_cash_session,
+    get_primary_payment_method,
+    parse_payment_entries,
+)
+
+BATCH_MAX_SALES = 200
+
+
+def _decimal(value, message: str) -> Decimal:
+    try:
+        return Decimal(str(value if value not in (None, '') else 0))
+    except (InvalidOperation, ValueError):
+        raise ValueError(message)
+
+
+def _parse_sold_at(value):
+    if not value:
+        return timezone.now()
+    sold_at = parse_datetime(str(value))
+    if sold_at is None:
+        raise ValueError('Data/hora da venda inválida.')
+    if timezone.is_naive(sold_at):
+        sold_at = timezone.make_aware(sold_at)
+    return min(sold_at, timezone.now())
+
+
+def _prepare_sale(entry, *, company, products, clients) -> dict:
+    """
+    Valida uma venda do lote sem consultar produtos ou clientes.
+
+    Produtos e clientes já vêm carregados e a composição dos combos vem do
+    mapa em cache; levanta ValueError com a mensagem devolvida ao terminal.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError('Venda em formato inválido.')
+
+    raw_items = entry.get('items') or []
+    if not isinstance(raw_items, list) or not raw_items:
+        raise ValueError('Informe os itens da venda.')
+
+    cart = []
+    for raw_item in raw_items:
+        if not isinstance(raw_item, dict):
+            raise ValueError('Item da venda em formato inválido.')
+        try:
+            product = products[int(raw_item.get('product_id'))]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Produto inválido informado.')
+        qty = _decimal(raw_item.get('qty'), 'Quantidade inválida informada para um dos itens.')
+        if qty <= 0:
+            raise ValueError('Quantidade inválida informada para um dos itens.')
+        price = _decimal(raw_item.get('price', product.price), 'Preço inválido informado.')
+        cart.append((product, raw_item.get('components') or [], qty, price))
+
+    components = resolve_combo_lines(
+        company, [(product, config, qty) for product, config, qty, _ in cart])
+    lines = [
+        build_line(product, qty, price, components=components[idx])
+        for idx, (product, _, qty, price) in enumerate(cart)
+    ]
+
+    client = None
+    if entry.get('client_id') not in (None, ''):
+        try:
+            client = clients[int(entry['client_id'])]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Cliente inválido informado.')
+
+    sub_total = sum((Decimal(str(line['total'])) for line in lines), Decimal('0'))
+    tax_amount = _decimal(entry.get('tax_amount'), 'Valores monetários inválidos informados.')
+    delivery_fee = max(
+        _decimal(entry.get('delivery_fee'), 'Valores monetários inválidos informados.'),
+        Decimal('0'),
+    )
+    discount = max(
+        _decimal(entry.get('discount_total'), 'Valores monetários inválidos informados.'),
+        Decimal('0'),
+    )
+    discount = min(discount, sub_total + tax_amount + delivery_fee)
+    discount_reason = str(entry.get('discount_reason') or '').strip()[:255]
+    if discount > 0 and not discount_reason:
+        raise ValueError('Informe o motivo do desconto aplicado.')
+    grand_total = max(sub_total + tax_amount + delivery_fee - discount, Decimal('0'))
+
+    raw_payments = entry.get('payments') or []
+    if not isinstance(raw_payments, list) or not all(
+        isinstance(payment, dict) for payment in raw_payments
+    ):
+        raise ValueError('Pagamentos em formato inválido.')
+    payment_entries = parse_payment_entries(
+        [payment.get('method') for payment in raw_payments],
+        [payment.get('amount') for payment in raw_payments],
+    )
+    allocations, tendered_total, change_total = allocate_payments(
+        grand_total, payment_entries)
+
+    sale = Sales(
+        company=company,
+        client=client,
+        customer_name=str(entry.get('customer_name') or '')[:100],
+        sub_total=float(sub_total),
+        tax=float(_decimal(entry.get('tax'), 'Valores monetários inválidos informados.')),
+        tax_amount=float(tax_amount),
+        grand_total=float(grand_total),
+        tendered_amount=float(tendered_total),
+        amount_change=float(change_total),
+        forma_pagamento=get_primary_payment_method(allocations),
+        delivery_fee=float(delivery_fee),
+        discount_total=float(discount),
+        discount_reason=discount_reason if discount > 0 else '',
+        type='venda',
+        channel=Sales.Channel.COUNTER,
+        date_added=_parse_sold_at(entry.get('sold_at')),
+    )
+    return {'sale': sale, 'lines': lines, 'allocations': allocations}
+
+
+def ingest_sales_batch(company, entries: list, *, user) -> list[dict]:
+    """
+    Registra um lote de vendas feitas offline pelo PDV.
+
+    Todas as vendas são validadas antes de qualquer escrita, com produtos,
+    clientes e chaves já processadas carregados em uma consulta cada. As
+    vendas válidas são gravadas em uma única transação, cada uma em seu
+    próprio savepoint, para que a falha de uma não descarte as demais.
+    A client_key de cada venda fica gravada na própria venda (única por
+    empresa), então o reenvio do lote é seguro a qualquer tempo: vendas já
+    registradas voltam como 'duplicate'. Retorna um resultado por venda,
+    na ordem recebida.
+    """
+    keys = [
+        str(entry.get('client_key') or '').strip()[:64] if isinstance(entry, dict) else ''
+        for entry in entries
+    ]
+    product_ids = [
+        item.get('product_id')
+        for entry in entries if isinstance(entry, dict)
+        for item in (entry.get('items') or []) if isinstance(item, dict)
+    ]
+    products = load_products(company, product_ids)
+    client_ids = {
+        entry.get('client_id') for entry in entries
+        if isinstance(entry, dict) and str(entry.get('client_id') or '').isdigit()
+    }
+    clients = (
+        Client.objects.filter(company=company, pk__in=client_ids).in_bulk()
+        if client_ids else {}
+    )
+    processed = {
+        row['client_key']: {'sale_id': row['id'], 'code': row['code']}
+        for row in Sales.objects.filter(
+            company=company, client_key__in=[key for key in keys if key]
+        ).values('id', 'code', 'client_key')
+    }
+
+    results: list[dict] = []
+    pending: list[tuple[int, dict]] = []
+    seen_keys: set[str] = set()
+    for index, (entry, key) in enumerate(zip(entries, keys)):
+        result = {'index': index, 'client_key': key}
+        results.append(result)
+        if not key:
+            result.update(status='failed', msg='Informe a client_key da venda.')
+            continue
+        if key in processed or key in seen_keys:
+            result.update(processed.get(key) or {}, status='duplicate')
+            continue
+        seen_keys.add(key)
+        try:
+            pending.append((index, _prepare_sale(
+                entry, company=company, products=products, clients=clients)))
+        except ValueError as exc:
+            result.update(status='failed', msg=str(exc))
+
+    if not pending:
+        return results
+
+    cash_session = get_open_cash_session(company)
+    with transaction.atomic():
+        codes = generate_sale_codes(company, len(pending))
+        for code, (index, prepared) in zip(codes, pending):
+            result = results[index]
+            sale = prepared['sale']
+            sale.code = code
+            sale.client_key = result['client_key']
+            try:
+                with transaction.atomic():
+                    post_sale(
+                        sale,
+                        prepared['lines'],
+                        allocations=prepared['allocations'],
+                        user=user,
+                        cash_session=cash_session,
+                    )
+            except IntegrityError:
+                # Outro envio do mesmo lote registrou esta venda primeiro.
+                result.update(status='duplicate')
+            except ValueError as exc:
+                result.update(status='failed', msg=str(exc))
+            else:
+                result.update(sale_id=sale.id, code=sale.code, status='success')
+    return results
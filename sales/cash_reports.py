@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+
+from p_v_App.models import CashRegisterSession
+from sales.models import CashSessionReport
+from sales.utils import write_cash_report_pdf
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def _file_sha256(fileobj) -> str:
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def store_cash_report(session: CashRegisterSession) -> CashSessionReport:
+    """
+    Gera o PDF de fechamento da sessão e grava no storage de mídia.
+
+    O PDF é escrito página a página em um arquivo temporário, sem montar o
+    documento inteiro em memória. Se outra requisição gravar o relatório da
+    mesma sessão antes, o arquivo gerado aqui é descartado.
+    """
+    with tempfile.TemporaryFile() as output:
+        write_cash_report_pdf(session, output)
+        size = output.tell()
+        sha256 = _file_sha256(output)
+        report = CashSessionReport(
+            company_id=session.company_id,
+            session=session,
+            sha256=sha256,
+            size=size,
+        )
+        report.file.save(
+            f'fechamento-caixa-{session.pk}-{sha256[:12]}.pdf', File(output), save=False)
+    try:
+        with transaction.atomic():
+            report.save()
+    except IntegrityError:
+        report.file.delete(save=False)
+        return CashSessionReport.objects.get(session=session)
+    return report
+
+
+def get_closed_cash_report(session: CashRegisterSession) -> CashSessionReport | None:
+    """
+    Relatório gravado da sessão fechada, gerando-o na primeira consulta.
+
+    Sessões abertas ainda recebem movimentos, então retornam None e o PDF
+    continua sendo gerado a cada acesso. O relatório é refeito se o arquivo
+    tiver sido removido do storage.
+    """
+    if session.status != CashRegisterSession.Status.CLOSED:
+        return None
+    report = CashSessionReport.objects.filter(session=session).first()
+    if report is not None:
+        if report.file.storage.exists(report.file.name):
+            return report
+        report.delete()
+    return store_cash_report(session)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from p_v_App.models import CashMovement, CashRegisterSession
+from sales.models import CashSessionMethodTotal
+from sales.rollups import increment_rows
+
+ZERO = Decimal('0.00')
+
+
+def _total_field(movement_type: str) -> str:
+    return 'entries' if movement_type == CashMovement.Type.ENTRY else 'exits'
+
+
+def apply_cash_movements(movements: Iterable[CashMovement], *, sign: int = 1) -> None:
+    """
+    Soma (sign=1) ou retira (sign=-1) os movimentos dos totais das sessões.
+
+    Deve rodar na mesma transação que grava os movimentos. Os totais da
+    sessão são atualizados com F() em um UPDATE por sessão, que também
+    serializa os terminais que registram movimentos no mesmo caixa.
+    """
+    session_deltas: dict[int, dict] = defaultdict(
+        lambda: {'entries_total': ZERO, 'exits_total': ZERO})
+    method_deltas: dict[tuple, dict] = defaultdict(
+        lambda: {'entries': ZERO, 'exits': ZERO})
+    for movement in movements:
+        field = _total_field(movement.type)
+        amount = sign * Decimal(movement.amount)
+        session_deltas[movement.session_id][f'{field}_total'] += amount
+        key = (movement.company_id, movement.session_id, movement.payment_method or '')
+        method_deltas[key][field] += amount
+
+    with transaction.atomic():
+        for session_id, deltas in session_deltas.items():
+            CashRegisterSession.objects.filter(pk=session_id).update(
+                **{field: F(field) + value for field, value in deltas.items()})
+        increment_rows(
+            CashSessionMethodTotal,
+            ('company_id', 'session_id', 'payment_method'),
+            dict(method_deltas),
+        )
+
+
+def session_method_totals(session) -> list[dict]:
+    """
+    Entradas, saídas e saldo da sessão por forma de pagamento, lidos dos
+    totais mantidos por apply_cash_movements (sem somar os movimentos).
+    """
+    labels = dict(CashMovement.MOVEMENT_PAYMENT_CHOICES)
+    rows = (
+        CashSessionMethodTotal.objects.filter(session=session)
+        .exclude(entries=0, exits=0)
+        .order_by('payment_method')
+        .values('payment_method', 'entries', 'exits')
+    )
+    return [
+        {
+            'method': labels.get(row['payment_method'], row['payment_method']) or 'N/I',
+            'method_code': row['payment_method'],
+            'entries': row['entries'],
+            'exits': row['exits'],
+            'balance': row['entries'] - row['exits'],
+        }
+        for row in rows
+    ]
+
+
+def _movement_totals(session_ids) -> dict[int, dict[str, dict]]:
+    """Soma dos movimentos por sessão e forma de pagamento: {sessão: {forma: {entries, exits}}}."""
+    totals: dict[int, dict[str, dict]] = defaultdict(dict)
+    rows = (
+        CashMovement.objects.filter(session_id__in=session_ids)
+        .values('session_id', 'payment_method', 'type')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in rows:
+        method = totals[row['session_id']].setdefault(
+            row['payment_method'] or '', {'entries': ZERO, 'exits': ZERO})
+        method[_total_field(row['type'])] += row['total'] or ZERO
+    return totals
+
+
+def _session_totals(methods: dict[str, dict]) -> dict[str, Decimal]:
+    return {
+        'entries_total': sum((values['entries'] for values in methods.values()), ZERO),
+        'exits_total': sum((values['exits'] for values in methods.values()), ZERO),
+    }
+
+
+def rebuild_cash_totals(sessions=None, *, dry_run: bool = False) -> list[int]:
+    """
+    Confere os totais gravados das sessões com a soma dos movimentos.
+
+    As sessões divergentes são recalculadas (a menos que dry_run) com a
+    linha da sessão travada, para não perder movimentos registrados durante
+    a correção. Retorna os ids das sessões divergentes.
+    """
+    if sessions is None:
+        sessions = CashRegisterSession.objects.all()
+    session_ids = list(sessions.order_by('pk').values_list('pk', flat=True))
+    expected = _movement_totals(session_ids)
+    stored: dict[int, dict[str, dict]] = defaultdict(dict)
+    for row in CashSessionMethodTotal.objects.filter(session_id__in=session_ids).values(
+            'session_id', 'payment_method', 'entries', 'exits'):
+        stored[row['session_id']][row['payment_method']] = {
+            'entries': row['entries'], 'exits': row['exits']}
+    stored_sessions = {
+        row['pk']: {'entries_total': row['entries_total'], 'exits_total': row['exits_total']}
+        for row in CashRegisterSession.objects.filter(pk__in=session_ids).values(
+            'pk', 'entries_total', 'exits_total')
+    }
+
+    mismatched = []
+    for session_id in session_ids:
+        methods = expected.get(session_id, {})
+        if (
+            stored_sessions.get(session_id) == _session_totals(methods)
+            and stored.get(session_id, {}) == methods
+        ):
+            continue
+        mismatched.append(session_id)
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            session = CashRegisterSession.objects.select_for_update().get(pk=session_id)
+            methods = _movement_totals([session_id]).get(session_id, {})
+            CashRegisterSession.objects.filter(pk=session_id).update(**_session_totals(methods))
+            CashSessionMethodTotal.objects.filter(session_id=session_id).delete()
+            CashSessionMethodTotal.objects.bulk_create([
+                CashSessionMethodTotal(
+                    company_id=session.company_id,
+                    session_id=session_id,
+                    payment_method=method,
+                    **values,
+                )
+                for method, values in methods.items()
+            ])
+    return mismatched
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from p_v_App.models import Estoque, Products
+from sales.combos import combo_items_with_stock, with_combo_availability
+
+POS_CATALOG_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(company_id: int) -> str:
+    return f'pos_catalog_version:{company_id}'
+
+
+def _snapshot_key(company_id: int, version: int) -> str:
+    return f'pos_catalog:{company_id}:{version}'
+
+
+def get_pos_catalog_version(company_id: int) -> int:
+    """
+    Versão atual do catálogo do PDV da empresa.
+
+    Quando a chave não está em cache a versão recomeça a partir do relógio,
+    para que nenhum ETag emitido antes volte a ser considerado válido.
+    """
+    key = _version_key(company_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns() // 1000, None)
+            version = cache.get(key)
+    except Exception:
+        version = None
+    return version if version is not None else time.time_ns() // 1000
+
+
+def bump_pos_catalog_version(company_id: int) -> None:
+    """Invalida o catálogo do PDV da empresa após o commit da transação atual."""
+    def _bump():
+        key = _version_key(company_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            get_pos_catalog_version(company_id)
+        except Exception:
+            pass
+
+    transaction.on_commit(_bump)
+
+
+def build_pos_catalog(company) -> list[dict]:
+    """Monta a lista de produtos e combos exibida no PDV."""
+    stock_by_product = dict(
+        Estoque.objects.filter(
+            status=1,
+            company=company,
+            produto__status=1,
+            produto__is_combo=False,
+        ).values_list('produto_id', 'quantidade')
+    )
+
+    catalog_products = Products.objects.filter(
+        company=company,
+        status=1,
+        is_combo=False,
+    ).order_by('name')
+
+    combo_products = (
+        with_combo_availability(
+            Products.objects.filter(company=company, status=1, is_combo=True)
+        )
+        .prefetch_related(
+            Prefetch('combo_items', queryset=combo_items_with_stock(company))
+        )
+        .order_by('name')
+    )
+
+    product_json = []
+    for product in catalog_products:
+        product_json.append(
+            {
+                'id': product.id,
+                'name': product.name,
+                'price': float(product.price),
+                'estoque': stock_by_product.get(product.id),
+                'code': product.code,
+                'codigo_barras': getattr(product, 'codigo_barras', product.code),
+                'barcode': getattr(product, 'barcode', product.code),
+                'product_code': product.code,
+                'is_combo': False,
+                'combo_total_quantity': None,
+                'combo_max_flavors': None,
+                'combo_items': [],
+            }
+        )
+
+    for combo in combo_products:
+        combo_items_payload = [
+            {
+                'component_id': item.component_id,
+                'name': item.component.name,
+                'code': item.component.code,
+                'quantity': float(item.quantity or 0),
+                'stock': item.component_stock,
+            }
+            for item in combo.combo_items.all()
+        ]
+
+        available_quantity = (
+            int(combo.available_quantity)
+            if combo.available_quantity is not None
+            else None
+        )
+
+        total_quantity = (
+            float(combo.combo_total_quantity)
+            if combo.combo_total_quantity is not None
+            else None
+        )
+
+        product_json.append(
+            {
+                'id': combo.id,
+                'name': combo.name,
+                'price': float(combo.price),
+                'estoque': available_quantity,
+                'code': combo.code,
+                'codigo_barras': getattr(combo, 'codigo_barras', combo.code),
+                'barcode': getattr(combo, 'barcode', combo.code),
+                'product_code': combo.code,
+                'is_combo': True,
+                'combo_total_quantity': total_quantity,
+                'combo_max_flavors': combo.combo_max_flavors,
+                'combo_items': combo_items_payload,
+            }
+        )
+
+    return product_json
+
+
+def get_pos_catalog(company) -> tuple[int, list[dict]]:
+    """
+    Retorna (versão, produtos) do catálogo do PDV, montando-o só quando a
+    versão atual ainda não está em cache.
+    """
+    version = get_pos_catalog_version(company.id)
+    key = _snapshot_key(company.id, version)
+    try:
+        products = cache.get(key)
+    except Exception:
+        products = None
+    if products is None:
+        products = build_pos_catalog(company)
+        try:
+            cache.set(key, products, POS_CATALOG_TIMEOUT)
+        except Exception:
+            pass
+    return version, products
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Sequence
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, FloatField, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce
+
+from p_v_App.models import Estoque, ProductComboItem, Products
+
+COMBO_MAP_TIMEOUT = 60 * 60
+
+
+def _combo_map_key(company_id: int) -> str:
+    return f'combo_map:{company_id}'
+
+
+def invalidate_combo_map(company_id: int) -> None:
+    """Descarta o mapa de combos da empresa após o commit da transação atual."""
+    def _delete():
+        try:
+            cache.delete(_combo_map_key(company_id))
+        except Exception:
+            pass
+
+    transaction.on_commit(_delete)
+
+
+def build_combo_map(company) -> dict[int, dict]:
+    """
+    Definição de todos os combos da empresa em uma única consulta.
+
+    {combo_id: {'total_quantity': Decimal | None, 'max_flavors': int,
+    'components': {component_id: quantidade por combo}}}
+    """
+    company_id = getattr(company, 'pk', company)
+    combo_map: dict[int, dict] = {
+        combo_id: {
+            'total_quantity': total_quantity,
+            'max_flavors': max_flavors or 0,
+            'components': {},
+        }
+        for combo_id, total_quantity, max_flavors in Products.objects.filter(
+            company_id=company_id, is_combo=True,
+        ).values_list('id', 'combo_total_quantity', 'combo_max_flavors')
+    }
+    items = ProductComboItem.objects.filter(
+        company_id=company_id, combo_id__in=list(combo_map),
+    ).values_list('combo_id', 'component_id', 'quantity')
+    for combo_id, component_id, quantity in items:
+        combo_map[combo_id]['components'][component_id] = quantity or Decimal('0')
+    return combo_map
+
+
+def get_combo_map(company) -> dict[int, dict]:
+    """Mapa de combos da empresa, mantido em cache até um combo ser alterado."""
+    company_id = getattr(company, 'pk', company)
+    key = _combo_map_key(company_id)
+    try:
+        combo_map = cache.get(key)
+    except Exception:
+        combo_map = None
+    if combo_map is None:
+        combo_map = build_combo_map(company_id)
+        try:
+            cache.set(key, combo_map, COMBO_MAP_TIMEOUT)
+        except Exception:
+            pass
+    return combo_map
+
+
+def _parse_config(raw_config) -> list:
+    if isinstance(raw_config, (list, tuple)):
+        return list(raw_config)
+    try:
+        config_entries = json.loads(raw_config) if raw_config else []
+    except json.JSONDecodeError:
+        raise ValueError('Não foi possível interpretar os itens do combo.')
+    if not isinstance(config_entries, list):
+        raise ValueError('Não foi possível interpretar os itens do combo.')
+    return config_entries
+
+
+def _resolve_line(definition: dict, raw_config, combo_qty) -> list[dict]:
+    try:
+        qty_value = Decimal(str(combo_qty))
+    except (InvalidOperation, ValueError):
+        raise ValueError('Quantidade inválida para o combo.')
+
+    allowed_components = definition['components']
+    if not allowed_components:
+        raise ValueError(
+            'Configure os componentes do combo antes de realizar a venda.'
+        )
+
+    config_entries = _parse_config(raw_config)
+    if not config_entries:
+        config_entries = [
+            {'component_id': component_id, 'quantity': quantity}
+            for component_id, quantity in allowed_components.items()
+            if quantity and quantity > 0
+        ]
+
+    per_combo: dict[int, Decimal] = {}
+    total_per_combo = Decimal('0')
+    active_flavors = 0
+
+    for entry in config_entries:
+        if not isinstance(entry, dict):
+            raise ValueError('Item inválido informado para o combo.')
+        component_id = entry.get('component_id') or entry.get('id')
+        if component_id in (None, ''):
+            continue
+        try:
+            component_id = int(component_id)
+        except (TypeError, ValueError):
+            raise ValueError('Item inválido informado para o combo.')
+
+        if component_id not in allowed_components:
+            raise ValueError(
+                'Um dos itens informados não pertence a este combo.')
+
+        try:
+            per_combo_qty = Decimal(str(entry.get('quantity', 0)))
+        except (InvalidOperation, ValueError):
+            raise ValueError(
+                'Quantidade inválida para um dos componentes do combo.')
+
+        if per_combo_qty < 0:
+            raise ValueError(
+                'Quantidade do componente do combo não pode ser negativa.')
+
+        if per_combo_qty > 0:
+            active_flavors += 1
+        total_per_combo += per_combo_qty
+        per_combo[component_id] = per_combo.get(component_id, Decimal('0')) + per_combo_qty
+
+    if not per_combo:
+        raise ValueError('Informe os componentes consumidos pelo combo.')
+
+    max_flavors = definition['max_flavors']
+    if max_flavors and active_flavors > max_flavors:
+        raise ValueError(
+            'A quantidade de sabores selecionados excede o limite configurado para este combo.'
+        )
+
+    if definition['total_quantity'] is not None:
+        expected = Decimal(str(definition['total_quantity']))
+        if expected > 0 and abs(total_per_combo - expected) > Decimal('0.0001'):
+            raise ValueError(
+                f'A soma das quantidades dos componentes deve totalizar {expected}.'
+            )
+
+    resolved = [
+        {'component_id': component_id, 'total_quantity': quantity * qty_value}
+        for component_id, quantity in per_combo.items()
+        if quantity * qty_value > 0
+    ]
+    if not resolved:
+        raise ValueError('Informe os componentes consumidos pelo combo.')
+    return resolved
+
+
+def resolve_combo_lines(company, entries: Sequence[tuple]) -> list[list[dict]]:
+    """
+    Valida de uma vez as linhas de combo do carrinho.
+
+    entries: (produto, configuração, quantidade) por linha, onde configuração
+    é a lista (ou o JSON da lista) de {'component_id', 'quantity'} por combo;
+    vazia, usa as quantidades cadastradas. Retorna, na mesma ordem, os
+    componentes consumidos ({'component_id', 'total_quantity'}); itens que
+    não são combo recebem lista vazia. Levanta ValueError com a mensagem
+    exibida ao operador.
+    """
+    if not any(product.is_combo for product, _, _ in entries):
+        return [[] for _ in entries]
+
+    combo_map = get_combo_map(company)
+    resolved = []
+    for product, raw_config, combo_qty in entries:
+        if not product.is_combo:
+            resolved.append([])
+            continue
+        definition = combo_map.get(product.id)
+        if definition is None:
+            raise ValueError(
+                'Configure os componentes do combo antes de realizar a venda.'
+            )
+        resolved.append(_resolve_line(definition, raw_config, combo_qty))
+    return resolved
+
+
+def default_combo_components(company, product: Products, qty) -> list[dict]:
+    """Componentes padrão de um combo (quantidades cadastradas x quantidade vendida)."""
+    if not product.is_combo:
+        return []
+    definition = get_combo_map(company).get(product.id)
+    if definition is None:
+        return []
+    qty_decimal = Decimal(str(qty))
+    return [
+        {'component_id': component_id, 'total_quantity': quantity * qty_decimal}
+        for component_id, quantity in definition['components'].items()
+        if quantity and quantity > 0
+    ]
+
+
+def with_combo_availability(queryset):
+    """
+    Anota available_quantity nos combos: o menor estoque / quantidade por
+    combo entre os componentes, calculado no banco.
+    """
+    stock = Cast(
+        Coalesce(F('combo_items__component__estoque__quantidade'), Value(0)),
+        FloatField(),
+    )
+    return queryset.annotate(
+        available_quantity=Min(
+            stock / Cast(F('combo_items__quantity'), FloatField()),
+            filter=Q(combo_items__quantity__gt=0),
+        )
+    )
+
+
+def combo_items_with_stock(company) -> Iterable:
+    """Itens de combo com o estoque do componente anotado (component_stock)."""
+    component_stock = Estoque.objects.filter(
+        company=company, produto_id=OuterRef('component_id'),
+    ).values('quantidade')[:1]
+    return ProductComboItem.objects.select_related('component').annotate(
+        component_stock=Coalesce(Subquery(component_stock), Value(0)),
+    )
@@ -0,0 +1,62 @@
+"""
+Worker da fila de impressão: envia à impressora os recibos enfileirados.
+
+Deve rodar na máquina com acesso às impressoras (ver settings.PRINT_BACKEND).
+As conexões com impressoras de rede ficam abertas entre os recibos e são
+fechadas quando o worker encerra.
+
+Para usar:
+    python manage.py process_print_jobs            # processa continuamente
+    python manage.py process_print_jobs --once     # processa o que estiver pronto e sai
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales.print_queue import claim_print_jobs, process_print_job
+from sales.printing import tcp_connections
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de impressão de recibos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Processa os jobs prontos uma única vez e encerra'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=20,
+            help='Quantidade máxima de jobs reservados por vez (padrão: 20)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                jobs = claim_print_jobs(options['batch'])
+                for job in jobs:
+                    if process_print_job(job):
+                        self.stdout.write(f'{job.label}: impresso em {job.printer_name}')
+                    else:
+                        self.stderr.write(
+                            f'{job.label}: {job.get_status_display().lower()} '
+                            f'(tentativa {job.attempts}): {job.last_error}'
+                        )
+                if options['once']:
+                    break
+                if not jobs:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker de impressão encerrado.')
+        finally:
+            tcp_connections.close_all()
@@ -0,0 +1,64 @@
+"""
+Confere e recalcula os totais das sessões de caixa (entradas, saídas e por
+forma de pagamento).
+
+Os totais são atualizados a cada movimento registrado; este comando serve
+para detectar e corrigir divergências (ex.: movimentos alterados direto no
+banco ou no admin).
+
+Para usar:
+    python manage.py rebuild_cash_totals                  # corrige todas as sessões
+    python manage.py rebuild_cash_totals --check          # só lista as divergentes
+    python manage.py rebuild_cash_totals --company 3
+    python manage.py rebuild_cash_totals --session 42
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from p_v_App.models import CashRegisterSession
+from p_v_App.models_tenant import Company
+from sales.cash_totals import rebuild_cash_totals
+
+
+class Command(BaseCommand):
+    help = 'Confere e recalcula os totais das sessões de caixa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID da empresa (padrão: todas)'
+        )
+        parser.add_argument(
+            '--session',
+            type=int,
+            help='ID da sessão de caixa (padrão: todas)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas lista as sessões divergentes, sem corrigir'
+        )
+
+    def handle(self, *args, **options):
+        sessions = CashRegisterSession.objects.all()
+        if options['company']:
+            if not Company.objects.filter(pk=options['company']).exists():
+                raise CommandError(f"Empresa {options['company']} não encontrada.")
+            sessions = sessions.filter(company_id=options['company'])
+        if options['session']:
+            sessions = sessions.filter(pk=options['session'])
+
+        mismatched = rebuild_cash_totals(sessions, dry_run=options['check'])
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS('Totais das sessões de caixa conferidos.'))
+            return
+
+        ids = ', '.join(str(session_id) for session_id in mismatched)
+        if options['check']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(mismatched)} sessão(ões) com totais divergentes: {ids}'))
+            # Código de saída != 0 para uso em monitoramento.
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(
+            f'Totais recalculados em {len(mismatched)} sessão(ões): {ids}'))
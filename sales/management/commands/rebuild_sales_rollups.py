@@ -0,0 +1,64 @@
+"""
+Recalcula os resumos diários de vendas usados pelos relatórios.
+
+Os resumos são atualizados junto com cada venda; este comando serve para
+corrigir um intervalo (ex.: após ajustes feitos direto no banco ou no admin).
+
+Para usar:
+    python manage.py rebuild_sales_rollups                                   # todo o histórico
+    python manage.py rebuild_sales_rollups --start 2025-01-01 --end 2025-01-31
+    python manage.py rebuild_sales_rollups --company 3 --start 2025-01-01
+"""
+
+from argparse import ArgumentTypeError
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from p_v_App.models_tenant import Company
+from sales.rollups import rebuild_sales_rollups
+
+
+def _parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ArgumentTypeError(f'data inválida: {value} (use AAAA-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos diários de vendas de um período'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            type=int,
+            help='ID da empresa (padrão: todas)'
+        )
+        parser.add_argument(
+            '--start',
+            type=_parse_day,
+            help='Primeiro dia do período, AAAA-MM-DD (padrão: início do histórico)'
+        )
+        parser.add_argument(
+            '--end',
+            type=_parse_day,
+            help='Último dia do período, AAAA-MM-DD (padrão: hoje)'
+        )
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+            if company is None:
+                raise CommandError(f"Empresa {options['company']} não encontrada.")
+
+        start, end = options['start'], options['end']
+        if start and end and start > end:
+            raise CommandError('A data inicial deve ser anterior à data final.')
+
+        products, payments = rebuild_sales_rollups(company, start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumos recalculados: {products} linha(s) por produto, '
+            f'{payments} linha(s) por pagamento.'
+        ))
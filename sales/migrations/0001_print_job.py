@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=120, verbose_name='Documento')),
+                ('printer_name', models.CharField(max_length=255, verbose_name='Impressora')),
+                ('payload', models.TextField()),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('printing', 'Imprimindo'), ('done', 'Impresso'), ('failed', 'Falhou')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('printed_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+                ('pedido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='print_jobs', to='p_v_App.pedido')),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='print_jobs', to='p_v_App.sales')),
+            ],
+            options={
+                'verbose_name': 'Impressão',
+                'verbose_name_plural': 'Fila de impressão',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['company', 'created_at'], name='printjob_company_idx'), models.Index(condition=models.Q(('status__in', ['pending', 'printing'])), fields=['next_attempt_at'], name='printjob_queue_idx')],
+            },
+        ),
+    ]
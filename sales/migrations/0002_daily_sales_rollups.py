@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+        ('sales', '0001_print_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPaymentSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dia')),
+                ('payment_method', models.CharField(choices=[('PIX', 'Pix'), ('DINHEIRO', 'Dinheiro'), ('DEBITO', 'Débito'), ('CREDITO', 'Crédito'), ('MULTI', 'Pagamentos múltiplos')], max_length=10)),
+                ('channel', models.CharField(choices=[('counter', 'Balcão'), ('delivery', 'Pedido/Entrega'), ('table', 'Mesa'), ('catalog', 'Catálogo')], max_length=10)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('grand_total', models.FloatField(default=0)),
+                ('tax_amount', models.FloatField(default=0)),
+                ('discount_total', models.FloatField(default=0)),
+                ('delivery_fee', models.FloatField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário por pagamento',
+                'verbose_name_plural': 'Resumos diários por pagamento',
+                'constraints': [models.UniqueConstraint(fields=('company', 'day', 'payment_method', 'channel'), name='dailypaymentsales_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dia')),
+                ('channel', models.CharField(choices=[('counter', 'Balcão'), ('delivery', 'Pedido/Entrega'), ('table', 'Mesa'), ('catalog', 'Catálogo')], max_length=10)),
+                ('item_count', models.IntegerField(default=0)),
+                ('quantity', models.FloatField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='p_v_App.products')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário por produto',
+                'verbose_name_plural': 'Resumos diários por produto',
+                'constraints': [models.UniqueConstraint(fields=('company', 'day', 'product', 'channel'), name='dailyproductsales_uniq')],
+            },
+        ),
+    ]
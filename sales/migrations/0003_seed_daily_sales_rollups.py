@@ -0,0 +1,75 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+PAYMENT_TOTAL_FIELDS = ('grand_total', 'tax_amount', 'discount_total', 'delivery_fee')
+
+
+def seed_daily_rollups(apps, schema_editor):
+    """Gera os resumos diários a partir das vendas já registradas."""
+    Sales = apps.get_model('p_v_App', 'Sales')
+    salesItems = apps.get_model('p_v_App', 'salesItems')
+    DailyProductSales = apps.get_model('sales', 'DailyProductSales')
+    DailyPaymentSales = apps.get_model('sales', 'DailyPaymentSales')
+
+    product_totals = (
+        salesItems.objects.annotate(day=TruncDate('sale_id__date_added'))
+        .values('sale_id__company_id', 'day', 'product_id', 'sale_id__channel')
+        .annotate(item_count=Count('id'), quantity=Sum('qty'), revenue=Sum('total'))
+        .order_by()
+    )
+    DailyProductSales.objects.bulk_create(
+        [
+            DailyProductSales(
+                company_id=row['sale_id__company_id'],
+                day=row['day'],
+                product_id=row['product_id'],
+                channel=row['sale_id__channel'],
+                item_count=row['item_count'],
+                quantity=row['quantity'] or 0,
+                revenue=row['revenue'] or 0,
+            )
+            for row in product_totals.iterator()
+        ],
+        batch_size=1000,
+    )
+
+    payment_totals = (
+        Sales.objects.annotate(day=TruncDate('date_added'))
+        .values('company_id', 'day', 'forma_pagamento', 'channel')
+        .annotate(
+            sales_count=Count('id'),
+            **{field: Sum(field) for field in PAYMENT_TOTAL_FIELDS},
+        )
+        .order_by()
+    )
+    DailyPaymentSales.objects.bulk_create(
+        [
+            DailyPaymentSales(
+                company_id=row['company_id'],
+                day=row['day'],
+                payment_method=row['forma_pagamento'],
+                channel=row['channel'],
+                sales_count=row['sales_count'],
+                **{field: row[field] or 0 for field in PAYMENT_TOTAL_FIELDS},
+            )
+            for row in payment_totals.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+def drop_daily_rollups(apps, schema_editor):
+    apps.get_model('sales', 'DailyProductSales').objects.all().delete()
+    apps.get_model('sales', 'DailyPaymentSales').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_daily_rollups, drop_daily_rollups),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0020_estoque_unique_produto'),
+        ('sales', '0003_seed_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashSessionReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='cash_reports/')),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stored_report', to='p_v_App.cashregistersession')),
+            ],
+            options={
+                'verbose_name': 'Relatório de fechamento de caixa',
+                'verbose_name_plural': 'Relatórios de fechamento de caixa',
+            },
+        ),
+    ]
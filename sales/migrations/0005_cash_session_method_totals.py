@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-17 00:31
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('p_v_App', '0021_cash_session_running_totals'),
+        ('sales', '0004_cash_session_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashSessionMethodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_method', models.CharField(blank=True, choices=[('PIX', 'Pix'), ('DINHEIRO', 'Dinheiro'), ('DEBITO', 'Débito'), ('CREDITO', 'Crédito'), ('MULTI', 'Pagamentos múltiplos'), ('AJUSTE', 'Ajuste manual')], max_length=10)),
+                ('entries', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('exits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='p_v_App.company')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='method_totals', to='p_v_App.cashregistersession')),
+            ],
+            options={
+                'verbose_name': 'Total do caixa por forma de pagamento',
+                'verbose_name_plural': 'Totais do caixa por forma de pagamento',
+                'constraints': [models.UniqueConstraint(fields=('session', 'payment_method'), name='cashsessionmethodtotal_uniq')],
+            },
+        ),
+    ]
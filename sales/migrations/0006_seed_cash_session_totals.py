@@ -0,0 +1,60 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Sum
+
+ZERO = Decimal('0.00')
+
+
+def seed_cash_totals(apps, schema_editor):
+    """Preenche os totais das sessões de caixa a partir dos movimentos já registrados."""
+    CashRegisterSession = apps.get_model('p_v_App', 'CashRegisterSession')
+    CashMovement = apps.get_model('p_v_App', 'CashMovement')
+    CashSessionMethodTotal = apps.get_model('sales', 'CashSessionMethodTotal')
+
+    sessions = defaultdict(lambda: {'entries_total': ZERO, 'exits_total': ZERO})
+    methods = defaultdict(lambda: {'entries': ZERO, 'exits': ZERO})
+    rows = (
+        CashMovement.objects.values('company_id', 'session_id', 'payment_method', 'type')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        field = 'entries' if row['type'] == 'entry' else 'exits'
+        total = row['total'] or ZERO
+        sessions[row['session_id']][f'{field}_total'] += total
+        key = (row['company_id'], row['session_id'], row['payment_method'] or '')
+        methods[key][field] += total
+
+    for session_id, totals in sessions.items():
+        CashRegisterSession.objects.filter(pk=session_id).update(**totals)
+    CashSessionMethodTotal.objects.bulk_create(
+        [
+            CashSessionMethodTotal(
+                company_id=company_id,
+                session_id=session_id,
+                payment_method=payment_method,
+                **totals,
+            )
+            for (company_id, session_id, payment_method), totals in methods.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def drop_cash_totals(apps, schema_editor):
+    apps.get_model('sales', 'CashSessionMethodTotal').objects.all().delete()
+    apps.get_model('p_v_App', 'CashRegisterSession').objects.update(
+        entries_total=ZERO, exits_total=ZERO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_cash_session_method_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_cash_totals, drop_cash_totals),
+    ]
@@ -1,2 +1,203 @@
+from decimal import Decimal
 
-# Create your models here.
+from django.db import models
+from django.utils import timezone
+
+from p_v_App.models import CashMovement, CashRegisterSession, Pedido, Products, Sales
+from p_v_App.models_tenant import TenantManager, TenantMixin
+
+
+class PrintJob(TenantMixin):
+    """
+    Recibo aguardando impressão
+
+    Gravado na mesma transação da venda e enviado à impressora pelo comando
+    process_print_jobs, com novas tentativas em caso de falha.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        PRINTING = 'printing', 'Imprimindo'
+        DONE = 'done', 'Impresso'
+        FAILED = 'failed', 'Falhou'
+
+    sale = models.ForeignKey(
+        Sales,
+        related_name='print_jobs',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    pedido = models.ForeignKey(
+        Pedido,
+        related_name='print_jobs',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    label = models.CharField('Documento', max_length=120)
+    printer_name = models.CharField('Impressora', max_length=255)
+    payload = models.TextField()
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    printed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Impressão'
+        verbose_name_plural = 'Fila de impressão'
+        indexes = [
+            models.Index(fields=['company', 'created_at'],
+                         name='printjob_company_idx'),
+            models.Index(fields=['next_attempt_at'],
+                         condition=models.Q(status__in=['pending', 'printing']),
+                         name='printjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.label} ({self.get_status_display()})'
+
+
+class DailyProductSales(TenantMixin):
+    """
+    Quantidade e receita vendidas de cada produto por dia e canal
+
+    Mantida por sales.rollups na mesma transação das vendas; pode ser
+    recalculada com o comando rebuild_sales_rollups.
+    """
+    day = models.DateField('Dia')
+    product = models.ForeignKey(
+        Products,
+        related_name='daily_sales',
+        on_delete=models.CASCADE,
+    )
+    channel = models.CharField(max_length=10, choices=Sales.Channel.choices)
+    item_count = models.IntegerField(default=0)
+    quantity = models.FloatField(default=0)
+    revenue = models.FloatField(default=0)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = 'Resumo diário por produto'
+        verbose_name_plural = 'Resumos diários por produto'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'day', 'product', 'channel'],
+                name='dailyproductsales_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.product_id} ({self.channel})'
+
+
+class DailyPaymentSales(TenantMixin):
+    """
+    Totais das vendas por dia, forma de pagamento e canal
+
+    Mantida por sales.rollups na mesma transação das vendas; pode ser
+    recalculada com o comando rebuild_sales_rollups.
+    """
+    day = models.DateField('Dia')
+    payment_method = models.CharField(
+        max_length=10, choices=Sales.FORMA_PAGAMENTO_CHOICES)
+    channel = models.CharField(max_length=10, choices=Sales.Channel.choices)
+    sales_count = models.IntegerField(default=0)
+    grand_total = models.FloatField(default=0)
+    tax_amount = models.FloatField(default=0)
+    discount_total = models.FloatField(default=0)
+    delivery_fee = models.FloatField(default=0)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = 'Resumo diário por pagamento'
+        verbose_name_plural = 'Resumos diários por pagamento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'day', 'payment_method', 'channel'],
+                name='dailypaymentsales_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.payment_method} ({self.channel})'
+
+
+class CashSessionMethodTotal(TenantMixin):
+    """
+    Entradas e saídas de uma sessão de caixa por forma de pagamento
+
+    Mantida por sales.cash_totals junto com os totais da sessão; pode ser
+    conferida e recalculada com o comando rebuild_cash_totals.
+    """
+    session = models.ForeignKey(
+        CashRegisterSession,
+        related_name='method_totals',
+        on_delete=models.CASCADE,
+    )
+    payment_method = models.CharField(
+        max_length=10,
+        choices=CashMovement.MOVEMENT_PAYMENT_CHOICES,
+        blank=True,
+    )
+    entries = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    exits = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    # Sempre consultada pela sessão (índice da constraint única)
+    tenant_index_exempt = True
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = 'Total do caixa por forma de pagamento'
+        verbose_name_plural = 'Totais do caixa por forma de pagamento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session', 'payment_method'],
+                name='cashsessionmethodtotal_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'Caixa {self.session_id} - {self.payment_method or "N/I"}'
+
+
+class CashSessionReport(TenantMixin):
+    """
+    PDF de fechamento de uma sessão de caixa já fechada
+
+    Gerado uma única vez por sales.cash_reports (no fechamento ou na primeira
+    consulta) e servido direto do MEDIA_ROOT, com o sha256 como ETag.
+    """
+    session = models.OneToOneField(
+        CashRegisterSession,
+        related_name='stored_report',
+        on_delete=models.CASCADE,
+    )
+    file = models.FileField(upload_to='cash_reports/')
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Um registro por sessão de caixa (session é OneToOne)
+    tenant_index_exempt = True
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = 'Relatório de fechamento de caixa'
+        verbose_name_plural = 'Relatórios de fechamento de caixa'
+
+    def __str__(self):
+        return f'Fechamento do caixa {self.session_id}'
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from django.db import transaction
+
+from inventory.models import StockMovement
+from inventory.stock import apply_stock_deltas, merge_stock_deltas
+from p_v_App.models import Products, SaleComboItem, Sales, salesItems
+from sales.rollups import apply_sale_rollups
+from sales.utils import register_sale_payments
+
+
+def load_products(company, product_ids: Iterable) -> dict[int, Products]:
+    """
+    Carrega em uma única consulta os produtos do carrinho, indexados pelo id.
+
+    A composição dos combos vem de sales.combos.get_combo_map.
+    """
+    ids = {int(product_id) for product_id in product_ids if product_id not in (None, '')}
+    if not ids:
+        return {}
+    qs = Products.objects.filter(company=company, id__in=ids)
+    return {product.id: product for product in qs}
+
+
+def build_line(product: Products, qty, price, *, total=None, components=None) -> dict:
+    """Monta uma linha do carrinho no formato aceito por post_sale."""
+    qty_decimal = qty if isinstance(qty, Decimal) else Decimal(str(qty))
+    price_value = float(price)
+    return {
+        'product': product,
+        'qty': qty_decimal,
+        'price': price_value,
+        'total': float(total) if total is not None else float(qty_decimal) * price_value,
+        'components': list(components or []),
+    }
+
+
+def stock_deltas_for_lines(lines: Sequence[dict], *, sign: int = -1) -> dict[int, Decimal]:
+    """
+    Calcula a variação de estoque por produto para as linhas informadas.
+
+    Combos movimentam seus componentes; os demais itens, o próprio produto.
+    """
+    entries = []
+    for line in lines:
+        if line['product'].is_combo:
+            for component in line['components']:
+                entries.append(
+                    (component['component_id'],
+                     sign * Decimal(str(component['total_quantity'])))
+                )
+        else:
+            entries.append((line['product'].id, sign * line['qty']))
+    return merge_stock_deltas(entries)
+
+
+def post_sale(
+    sale: Sales,
+    lines: Sequence[dict],
+    *,
+    allocations: Sequence[dict] = (),
+    user=None,
+    reference: str = '',
+    reject_oversell: bool | None = None,
+    cash_session=None,
+) -> Sales:
+    """
+    Grava a venda com seus itens, componentes de combo, baixa de estoque e pagamentos.
+
+    O número de consultas é constante, independente da quantidade de linhas:
+    um INSERT por tabela (bulk_create) e um único UPDATE para o estoque, com
+    as movimentações registradas no livro de estoque (reference identifica a
+    origem, ex.: o pedido convertido). Os resumos diários dos relatórios
+    (sales.rollups) são atualizados na mesma transação. reject_oversell segue
+    inventory.stock.apply_stock_deltas; cash_session evita buscar o caixa
+    aberto quando quem chama já o tem.
+    """
+    with transaction.atomic():
+        if sale.pk is None:
+            sale.save()
+
+        sale_items = salesItems.objects.bulk_create(
+            [
+                salesItems(
+                    sale_id=sale,
+                    product_id=line['product'],
+                    qty=float(line['qty']),
+                    price=line['price'],
+                    total=line['total'],
+                )
+                for line in lines
+            ]
+        )
+
+        combo_rows = [
+            SaleComboItem(
+                sale_item=sale_item,
+                component_id=component['component_id'],
+                quantity=component['total_quantity'],
+            )
+            for sale_item, line in zip(sale_items, lines)
+            if line['product'].is_combo
+            for component in line['components']
+        ]
+        if combo_rows:
+            SaleComboItem.objects.bulk_create(combo_rows)
+
+        apply_sale_rollups(sale, lines)
+
+        apply_stock_deltas(
+            sale.company_id,
+            stock_deltas_for_lines(lines),
+            reason=StockMovement.Reason.SALE,
+            sale=sale,
+            table_order=sale.table_order,
+            reference=reference,
+            user=user,
+            reject_oversell=reject_oversell,
+        )
+
+        if allocations:
+            register_sale_payments(
+                sale, allocations, user, session=cash_session)
+
+    return sale
+
+
+def restore_sale_stock(sale: Sales, *, table_order=None, user=None) -> int:
+    """Devolve ao estoque os itens (ou componentes de combo) de uma venda."""
+    sale_items = (
+        salesItems.objects.filter(sale_id=sale)
+        .select_related('product_id')
+        .prefetch_related('combo_components')
+    )
+    lines = [
+        build_line(
+            item.product_id,
+            item.qty,
+            item.price,
+            total=item.total,
+            components=[
+                {
+                    'component_id': combo.component_id,
+                    'total_quantity': combo.quantity,
+                }
+                for combo in item.combo_components.all()
+            ],
+        )
+        for item in sale_items
+    ]
+    return apply_stock_deltas(
+        sale.company_id,
+        stock_deltas_for_lines(lines, sign=1),
+        reason=StockMovement.Reason.REOPEN,
+        table_order=table_order,
+        reference=f'Venda {sale.code}',
+        user=user,
+        reject_oversell=False,
+    )
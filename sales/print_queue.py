@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from p_v_App.models import Pedido, Sales
+from sales.models import PrintJob
+from sales.printing import send_to_printer
+from sales.utils import (
+    _safe_get_default_printer,
+    build_pedido_receipt_payload,
+    build_sale_receipt_payload,
+)
+
+PRINT_JOB_MAX_ATTEMPTS = 5
+PRINT_JOB_BACKOFF_BASE = timedelta(seconds=5)
+PRINT_JOB_BACKOFF_MAX = timedelta(minutes=5)
+# Jobs presos em "imprimindo" por mais tempo que isto voltam para a fila
+# (o worker que os pegou provavelmente caiu).
+PRINT_JOB_LOCK_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_print_job(record, *, printer_name: str | None = None) -> PrintJob | None:
+    """
+    Coloca o recibo de uma venda ou pedido na fila de impressão.
+
+    O job é gravado na transação corrente, então só fica visível para o
+    worker depois do commit da venda; nenhuma impressora é acessada aqui.
+    Retorna None quando a empresa não tem impressora padrão.
+    """
+    printer_name = printer_name or _safe_get_default_printer(record.company)
+    if not printer_name:
+        return None
+
+    if isinstance(record, Sales):
+        payload = build_sale_receipt_payload(record)
+        fields = {'sale': record, 'label': f'Venda {record.code}'}
+    elif isinstance(record, Pedido):
+        payload = build_pedido_receipt_payload(record)
+        fields = {'pedido': record, 'label': f'Pedido {record.code}'}
+    else:
+        raise TypeError('Tipo de registro nao suportado para impressao automatica.')
+
+    return PrintJob.objects.create(
+        company_id=record.company_id,
+        printer_name=printer_name,
+        payload=payload,
+        **fields,
+    )
+
+
+def trigger_auto_print(record) -> tuple[PrintJob | None, str]:
+    """Enfileira a impressão automática do recibo e descreve o resultado."""
+    try:
+        with transaction.atomic():
+            job = enqueue_print_job(record)
+    except Exception as exc:
+        return None, f'Erro ao processar impressao automatica: {exc}'
+    if job is None:
+        return None, 'Nenhuma impressora padrao configurada.'
+    return job, f'Recibo enviado para a fila de impressao de {job.printer_name}.'
+
+
+def claim_print_jobs(limit: int = 20) -> list[PrintJob]:
+    """
+    Reserva os próximos jobs prontos para envio.
+
+    As linhas são travadas com SKIP LOCKED, então vários workers podem rodar
+    ao mesmo tempo sem imprimir o mesmo recibo duas vezes.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            PrintJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=PrintJob.Status.PENDING, next_attempt_at__lte=now)
+                | Q(status=PrintJob.Status.PRINTING,
+                    locked_at__lt=now - PRINT_JOB_LOCK_TIMEOUT)
+            )
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            PrintJob.objects.filter(id__in=ids).update(
+                status=PrintJob.Status.PRINTING,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+    return list(PrintJob.objects.filter(id__in=ids).order_by('next_attempt_at'))
+
+
+def process_print_job(job: PrintJob) -> bool:
+    """Envia um job reservado à impressora e agenda nova tentativa se falhar."""
+    try:
+        success, message = send_to_printer(job.printer_name, job.payload)
+    except Exception as exc:  # noqa: BLE001
+        success, message = False, f'Erro ao enviar impressao: {exc}'
+
+    now = timezone.now()
+    job.locked_at = None
+    if success:
+        job.status = PrintJob.Status.DONE
+        job.printed_at = now
+        job.last_error = ''
+    elif job.attempts >= PRINT_JOB_MAX_ATTEMPTS:
+        job.status = PrintJob.Status.FAILED
+        job.last_error = message
+    else:
+        delay = min(PRINT_JOB_BACKOFF_BASE * (2 ** (job.attempts - 1)), PRINT_JOB_BACKOFF_MAX)
+        job.status = PrintJob.Status.PENDING
+        job.next_attempt_at = now + delay
+        job.last_error = message
+    job.save(update_fields=[
+        'status', 'locked_at', 'printed_at', 'last_error', 'next_attempt_at',
+    ])
+    return success
+
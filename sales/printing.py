@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import os
+import re
+import select
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+PRINTER_DISCOVERY_TIMEOUT = 60 * 5
+
+# Comandos ESC/POS usados nos recibos
+ESC_INIT = b'\x1b@'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_FEED_LINES = b'\x1bd\x04'
+GS_PARTIAL_CUT = b'\x1dV\x01'
+
+# Tabela de caracteres (ESC t n) correspondente a cada codec do Python
+ESCPOS_CODEPAGES = {
+    'cp437': 0,
+    'cp850': 2,
+    'cp860': 3,
+    'cp858': 19,
+}
+
+
+def _encode_for_printer(text: str, encoding: str) -> bytes:
+    """Codifica o texto trocando caracteres fora da tabela pela letra sem acento."""
+    encoded = bytearray()
+    for char in text:
+        try:
+            encoded += char.encode(encoding)
+        except UnicodeEncodeError:
+            fallback = unicodedata.normalize('NFKD', char).encode('ascii', 'ignore')
+            encoded += fallback or b'?'
+    return bytes(encoded)
+
+
+def render_escpos(payload: str, *, encoding: str | None = None) -> bytes:
+    """
+    Converte o texto do recibo em comandos ESC/POS.
+
+    A primeira linha (nome da empresa) sai centralizada e em negrito, assim
+    como a linha do total; o papel é avançado e cortado no final.
+    """
+    encoding = (encoding or settings.PRINT_ESCPOS_CODEPAGE).lower()
+    if encoding not in ESCPOS_CODEPAGES:
+        raise ValueError(f'Tabela de caracteres ESC/POS nao suportada: {encoding}')
+
+    output = bytearray(ESC_INIT)
+    output += b'\x1bt' + bytes([ESCPOS_CODEPAGES[encoding]])
+    for index, line in enumerate(payload.splitlines()):
+        text = _encode_for_printer(line, encoding) + b'\n'
+        if index == 0:
+            output += ESC_ALIGN_CENTER + ESC_BOLD_ON + text + ESC_BOLD_OFF + ESC_ALIGN_LEFT
+        elif line.startswith('Total:'):
+            output += ESC_BOLD_ON + text + ESC_BOLD_OFF
+        else:
+            output += text
+    output += ESC_FEED_LINES + GS_PARTIAL_CUT
+    return bytes(output)
+
+
+def _send_win32(printer_name: str, payload: str) -> tuple[bool, str]:
+    try:
+        import win32print
+    except Exception:
+        return False, 'Modulo win32print indisponivel neste ambiente.'
+
+    try:
+        handle = win32print.OpenPrinter(printer_name)
+    except Exception as exc:
+        return False, f'Nao foi possivel abrir a impressora "{printer_name}": {exc}'
+
+    try:
+        win32print.StartDocPrinter(handle, 1, ('ERP FortTech - Recibo', None, 'RAW'))
+        win32print.StartPagePrinter(handle)
+        win32print.WritePrinter(handle, payload.encode(settings.DEFAULT_CHARSET))
+        win32print.EndPagePrinter(handle)
+        win32print.EndDocPrinter(handle)
+    except Exception as exc:
+        return False, f'Erro ao enviar impressao: {exc}'
+    finally:
+        try:
+            win32print.ClosePrinter(handle)
+        except Exception:
+            pass
+
+    return True, f'Recibo enviado para {printer_name}'
+
+
+def _send_spool(printer_name: str, payload: str) -> tuple[bool, str]:
+    """
+    Grava o recibo em PRINT_SPOOL_DIR/<impressora>/, para ser consumido por
+    outro processo (ou inspecionado em testes).
+    """
+    folder = re.sub(r'[^\w.-]+', '_', printer_name).strip('._') or 'default'
+    spool_dir = Path(settings.PRINT_SPOOL_DIR) / folder
+    filename = f'{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.txt'
+    try:
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = spool_dir / f'.{filename}.tmp'
+        tmp_path.write_bytes(payload.encode(settings.DEFAULT_CHARSET))
+        os.replace(tmp_path, spool_dir / filename)
+    except OSError as exc:
+        return False, f'Erro ao gravar recibo no spool: {exc}'
+    return True, f'Recibo gravado em {spool_dir / filename}'
+
+
+class PrinterConnectionPool:
+    """
+    Conexões TCP abertas com impressoras de rede (porta 9100), reaproveitadas
+    entre recibos para evitar um handshake por impressão.
+
+    Conexões ociosas há mais de PRINT_TCP_IDLE_TIMEOUT segundos, ou fechadas
+    pela impressora, são descartadas antes do reuso.
+    """
+
+    def __init__(self):
+        self._idle: dict[tuple[str, int], list[tuple[socket.socket, float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_alive(sock: socket.socket) -> bool:
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return True
+            # Legível sem dados pendentes significa que a impressora fechou a conexão.
+            return sock.recv(1, socket.MSG_PEEK) != b''
+        except (OSError, ValueError):
+            return False
+
+    def _connect(self, address: tuple[str, int]) -> socket.socket:
+        sock = socket.create_connection(address, timeout=settings.PRINT_TCP_TIMEOUT)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return sock
+
+    def acquire(self, address: tuple[str, int]) -> tuple[socket.socket, bool]:
+        """Retorna (socket, reaproveitado) para o endereço informado."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(address, [])
+            while idle:
+                sock, last_used = idle.pop()
+                if now - last_used <= settings.PRINT_TCP_IDLE_TIMEOUT and self._is_alive(sock):
+                    return sock, True
+                sock.close()
+        return self._connect(address), False
+
+    def release(self, address: tuple[str, int], sock: socket.socket) -> None:
+        with self._lock:
+            self._idle.setdefault(address, []).append((sock, time.monotonic()))
+
+    def send(self, address: tuple[str, int], data: bytes) -> None:
+        """Envia os bytes, abrindo uma nova conexão se a reaproveitada falhar."""
+        sock, reused = self.acquire(address)
+        try:
+            sock.sendall(data)
+        except OSError:
+            sock.close()
+            if not reused:
+                raise
+            sock = self._connect(address)
+            try:
+                sock.sendall(data)
+            except OSError:
+                sock.close()
+                raise
+        self.release(address, sock)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for sock, _ in connections:
+                sock.close()
+
+
+tcp_connections = PrinterConnectionPool()
+
+
+def _parse_tcp_address(target: str) -> tuple[str, int]:
+    target = re.sub(r'^(tcp|socket)://', '', target.strip()).rstrip('/')
+    host, _, port = target.rpartition(':')
+    if not host:
+        return target, 9100
+    try:
+        return host.strip('[]'), int(port)
+    except ValueError:
+        raise ValueError(f'Endereco de impressora de rede invalido: {target}')
+
+
+def _send_tcp(printer_name: str, payload: str) -> tuple[bool, str]:
+    """
+    Envia o recibo em ESC/POS para uma impressora de rede (RAW, porta 9100).
+
+    Aceita "tcp://host:porta", "host:porta" ou o nome de uma impressora
+    cadastrada em PRINT_NETWORK_PRINTERS.
+    """
+    target = settings.PRINT_NETWORK_PRINTERS.get(printer_name, printer_name)
+    try:
+        address = _parse_tcp_address(target)
+        tcp_connections.send(address, render_escpos(payload))
+    except (OSError, ValueError) as exc:
+        return False, f'Erro ao enviar impressao para {printer_name}: {exc}'
+    return True, f'Recibo enviado para {printer_name}'
+
+
+def _send_cups(printer_name: str, payload: str) -> tuple[bool, str]:
+    """Envia o recibo em ESC/POS para uma fila do CUPS com `lp -o raw`."""
+    destination = re.sub(r'^cups://', '', printer_name)
+    try:
+        result = subprocess.run(
+            ['lp', '-d', destination, '-o', 'raw', '-t', 'ERP FortTech - Recibo'],
+            input=render_escpos(payload),
+            capture_output=True,
+            timeout=settings.PRINT_TCP_TIMEOUT,
+        )
+    except FileNotFoundError:
+        return False, 'Comando lp (CUPS) indisponivel neste ambiente.'
+    except (OSError, subprocess.TimeoutExpired, ValueError) as exc:
+        return False, f'Erro ao enviar impressao: {exc}'
+    if result.returncode != 0:
+        error = result.stderr.decode(errors='replace').strip()
+        return False, f'Erro ao enviar impressao para {destination}: {error}'
+    return True, f'Recibo enviado para {destination}'
+
+
+PRINT_BACKENDS = {
+    'win32': _send_win32,
+    'spool': _send_spool,
+    'tcp': _send_tcp,
+    'cups': _send_cups,
+}
+
+
+def get_printer_backend(printer_name: str) -> str:
+    """
+    Backend usado para a impressora: o prefixo do nome ("tcp://",
+    "socket://", "cups://") ou o cadastro em PRINT_NETWORK_PRINTERS têm
+    precedência sobre settings.PRINT_BACKEND.
+    """
+    scheme = printer_name.partition('://')[0].lower() if '://' in printer_name else ''
+    if scheme in ('tcp', 'socket'):
+        return 'tcp'
+    if scheme == 'cups':
+        return 'cups'
+    if printer_name in settings.PRINT_NETWORK_PRINTERS:
+        return 'tcp'
+    return settings.PRINT_BACKEND
+
+
+def send_to_printer(printer_name: str, payload: str) -> tuple[bool, str]:
+    """Envia o texto do recibo pelo backend correspondente à impressora."""
+    backend_name = get_printer_backend(printer_name)
+    backend = PRINT_BACKENDS.get(backend_name)
+    if backend is None:
+        return False, f'Backend de impressao desconhecido: {backend_name}'
+    return backend(printer_name, payload)
+
+
+def _discover_win32() -> list[str]:
+    try:
+        import win32print
+
+        flags = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
+        # EnumPrinters returns tuples where the last element is the printer name
+        return [str(printer[-1]) for printer in win32print.EnumPrinters(flags) if printer[-1]]
+    except Exception:
+        return []
+
+
+def _discover_cups() -> list[str]:
+    if not shutil.which('lpstat'):
+        return []
+    try:
+        result = subprocess.run(
+            ['lpstat', '-e'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def discover_printers(*, refresh: bool = False) -> list[str]:
+    """
+    Impressoras disponíveis neste servidor (Windows, CUPS e as de rede
+    cadastradas em PRINT_NETWORK_PRINTERS).
+
+    A enumeração consulta o sistema operacional, então o resultado fica em
+    cache por PRINTER_DISCOVERY_TIMEOUT segundos.
+    """
+    key = f'printer_discovery:{socket.gethostname()}'
+    if not refresh:
+        try:
+            names = cache.get(key)
+        except Exception:
+            names = None
+        if names is not None:
+            return names
+
+    names = sorted(
+        set(_discover_win32()) | set(_discover_cups()) | set(settings.PRINT_NETWORK_PRINTERS)
+    )
+    try:
+        cache.set(key, names, PRINTER_DISCOVERY_TIMEOUT)
+    except Exception:
+        pass
+    return names
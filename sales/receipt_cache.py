@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Callable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+RECEIPT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Variações guardadas por registro: HTML com e sem impressão automática e o
+# texto enviado à impressora.
+RECEIPT_VARIANTS = ('html:0', 'html:1', 'payload')
+
+
+def _version_key(company_id) -> str:
+    return f'receipt_version:{company_id}'
+
+
+def get_receipt_version(company_id) -> int:
+    """
+    Versão dos recibos da empresa, trocada quando os dados dela mudam.
+
+    Assim como a versão do catálogo do PDV, uma chave ausente do cache
+    recomeça a partir do relógio, descartando os recibos guardados antes.
+    """
+    key = _version_key(company_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns() // 1000, None)
+            version = cache.get(key)
+    except Exception:
+        version = None
+    return version if version is not None else time.time_ns() // 1000
+
+
+def bump_receipt_version(company_id) -> None:
+    """Descarta, após o commit, todos os recibos guardados da empresa."""
+    def _bump():
+        key = _version_key(company_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            get_receipt_version(company_id)
+        except Exception:
+            pass
+
+    transaction.on_commit(_bump)
+
+
+def _receipt_keys(company_id, kind: str, record_id, variants) -> list[str]:
+    # Vendas e pedidos são filtrados pela empresa da requisição, então o
+    # recibo guardado para uma empresa nunca é servido a outra. Nome e CNPJ
+    # da empresa aparecem no recibo: a versão muda quando ela é editada.
+    version = get_receipt_version(company_id)
+    return [
+        f'receipt:{company_id}:{version}:{kind}:{record_id}:{variant}'
+        for variant in variants
+    ]
+
+
+def _cache_get(key: str):
+    try:
+        return cache.get(key)
+    except Exception:
+        return None
+
+
+def _cache_set(key: str, value) -> None:
+    """Grava após o commit, para não guardar um recibo de transação desfeita."""
+    def _set():
+        try:
+            cache.set(key, value, RECEIPT_CACHE_TIMEOUT)
+        except Exception:
+            pass
+
+    transaction.on_commit(_set)
+
+
+def invalidate_receipt(company_id, kind: str, record_id) -> None:
+    """Descarta o recibo ('sale' ou 'pedido') guardado do registro."""
+    keys = [
+        key
+        for owner in (company_id, None)
+        for key in _receipt_keys(owner, kind, record_id, RECEIPT_VARIANTS)
+    ]
+
+    def _delete():
+        try:
+            cache.delete_many(keys)
+        except Exception:
+            pass
+
+    _delete()
+    # De novo após o commit: uma leitura concorrente pode ter guardado a
+    # versão antiga enquanto a transação estava aberta.
+    transaction.on_commit(_delete)
+
+
+def cached_receipt_response(
+    request,
+    company,
+    kind: str,
+    record_id,
+    render_receipt: Callable[[], HttpResponse | None],
+    *,
+    auto_print: bool = False,
+) -> HttpResponse | None:
+    """
+    Recibo em HTML servido do cache, com ETag.
+
+    render_receipt só é chamado quando o recibo não está em cache e retorna
+    None se o registro não existe (o retorno aqui também é None). O
+    navegador revalida com If-None-Match e recebe 304 se nada mudou.
+    """
+    if not str(record_id or '').isdigit():
+        return None
+    company_id = company.pk if company else None
+    [key] = _receipt_keys(company_id, kind, record_id, [f'html:{int(auto_print)}'])
+    entry = _cache_get(key)
+    if entry is None:
+        response = render_receipt()
+        if response is None:
+            return None
+        content = response.content
+        entry = {
+            'content': content,
+            'content_type': response['Content-Type'],
+            'etag': f'"{hashlib.sha1(content).hexdigest()}"',
+        }
+        _cache_set(key, entry)
+
+    response = get_conditional_response(request, etag=entry['etag'])
+    if response is None:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_receipt_payload(record, kind: str, build: Callable[[], str]) -> str:
+    """Texto do recibo para a impressora, gerado uma vez por registro."""
+    [key] = _receipt_keys(record.company_id, kind, record.pk, ['payload'])
+    payload = _cache_get(key)
+    if payload is None:
+        payload = build()
+        _cache_set(key, payload)
+    return payload
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from datetime import date
+from typing import Callable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SALES_REPORT_TIMEOUT = 60 * 60 * 24 * 30
+# Versão que invalida todos os períodos (ex.: custo de produto alterado)
+ALL_PERIODS = '*'
+
+
+def _version_key(company_id: int, period: str) -> str:
+    return f'sales_data_version:{company_id}:{period}'
+
+
+def _month(value) -> str:
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        value = timezone.localtime(value)
+    return f'{value:%Y-%m}'
+
+
+def _months_between(start: date, end: date) -> list[str]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def get_sales_data_versions(company_id: int, periods: list[str]) -> list[int]:
+    """
+    Versões dos dados de vendas da empresa para cada mês (AAAA-MM) informado.
+
+    Assim como a versão do catálogo do PDV, uma chave ausente do cache
+    recomeça a partir do relógio, invalidando resultados calculados antes.
+    """
+    keys = [_version_key(company_id, period) for period in periods]
+    try:
+        versions = cache.get_many(keys)
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            start_value = time.time_ns() // 1000
+            for key in missing:
+                cache.add(key, start_value, None)
+            versions.update(cache.get_many(missing))
+    except Exception:
+        versions = {}
+    fallback = time.time_ns() // 1000
+    return [versions.get(key, fallback) for key in keys]
+
+
+def bump_sales_data_version(company_id: int, *moments) -> None:
+    """
+    Invalida, após o commit, os relatórios que incluem os meses das datas
+    informadas; sem datas, invalida todos os períodos da empresa.
+    """
+    periods = {_month(moment) for moment in moments if moment} or {ALL_PERIODS}
+
+    def _bump():
+        for period in periods:
+            key = _version_key(company_id, period)
+            try:
+                cache.incr(key)
+            except ValueError:
+                get_sales_data_versions(company_id, [period])
+            except Exception:
+                pass
+
+    transaction.on_commit(_bump)
+
+
+def _count(outcome: str) -> None:
+    key = f'sales_report_cache:{outcome}'
+    try:
+        cache.add(key, 0, None)
+        cache.incr(key)
+    except Exception:
+        pass
+
+
+def get_report_cache_stats() -> dict[str, int]:
+    """Acertos e falhas acumulados do cache do relatório de vendas."""
+    try:
+        stats = cache.get_many(['sales_report_cache:hit', 'sales_report_cache:miss'])
+    except Exception:
+        stats = {}
+    return {
+        'hits': stats.get('sales_report_cache:hit', 0),
+        'misses': stats.get('sales_report_cache:miss', 0),
+    }
+
+
+def get_cached_report(
+    company_id: int,
+    start: date,
+    end: date,
+    build: Callable[[], dict],
+) -> tuple[dict, bool]:
+    """
+    Retorna (contexto, veio_do_cache) do relatório de vendas do período.
+
+    A chave combina as versões dos meses do período e a versão geral da
+    empresa, então vendas, pagamentos, débitos e movimentos de caixa só
+    invalidam os relatórios dos meses afetados: períodos fechados continuam
+    em cache indefinidamente.
+    """
+    periods = [ALL_PERIODS, *_months_between(start, end)]
+    versions = get_sales_data_versions(company_id, periods)
+    digest = hashlib.sha1(
+        ','.join(str(version) for version in versions).encode()
+    ).hexdigest()
+    key = f'sales_report:{company_id}:{start:%Y%m%d}:{end:%Y%m%d}:{digest}'
+
+    try:
+        context = cache.get(key)
+    except Exception:
+        context = None
+    if context is not None:
+        _count('hit')
+        logger.info('sales_report cache hit company=%s %s..%s', company_id, start, end)
+        return context, True
+
+    started = time.perf_counter()
+    context = build()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _count('miss')
+    logger.info(
+        'sales_report cache miss company=%s %s..%s built in %.1fms',
+        company_id, start, end, elapsed_ms,
+    )
+    try:
+        cache.set(key, context, SALES_REPORT_TIMEOUT)
+    except Exception:
+        pass
+    return context, False
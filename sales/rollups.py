@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from typing import Sequence
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from p_v_App.models import Sales, salesItems
+from sales.models import DailyPaymentSales, DailyProductSales
+from sales.report_cache import bump_sales_data_version
+
+PAYMENT_TOTAL_FIELDS = ('grand_total', 'tax_amount', 'discount_total', 'delivery_fee')
+
+
+def increment_rows(model, key_fields: Sequence[str], deltas: dict[tuple, dict]) -> None:
+    """
+    Soma os deltas às linhas de resumo identificadas pelas chaves.
+
+    Linhas existentes são atualizadas com F() em um único UPDATE e as que
+    faltam são criadas em um único INSERT, então o número de consultas não
+    depende da quantidade de chaves. Se outra transação criar a mesma linha
+    antes, o INSERT falha e a operação é repetida como UPDATE.
+    """
+    if not deltas:
+        return
+
+    key_filter = Q()
+    for key in deltas:
+        key_filter |= Q(**dict(zip(key_fields, key)))
+    fields = sorted({field for values in deltas.values() for field in values})
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                existing = list(model.objects.filter(key_filter).only('pk', *key_fields))
+                seen = set()
+                for row in existing:
+                    key = tuple(getattr(row, field) for field in key_fields)
+                    seen.add(key)
+                    for field, value in deltas[key].items():
+                        setattr(row, field, F(field) + value)
+                if existing:
+                    model.objects.bulk_update(existing, fields)
+                missing = [
+                    model(**dict(zip(key_fields, key)), **values)
+                    for key, values in deltas.items()
+                    if key not in seen
+                ]
+                if missing:
+                    model.objects.bulk_create(missing)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def apply_sale_rollups(sale: Sales, lines: Sequence[dict] | None = None, *, sign: int = 1) -> None:
+    """
+    Soma (sign=1) ou retira (sign=-1) a venda dos resumos diários.
+
+    lines segue o formato de sales.posting.build_line; quando omitido, os
+    itens são lidos da venda (ex.: antes de excluí-la).
+    """
+    day = timezone.localdate(sale.date_added)
+    if lines is None:
+        items = (
+            salesItems.objects.filter(sale_id=sale)
+            .values('product_id')
+            .annotate(item_count=Count('id'), quantity=Sum('qty'), revenue=Sum('total'))
+            .values_list('product_id', 'item_count', 'quantity', 'revenue')
+        )
+    else:
+        items = [
+            (line['product'].id, 1, float(line['qty']), float(line['total']))
+            for line in lines
+        ]
+
+    product_deltas: dict[tuple, dict] = defaultdict(
+        lambda: {'item_count': 0, 'quantity': 0.0, 'revenue': 0.0})
+    for product_id, item_count, quantity, revenue in items:
+        key = (sale.company_id, day, product_id, sale.channel)
+        product_deltas[key]['item_count'] += sign * item_count
+        product_deltas[key]['quantity'] += sign * float(quantity or 0)
+        product_deltas[key]['revenue'] += sign * float(revenue or 0)
+
+    payment_delta = {'sales_count': sign}
+    for field in PAYMENT_TOTAL_FIELDS:
+        payment_delta[field] = sign * float(getattr(sale, field) or 0)
+
+    with transaction.atomic():
+        increment_rows(
+            DailyPaymentSales,
+            ('company_id', 'day', 'payment_method', 'channel'),
+            {(sale.company_id, day, sale.forma_pagamento, sale.channel): payment_delta},
+        )
+        increment_rows(
+            DailyProductSales,
+            ('company_id', 'day', 'product_id', 'channel'),
+            dict(product_deltas),
+        )
+        if sign < 0:
+            # Descarta as linhas que ficaram sem nenhuma venda.
+            DailyPaymentSales.objects.filter(
+                company_id=sale.company_id, day=day, sales_count__lte=0).delete()
+            DailyProductSales.objects.filter(
+                company_id=sale.company_id, day=day, item_count__lte=0).delete()
+
+
+def rebuild_sales_rollups(
+    company=None,
+    start: date | None = None,
+    end: date | None = None,
+) -> tuple[int, int]:
+    """
+    Recalcula os resumos diários a partir das vendas do período.
+
+    As linhas dos dias do período são apagadas e geradas de novo, então o
+    comando pode ser repetido por intervalos sem afetar outros dias.
+    Retorna a quantidade de linhas (por produto, por pagamento) gravadas.
+    """
+    from core.utils import date_range_filter  # local import to avoid cycles
+
+    day_filter = {}
+    if start is not None:
+        day_filter['day__gte'] = start
+    if end is not None:
+        day_filter['day__lte'] = end
+
+    sales_qs = Sales.objects.filter(**date_range_filter('date_added', start, end))
+    items_qs = salesItems.objects.filter(
+        **date_range_filter('sale_id__date_added', start, end))
+    product_rows = DailyProductSales.objects.filter(**day_filter)
+    payment_rows = DailyPaymentSales.objects.filter(**day_filter)
+    if company is not None:
+        sales_qs = sales_qs.filter(company=company)
+        items_qs = items_qs.filter(sale_id__company=company)
+        product_rows = product_rows.filter(company=company)
+        payment_rows = payment_rows.filter(company=company)
+
+    product_totals = (
+        items_qs.annotate(day=TruncDate('sale_id__date_added'))
+        .values('sale_id__company_id', 'day', 'product_id', 'sale_id__channel')
+        .annotate(item_count=Count('id'), quantity=Sum('qty'), revenue=Sum('total'))
+        .order_by()
+    )
+    payment_totals = (
+        sales_qs.annotate(day=TruncDate('date_added'))
+        .values('company_id', 'day', 'forma_pagamento', 'channel')
+        .annotate(
+            sales_count=Count('id'),
+            **{field: Sum(field) for field in PAYMENT_TOTAL_FIELDS},
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        product_rows.delete()
+        payment_rows.delete()
+        products = DailyProductSales.objects.bulk_create(
+            [
+                DailyProductSales(
+                    company_id=row['sale_id__company_id'],
+                    day=row['day'],
+                    product_id=row['product_id'],
+                    channel=row['sale_id__channel'],
+                    item_count=row['item_count'],
+                    quantity=row['quantity'] or 0,
+                    revenue=row['revenue'] or 0,
+                )
+                for row in product_totals.iterator()
+            ],
+            batch_size=1000,
+        )
+        payments = DailyPaymentSales.objects.bulk_create(
+            [
+                DailyPaymentSales(
+                    company_id=row['company_id'],
+                    day=row['day'],
+                    payment_method=row['forma_pagamento'],
+                    channel=row['channel'],
+                    sales_count=row['sales_count'],
+                    **{field: row[field] or 0 for field in PAYMENT_TOTAL_FIELDS},
+                )
+                for row in payment_totals.iterator()
+            ],
+            batch_size=1000,
+        )
+        company_ids = (
+            [company.pk] if company is not None
+            else {row.company_id for row in products} | {row.company_id for row in payments}
+        )
+        for company_id in company_ids:
+            bump_sales_data_version(company_id)
+    return len(products), len(payments)
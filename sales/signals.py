@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from debts.models import Debt
+from p_v_App.models import (
+    CashMovement,
+    Category,
+    Estoque,
+    Pedido,
+    PedidoPayment,
+    ProductComboItem,
+    Products,
+    SalePayment,
+    Sales,
+)
+from p_v_App.models_tenant import Company
+from sales.catalog import bump_pos_catalog_version
+from sales.combos import invalidate_combo_map
+from sales.models import CashSessionReport
+from sales.receipt_cache import bump_receipt_version, invalidate_receipt
+from sales.report_cache import bump_sales_data_version
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+@receiver(post_save, sender=ProductComboItem)
+@receiver(post_delete, sender=ProductComboItem)
+@receiver(post_save, sender=Estoque)
+@receiver(post_delete, sender=Estoque)
+def invalidate_pos_catalog(sender, instance, **kwargs):
+    """Nova versão do catálogo do PDV quando produtos, combos ou estoque mudam."""
+    if instance.company_id:
+        bump_pos_catalog_version(instance.company_id)
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+@receiver(post_save, sender=ProductComboItem)
+@receiver(post_delete, sender=ProductComboItem)
+def invalidate_combo_definitions(sender, instance, **kwargs):
+    """Descarta o mapa de combos da empresa quando um combo ou seus itens mudam."""
+    if not instance.company_id:
+        return
+    if sender is Products and not instance.is_combo:
+        return
+    invalidate_combo_map(instance.company_id)
+
+
+@receiver(post_save, sender=Sales)
+@receiver(post_delete, sender=Sales)
+def invalidate_sales_report_for_sale(sender, instance, **kwargs):
+    """Invalida os relatórios do mês da venda."""
+    if instance.company_id:
+        bump_sales_data_version(instance.company_id, instance.date_added)
+
+
+@receiver(post_save, sender=SalePayment)
+@receiver(post_delete, sender=SalePayment)
+@receiver(post_save, sender=CashMovement)
+@receiver(post_delete, sender=CashMovement)
+def invalidate_sales_report_for_payment(sender, instance, **kwargs):
+    """Invalida os relatórios do mês do pagamento ou movimento de caixa."""
+    if instance.company_id:
+        bump_sales_data_version(instance.company_id, instance.recorded_at)
+
+
+@receiver(post_save, sender=Debt)
+@receiver(post_delete, sender=Debt)
+def invalidate_sales_report_for_debt(sender, instance, **kwargs):
+    """Invalida os relatórios dos meses em que o débito foi criado e pago."""
+    if instance.company_id:
+        bump_sales_data_version(instance.company_id, instance.created_at, instance.paid_at)
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_sales_report_for_catalog(sender, instance, **kwargs):
+    """Custo, nome e categoria dos produtos aparecem em todos os períodos."""
+    if instance.company_id:
+        bump_sales_data_version(instance.company_id)
+
+
+@receiver(post_delete, sender=CashSessionReport)
+def delete_cash_report_file(sender, instance, **kwargs):
+    """Remove do storage o PDF de fechamento excluído."""
+    if instance.file:
+        transaction.on_commit(lambda: instance.file.delete(save=False))
+
+
+@receiver(post_save, sender=Sales)
+@receiver(post_delete, sender=Sales)
+@receiver(post_save, sender=Pedido)
+@receiver(post_delete, sender=Pedido)
+def invalidate_record_receipt(sender, instance, **kwargs):
+    """Descarta o recibo guardado da venda ou pedido alterado, excluído ou reaberto."""
+    kind = 'sale' if sender is Sales else 'pedido'
+    invalidate_receipt(instance.company_id, kind, instance.pk)
+
+
+@receiver(post_save, sender=SalePayment)
+@receiver(post_delete, sender=SalePayment)
+@receiver(post_save, sender=PedidoPayment)
+@receiver(post_delete, sender=PedidoPayment)
+def invalidate_payment_receipt(sender, instance, **kwargs):
+    """Pagamentos aparecem no recibo da venda ou pedido."""
+    if sender is SalePayment:
+        invalidate_receipt(instance.company_id, 'sale', instance.sale_id)
+    else:
+        invalidate_receipt(instance.company_id, 'pedido', instance.pedido_id)
+
+
+@receiver(post_save, sender=Company)
+def invalidate_company_receipts(sender, instance, **kwargs):
+    """Nome, CNPJ e endereço da empresa aparecem em todos os recibos."""
+    bump_receipt_version(instance.pk)
@@ -1,2 +1,784 @@
+import re
+import socket
+import tempfile
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+from inventory.tests import _run_concurrently
+from p_v_App.models import (
+    CashMovement,
+    CashRegisterSession,
+    Category,
+    Estoque,
+    Pedido,
+    Products,
+    SalePayment,
+    Sales,
+    salesItems,
+)
+from p_v_App.models_tenant import Company, UserProfile
+from sales.batch import ingest_sales_batch
+from sales.cash_totals import rebuild_cash_totals, session_method_totals
+from sales.models import DailyPaymentSales, DailyProductSales, PrintJob
+from sales.posting import build_line, post_sale
+from sales.print_queue import (
+    PRINT_JOB_BACKOFF_BASE,
+    PRINT_JOB_MAX_ATTEMPTS,
+    claim_print_jobs,
+    trigger_auto_print,
+)
+from sales.rollups import PAYMENT_TOTAL_FIELDS, rebuild_sales_rollups
+from sales.printing import (
+    PrinterConnectionPool,
+    render_escpos,
+    send_to_printer,
+    tcp_connections,
+)
+from sales.utils import PDF_LINES_PER_PAGE, register_sale_payments, write_pdf_from_lines
+
+SAMPLE_RECEIPT = 'Padaria São João\nPão de queijo  2 x 3,50\nTotal: R$ 7,00\n€ obrigado'
+
+
+class _FakeNetworkPrinter:
+    """Impressora de rede local (porta efêmera) que guarda as conexões recebidas."""
+
+    def __init__(self):
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.server.settimeout(5)
+        self.address = self.server.getsockname()
+        self.connections = []
+
+    def accept(self, timeout=5):
+        self.server.settimeout(timeout)
+        conn, _ = self.server.accept()
+        conn.settimeout(5)
+        self.connections.append(conn)
+        return conn
+
+    @staticmethod
+    def receive(conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+        self.server.close()
+
+
+class RenderEscposTests(SimpleTestCase):
+
+    def test_sample_receipt_bytes(self):
+        self.assertEqual(
+            render_escpos(SAMPLE_RECEIPT, encoding='cp860'),
+            b'\x1b@\x1bt\x03'
+            b'\x1ba\x01\x1bE\x01Padaria S\x84o Jo\x84o\n\x1bE\x00\x1ba\x00'
+            b'P\x84o de queijo  2 x 3,50\n'
+            b'\x1bE\x01Total: R$ 7,00\n\x1bE\x00'
+            b'? obrigado\n'
+            b'\x1bd\x04\x1dV\x01',
+        )
+
+    def test_unsupported_codepage(self):
+        with self.assertRaises(ValueError):
+            render_escpos(SAMPLE_RECEIPT, encoding='latin-1')
+
+
+class PrinterConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.printer = _FakeNetworkPrinter()
+        self.pool = PrinterConnectionPool()
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.printer.close()
+
+    def test_send_reuses_connection(self):
+        self.pool.send(self.printer.address, b'primeiro')
+        conn = self.printer.accept()
+        self.assertEqual(self.printer.receive(conn, 8), b'primeiro')
+
+        self.pool.send(self.printer.address, b'segundo')
+        self.assertEqual(self.printer.receive(conn, 7), b'segundo')
+        with self.assertRaises(socket.timeout):
+            self.printer.accept(timeout=0.2)
+
+    def test_reconnects_after_printer_closes_connection(self):
+        self.pool.send(self.printer.address, b'primeiro')
+        first = self.printer.accept()
+        self.assertEqual(self.printer.receive(first, 8), b'primeiro')
+        first.close()
+
+        self.pool.send(self.printer.address, b'segundo')
+        second = self.printer.accept()
+        self.assertEqual(self.printer.receive(second, 7), b'segundo')
+
+    def test_send_fails_without_printer(self):
+        address = self.printer.address
+        self.printer.close()
+
+        with self.assertRaises(OSError):
+            self.pool.send(address, b'recibo')
+
+
+class SendTcpTests(SimpleTestCase):
+
+    def setUp(self):
+        self.printer = _FakeNetworkPrinter()
+        host, port = self.printer.address
+        self.target = f'tcp://{host}:{port}'
+
+    def tearDown(self):
+        tcp_connections.close_all()
+        self.printer.close()
+
+    def test_registered_printer_receives_escpos(self):
+        with self.settings(PRINT_ESCPOS_CODEPAGE='cp860',
+                           PRINT_NETWORK_PRINTERS={'Cozinha': self.target}):
+            ok, msg = send_to_printer('Cozinha', SAMPLE_RECEIPT)
+
+        self.assertTrue(ok, msg)
+        expected = render_escpos(SAMPLE_RECEIPT, encoding='cp860')
+        conn = self.printer.accept()
+        self.assertEqual(self.printer.receive(conn, len(expected)), expected)
+
+    def test_unreachable_printer_returns_error(self):
+        self.printer.close()
+
+        ok, msg = send_to_printer(self.target, SAMPLE_RECEIPT)
+
+        self.assertFalse(ok)
+        self.assertIn('Erro ao enviar impressao', msg)
+
+
+class CashTotalsTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+        self.user = get_user_model().objects.create_user('caixa', password='senha-123')
+        UserProfile.objects.create(user=self.user, company=self.company)
+        self.session = CashRegisterSession.objects.create(
+            company=self.company, opened_by=self.user, opening_amount=Decimal('50.00'))
+        self.client.force_login(self.user)
+
+    def _sell(self):
+        sale = Sales.objects.create(
+            company=self.company, code='V0001', sub_total=30, grand_total=30)
+        register_sale_payments(
+            sale,
+            [
+                {'method': 'DINHEIRO', 'tendered': Decimal('50.00'),
+                 'applied': Decimal('20.00'), 'change': Decimal('30.00')},
+                {'method': 'PIX', 'tendered': Decimal('10.00'),
+                 'applied': Decimal('10.00'), 'change': Decimal('0.00')},
+            ],
+            self.user,
+            session=self.session,
+        )
+
+    def test_totals_match_movements(self):
+        self._sell()
+        response = self.client.post(reverse('register_cash_movement'), {
+            'type': CashMovement.Type.EXIT,
+            'amount': '15.00',
+            'payment_method': 'DINHEIRO',
+            'description': 'Sangria',
+            'note': 'Depósito no banco',
+        })
+        self.assertRedirects(response, reverse('cashier'), fetch_redirect_response=False)
+
+        self.assertEqual(rebuild_cash_totals(dry_run=True), [])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.total_entries(), Decimal('60.00'))
+        self.assertEqual(self.session.total_exits(), Decimal('45.00'))
+        self.assertEqual(self.session.expected_balance(), Decimal('65.00'))
+        self.assertEqual(
+            [(item['method_code'], item['balance']) for item in session_method_totals(self.session)],
+            [('DINHEIRO', Decimal('5.00')), ('PIX', Decimal('10.00'))],
+        )
+
+    def test_rebuild_fixes_drift(self):
+        self._sell()
+        CashMovement.objects.filter(payment_method='PIX').update(amount=Decimal('12.00'))
+
+        self.assertEqual(rebuild_cash_totals(dry_run=True), [self.session.pk])
+        self.assertEqual(rebuild_cash_totals(), [self.session.pk])
+        self.assertEqual(rebuild_cash_totals(dry_run=True), [])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.total_entries(), Decimal('62.00'))
+
+
+class CashReportPdfTests(SimpleTestCase):
+
+    def _render(self, lines):
+        output = BytesIO()
+        write_pdf_from_lines(lines, output)
+        return output.getvalue()
+
+    def _assert_valid_xref(self, pdf):
+        start = int(re.search(rb'startxref\n(\d+)\n%%EOF$', pdf).group(1))
+        self.assertTrue(pdf[start:].startswith(b'xref\n'))
+        size = int(re.search(rb'/Size (\d+)', pdf[start:]).group(1))
+        entries = re.findall(rb'(\d{10}) (\d{5}) ([nf]) \n', pdf[start:])
+        self.assertEqual(len(entries), size)
+        for number, (offset, _, kind) in enumerate(entries[1:], start=1):
+            self.assertEqual(kind, b'n')
+            self.assertTrue(
+                pdf[int(offset):].startswith(f'{number} 0 obj\n'.encode('ascii')),
+                f'objeto {number} fora da posição indicada na xref',
+            )
+
+    def test_single_page(self):
+        pdf = self._render(['Relatorio de Caixa'])
+
+        self.assertEqual(len(re.findall(rb'/Type /Page\b', pdf)), 1)
+        self._assert_valid_xref(pdf)
+
+    def test_long_report_spans_several_pages(self):
+        lines = [f'Linha {index}' for index in range(PDF_LINES_PER_PAGE * 2 + 10)]
+
+        pdf = self._render(lines)
+
+        self.assertEqual(len(re.findall(rb'/Type /Page\b', pdf)), 3)
+        self.assertIn(b'/Count 3', pdf)
+        self.assertIn(f'(Linha {len(lines) - 1})'.encode('ascii'), pdf)
+        self._assert_valid_xref(pdf)
+
+
+class SalesBatchTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+        self.user = get_user_model().objects.create_user('pdv', password='senha-123')
+        category = Category.objects.create(company=self.company, name='Lanches', description='')
+        self.product = Products.objects.create(
+            company=self.company, code='X1', category_id=category, name='X-Salada', price=20)
+
+    def _entry(self, client_key):
+        return {
+            'client_key': client_key,
+            'items': [{'product_id': self.product.id, 'qty': 1, 'price': 20}],
+            'payments': [{'method': 'PIX', 'amount': 20}],
+        }
+
+    def test_replayed_sale_is_duplicate(self):
+        first = ingest_sales_batch(self.company, [self._entry('pdv1-0001')], user=self.user)
+        # O reenvio pode chegar dias depois (a chave fica na própria venda).
+        replay = ingest_sales_batch(
+            self.company, [self._entry('pdv1-0001'), self._entry('pdv1-0002')], user=self.user)
+
+        self.assertEqual(first[0]['status'], 'success')
+        self.assertEqual(replay[0]['status'], 'duplicate')
+        self.assertEqual(replay[0]['sale_id'], first[0]['sale_id'])
+        self.assertEqual(replay[1]['status'], 'success')
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), 2)
+
+    def test_sale_without_client_key_is_rejected(self):
+        results = ingest_sales_batch(self.company, [self._entry('')], user=self.user)
+
+        self.assertEqual(results[0]['status'], 'failed')
+        self.assertFalse(Sales.objects.filter(company=self.company).exists())
+
+
+class _SavePosMixin:
+    """Empresa com caixa aberto e um produto em estoque para postar no PDV."""
+
+    def _create_company(self):
+        self.company = Company.objects.create(name='Empresa Teste', auto_open_print=False)
+        self.user = get_user_model().objects.create_user('pdv', password='senha-123')
+        UserProfile.objects.create(user=self.user, company=self.company)
+        category = Category.objects.create(company=self.company, name='Lanches', description='')
+        self.product = Products.objects.create(
+            company=self.company, code='X1', category_id=category, name='X-Salada', price=20)
+        Estoque.objects.create(
+            company=self.company, produto=self.product, categoria=category, quantidade=100)
+
+    def _open_cash(self):
+        CashRegisterSession.objects.create(
+            company=self.company, opened_by=self.user, opening_amount=Decimal('0'))
+
+    def _post(self, client, key, sale_type='venda', qty=1):
+        total = str(20 * qty)
+        return client.post(
+            reverse('save-pos'),
+            {
+                'type': sale_type,
+                'product_id[]': [self.product.id],
+                'qty[]': [str(qty)],
+                'price[]': ['20'],
+                'sub_total': total,
+                'payment_method[]': ['PIX'],
+                'payment_amount[]': [total],
+            },
+            headers={'Idempotency-Key': key},
+        )
+
+
+class IdempotentSavePosTests(_SavePosMixin, TestCase):
+
+    def setUp(self):
+        self._create_company()
+        self.client.force_login(self.user)
+
+    def test_replayed_sale_returns_original_response(self):
+        self._open_cash()
+
+        first = self._post(self.client, 'venda-1')
+        replay = self._post(self.client, 'venda-1')
+
+        self.assertEqual(first.json()['status'], 'success')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), 1)
+
+    def test_replayed_order_returns_original_response(self):
+        self._open_cash()
+
+        first = self._post(self.client, 'pedido-1', sale_type='pedido')
+        replay = self._post(self.client, 'pedido-1', sale_type='pedido')
+
+        self.assertEqual(first.json()['type'], 'pedido')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Pedido.objects.filter(company=self.company).count(), 1)
+        self.assertFalse(Sales.objects.filter(company=self.company).exists())
+
+    def test_failed_request_releases_key(self):
+        # Sem caixa aberto a venda falha e a chave não pode ficar presa.
+        failed = self._post(self.client, 'venda-1')
+        self.assertEqual(failed.json()['status'], 'failed')
+        self.assertFalse(IdempotencyKey.objects.filter(company=self.company).exists())
+
+        self._open_cash()
+        retry = self._post(self.client, 'venda-1')
+
+        self.assertEqual(retry.json()['status'], 'success')
+        self.assertNotIn('Idempotent-Replayed', retry)
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), 1)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self._open_cash()
+        self._post(self.client, 'venda-1')
+
+        response = self._post(self.client, 'venda-1', qty=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentIdempotencyTests(_SavePosMixin, TransactionTestCase):
+    """
+    Reenvios simultâneos da mesma venda, cada um em sua própria conexão.
+
+    Rodam no PostgreSQL: o banco de teste do SQLite não aceita escritas
+    concorrentes.
+    """
+    workers = 6
+
+    def setUp(self):
+        self._create_company()
+        self._open_cash()
+
+    def _clients(self, count):
+        # Um único login (a sessão é única por usuário) compartilhado pelos clientes.
+        self.client.force_login(self.user)
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        clients = []
+        for _ in range(count):
+            client = self.client_class()
+            client.cookies.load({settings.SESSION_COOKIE_NAME: session_key})
+            clients.append(client)
+        return clients
+
+    def _post_concurrently(self, sale_type):
+        clients = self._clients(self.workers)
+        responses = [None] * self.workers
+
+        def _send(index):
+            responses[index] = self._post(clients[index], 'dup-1', sale_type=sale_type)
+
+        errors = _run_concurrently(_send, self.workers)
+        self.assertEqual(errors, [None] * self.workers)
+        return [response.json() for response in responses]
+
+    def test_concurrent_duplicates_create_one_sale(self):
+        bodies = self._post_concurrently('venda')
+
+        self.assertEqual(Sales.objects.filter(company=self.company).count(), 1)
+        self.assertTrue(all(body == bodies[0] for body in bodies))
+        self.assertEqual(bodies[0]['status'], 'success')
+
+    def test_concurrent_duplicates_create_one_order(self):
+        bodies = self._post_concurrently('pedido')
+
+        self.assertEqual(Pedido.objects.filter(company=self.company).count(), 1)
+        self.assertTrue(all(body == bodies[0] for body in bodies))
+        self.assertEqual(bodies[0]['status'], 'success')
+
+
+def _create_printing_company():
+    company = Company.objects.create(name='Empresa Teste', default_printer='Caixa 1')
+    sale = Sales.objects.create(company=company, code='V0001', sub_total=20, grand_total=20)
+    return company, sale
+
+
+class PrintQueueTests(TestCase):
+
+    def setUp(self):
+        self.company, self.sale = _create_printing_company()
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+
+    def _process(self, backend='spool'):
+        with self.settings(PRINT_BACKEND=backend, PRINT_SPOOL_DIR=self.spool_dir.name):
+            call_command('process_print_jobs', '--once', stdout=StringIO(), stderr=StringIO())
+
+    def _enqueue(self):
+        job, _ = trigger_auto_print(self.sale)
+        return job
+
+    def test_job_is_rolled_back_with_the_sale(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertIsNotNone(self._enqueue())
+                raise RuntimeError('venda cancelada')
+
+        self.assertFalse(PrintJob.objects.exists())
+
+    def test_worker_prints_job_into_spool(self):
+        job = self._enqueue()
+
+        self._process()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PrintJob.Status.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.printed_at)
+        files = list((Path(self.spool_dir.name) / 'Caixa_1').glob('*.txt'))
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0].read_text(encoding='utf-8'), job.payload)
+
+    def test_failure_schedules_retry_with_backoff(self):
+        job = self._enqueue()
+
+        before = timezone.now()
+        self._process(backend='inexistente')
+        job.refresh_from_db()
+        self.assertEqual(job.status, PrintJob.Status.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('Backend de impressao desconhecido', job.last_error)
+        self.assertGreaterEqual(job.next_attempt_at, before + PRINT_JOB_BACKOFF_BASE)
+
+        # Antes do horário agendado o job não é reservado de novo.
+        self._process(backend='inexistente')
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+
+        PrintJob.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        self._process(backend='inexistente')
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertGreaterEqual(job.next_attempt_at, before + PRINT_JOB_BACKOFF_BASE * 2)
+
+    def test_job_fails_after_max_attempts(self):
+        job = self._enqueue()
+        PrintJob.objects.filter(pk=job.pk).update(attempts=PRINT_JOB_MAX_ATTEMPTS - 1)
+
+        self._process(backend='inexistente')
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PrintJob.Status.FAILED)
+        self.assertEqual(job.attempts, PRINT_JOB_MAX_ATTEMPTS)
+        self.assertEqual(claim_print_jobs(), [])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class PrintQueueCommitTests(TransactionTestCase):
+    """O worker roda em outra conexão e só enxerga o job após o commit da venda."""
+
+    def _claim_from_worker(self):
+        claimed = []
+
+        def _worker():
+            try:
+                claimed.extend(claim_print_jobs())
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=_worker)
+        thread.start()
+        thread.join()
+        return claimed
+
+    def test_job_is_visible_only_after_commit(self):
+        with transaction.atomic():
+            _, sale = _create_printing_company()
+            job, _ = trigger_auto_print(sale)
+            self.assertEqual(self._claim_from_worker(), [])
+
+        self.assertEqual([claimed.pk for claimed in self._claim_from_worker()], [job.pk])
+
+
+class SalesRollupTests(TestCase):
+    """Os resumos diários devem bater com a agregação das vendas feita do zero."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Empresa Teste')
+        self.user = get_user_model().objects.create_user('gerente', password='senha-123')
+        UserProfile.objects.create(user=self.user, company=self.company)
+        category = Category.objects.create(company=self.company, name='Lanches', description='')
+        self.burger, self.juice = (
+            Products.objects.create(
+                company=self.company, code=code, category_id=category, name=name, price=price)
+            for code, name, price in (('X1', 'X-Salada', 20), ('S1', 'Suco', 8))
+        )
+
+    def _sell(self, code, method, lines, **fields):
+        sale = Sales(company=self.company, code=code, forma_pagamento=method, **fields)
+        sale.sub_total = sale.grand_total = sum(line['total'] for line in lines)
+        return post_sale(sale, lines)
+
+    def _rollup_rows(self):
+        products = {
+            (row.day, row.product_id, row.channel):
+                (row.item_count, round(row.quantity, 3), round(row.revenue, 2))
+            for row in DailyProductSales.objects.filter(company=self.company)
+        }
+        payments = {
+            (row.day, row.payment_method, row.channel):
+                (row.sales_count,) + tuple(
+                    round(getattr(row, field), 2) for field in PAYMENT_TOTAL_FIELDS)
+            for row in DailyPaymentSales.objects.filter(company=self.company)
+        }
+        return products, payments
+
+    def _aggregate_from_scratch(self):
+        products = defaultdict(lambda: [0, 0.0, 0.0])
+        for item in salesItems.objects.filter(sale_id__company=self.company).select_related('sale_id'):
+            key = (timezone.localdate(item.sale_id.date_added), item.product_id_id, item.sale_id.channel)
+            products[key][0] += 1
+            products[key][1] += item.qty
+            products[key][2] += item.total
+        payments = defaultdict(lambda: [0] + [0.0] * len(PAYMENT_TOTAL_FIELDS))
+        for sale in Sales.objects.filter(company=self.company):
+            key = (timezone.localdate(sale.date_added), sale.forma_pagamento, sale.channel)
+            payments[key][0] += 1
+            for index, field in enumerate(PAYMENT_TOTAL_FIELDS, start=1):
+                payments[key][index] += getattr(sale, field)
+        return (
+            {key: (count, round(qty, 3), round(revenue, 2))
+             for key, (count, qty, revenue) in products.items()},
+            {key: (values[0],) + tuple(round(value, 2) for value in values[1:])
+             for key, values in payments.items()},
+        )
+
+    def _post_sales(self):
+        first = self._sell('V1', 'PIX', [
+            build_line(self.burger, Decimal('2'), 20),
+            build_line(self.juice, Decimal('1'), 8),
+        ], discount_total=3)
+        second = self._sell('V2', 'PIX', [build_line(self.burger, Decimal('1'), 20)])
+        third = self._sell('V3', 'DINHEIRO', [build_line(self.juice, Decimal('3'), 8)],
+                           channel=Sales.Channel.DELIVERY, delivery_fee=5)
+        return first, second, third
+
+    def test_rollups_match_after_sales(self):
+        self._post_sales()
+
+        products, payments = self._rollup_rows()
+        self.assertEqual((products, payments), self._aggregate_from_scratch())
+        self.assertEqual(len(products), 3)
+        self.assertEqual(len(payments), 2)
+
+    def test_rollups_match_after_deleting_sale(self):
+        _, _, third = self._post_sales()
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('delete-sale'), {'id': third.id})
+
+        self.assertEqual(response.json()['status'], 'success')
+        products, payments = self._rollup_rows()
+        self.assertEqual((products, payments), self._aggregate_from_scratch())
+        # As linhas que ficaram sem venda são removidas.
+        self.assertEqual({key[2] for key in payments}, {Sales.Channel.COUNTER})
+
+    def test_rebuild_restores_drifted_rollups(self):
+        self._post_sales()
+        expected = self._aggregate_from_scratch()
+        DailyProductSales.objects.filter(company=self.company, product=self.juice).delete()
+        DailyPaymentSales.objects.filter(company=self.company).update(grand_total=0)
+        self.assertNotEqual(self._rollup_rows(), expected)
+
+        self.assertEqual(rebuild_sales_rollups(self.company), (3, 2))
+
+        self.assertEqual(self._rollup_rows(), expected)
+
+
+class SalesReportCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Empresa Teste')
+        self.user = get_user_model().objects.create_user('gerente', password='senha-123')
+        UserProfile.objects.create(user=self.user, company=self.company)
+        category = Category.objects.create(company=self.company, name='Lanches', description='')
+        self.product = Products.objects.create(
+            company=self.company, code='X1', category_id=category, name='X-Salada', price=20)
+        self.client.force_login(self.user)
+
+    def _sell(self, code):
+        with self.captureOnCommitCallbacks(execute=True):
+            sale = Sales(company=self.company, code=code, sub_total=20, grand_total=20)
+            return post_sale(sale, [build_line(self.product, Decimal('1'), 20)])
+
+    def _report(self, client=None):
+        response = (client or self.client).get(reverse('sales_report'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_report_is_served_from_cache(self):
+        self._sell('V1')
+
+        first = self._report()
+        second = self._report()
+
+        self.assertEqual(first['X-Report-Cache'], 'miss')
+        self.assertEqual(second['X-Report-Cache'], 'hit')
+        self.assertEqual(second.context['totals']['total_tx'], 1)
+
+    def test_new_sale_invalidates_report(self):
+        self._sell('V1')
+        self._report()
+
+        self._sell('V2')
+        response = self._report()
+
+        self.assertEqual(response['X-Report-Cache'], 'miss')
+        self.assertEqual(response.context['totals']['total_tx'], 2)
+
+    def test_deleted_sale_invalidates_report(self):
+        self._sell('V1')
+        sale = self._sell('V2')
+        self._report()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete-sale'), {'id': sale.id})
+        response = self._report()
+
+        self.assertEqual(response['X-Report-Cache'], 'miss')
+        self.assertEqual(response.context['totals']['total_tx'], 1)
+
+    def test_report_is_not_shared_between_companies(self):
+        self._sell('V1')
+        self._report()
+        other = Company.objects.create(name='Outra Empresa')
+        other_user = get_user_model().objects.create_user('outro', password='senha-123')
+        UserProfile.objects.create(user=other_user, company=other)
+        other_client = self.client_class()
+        other_client.force_login(other_user)
+
+        response = self._report(other_client)
+
+        self.assertEqual(response['X-Report-Cache'], 'miss')
+        self.assertEqual(response.context['totals']['total_tx'], 0)
+        self.assertEqual(self._report()['X-Report-Cache'], 'hit')
+
+
+class ReceiptCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Padaria Central', cnpj='12.345.678/0001-90')
+        self.user = get_user_model().objects.create_user('caixa', password='senha-123')
+        UserProfile.objects.create(user=self.user, company=self.company)
+        self.sale = Sales.objects.create(
+            company=self.company, code='V0001', sub_total=20, grand_total=20)
+        self.client.force_login(self.user)
+
+    def _get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        # O recibo é guardado no cache após o commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(reverse('receipt-modal'), {'id': self.sale.id}, headers=headers)
+
+    def _save(self, instance):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_revalidation_returns_not_modified(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, 'Padaria Central')
+
+        # Alteração sem sinais: o recibo continua vindo do cache.
+        Sales.objects.filter(pk=self.sale.pk).update(customer_name='Maria')
+        cached = self._get()
+        revalidated = self._get(first['ETag'])
+
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], first['ETag'])
+
+    def test_sale_change_invalidates_receipt(self):
+        etag = self._get()['ETag']
+        self.sale.customer_name = 'Maria'
+        self._save(self.sale)
+
+        response = self._get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Maria')
+
+    def test_payment_change_invalidates_receipt(self):
+        etag = self._get()['ETag']
+        payment = SalePayment(
+            company=self.company, sale=self.sale, method='PIX', recorded_by=self.user,
+            tendered_amount=Decimal('20.00'), applied_amount=Decimal('20.00'),
+            change_amount=Decimal('0.00'))
+        self._save(payment)
+
+        response = self._get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_company_edit_invalidates_receipt(self):
+        etag = self._get()['ETag']
+        self.company.name = 'Padaria Nova'
+        self.company.cnpj = '98.765.432/0001-10'
+        self._save(self.company)
+
+        response = self._get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Padaria Nova')
+        self.assertContains(response, '98.765.432/0001-10')
@@ -12,14 +12,20 @@ urlpatterns = [
     path('caixa/relatorio/<int:session_id>/',
          views.cashier_session_report, name='cashier_session_report'),
     path('pos', views.pos, name='pos-page'),
+    path('pos/catalogo', views.pos_catalog, name='pos-catalog'),
     path('checkout-modal', views.checkout_modal, name='checkout-modal'),
     path('save-pos', views.save_pos, name='save-pos'),
+    path('save-pos/lote', views.save_pos_batch, name='save-pos-batch'),
     path('sales', views.salesList, name='sales-page'),
     path('sales/<int:sale_id>/reabrir-comanda/',
          reabrir_venda_mesa, name='reabrir_venda_mesa'),
     path('receipt', views.receipt, name='receipt-modal'),
+    path('impressao/<int:job_id>/', views.print_job_status,
+         name='print-job-status'),
     path('delete_sale', views.delete_sale, name='delete-sale'),
     path('salesreport', views.sales_report, name='sales_report'),
     path('sales-report/export/', views.export_sales_report,
          name='export_sales_report'),
+    path('sales-report/export/itens/', views.export_sales_items,
+         name='export_sales_items'),
 ]
@@ -4,9 +4,8 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from io import BytesIO
 import textwrap
 import unicodedata
-from typing import Iterable, Sequence
+from typing import BinaryIO, Iterable, Sequence
 
-from django.conf import settings
 from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
@@ -21,6 +20,9 @@ from p_v_App.models import (
     salesItems,
 )
 from debts.models import Debt
+from sales.cash_totals import apply_cash_movements, session_method_totals
+from sales.printing import send_to_printer
+from sales.receipt_cache import cached_receipt_payload
 
 CENTS = Decimal('0.01')
 VALID_PAYMENT_METHODS = {
@@ -36,13 +38,23 @@ def _safe_get_default_printer(company) -> str:
 
 def print_sale_receipt_to_printer(sale: Sales, *, printer_name: str | None = None) -> tuple[bool, str]:
     """
-    Tenta imprimir um recibo simplificado na impressora informada.
-    Depende de win32print (Windows). Em outros ambientes, retorna mensagem de fallback.
+    Imprime imediatamente um recibo simplificado na impressora informada.
+
+    Usa o backend de settings.PRINT_BACKEND; vendas do PDV e das mesas usam
+    a fila (sales.print_queue) em vez desta função.
     """
     printer_name = printer_name or _safe_get_default_printer(getattr(sale, 'company', None))
     if not printer_name:
         return False, 'Nenhuma impressora padrao configurada.'
+    return send_to_printer(printer_name, build_sale_receipt_payload(sale))
+
+
+def build_sale_receipt_payload(sale: Sales) -> str:
+    """Texto do recibo simplificado de uma venda (em cache por venda)."""
+    return cached_receipt_payload(sale, 'sale', lambda: _sale_receipt_payload(sale))
+
 
+def _sale_receipt_payload(sale: Sales) -> str:
     items = [
         {
             'name': getattr(item.product_id, 'name', 'Item'),
@@ -68,7 +80,7 @@ def print_sale_receipt_to_printer(sale: Sales, *, printer_name: str | None = Non
     except Exception:
         table_number = None
 
-    payload = _build_receipt_payload(
+    return _build_receipt_payload(
         header_label='Venda',
         code=sale.code,
         company_name=getattr(sale.company, 'name', 'Empresa'),
@@ -82,14 +94,20 @@ def print_sale_receipt_to_printer(sale: Sales, *, printer_name: str | None = Non
         payments=payments,
     )
 
-    return _send_payload_to_printer(printer_name, payload)
-
 
 def print_pedido_receipt_to_printer(pedido: Pedido, *, printer_name: str | None = None) -> tuple[bool, str]:
     printer_name = printer_name or _safe_get_default_printer(getattr(pedido, 'company', None))
     if not printer_name:
         return False, 'Nenhuma impressora padrao configurada.'
+    return send_to_printer(printer_name, build_pedido_receipt_payload(pedido))
+
+
+def build_pedido_receipt_payload(pedido: Pedido) -> str:
+    """Texto do recibo simplificado de um pedido (em cache por pedido)."""
+    return cached_receipt_payload(pedido, 'pedido', lambda: _pedido_receipt_payload(pedido))
+
 
+def _pedido_receipt_payload(pedido: Pedido) -> str:
     items = [
         {
             'name': getattr(item.product, 'name', 'Item'),
@@ -112,7 +130,7 @@ def print_pedido_receipt_to_printer(pedido: Pedido, *, printer_name: str | None
             }
         )
 
-    payload = _build_receipt_payload(
+    return _build_receipt_payload(
         header_label='Pedido',
         code=pedido.code,
         company_name=getattr(pedido.company, 'name', 'Empresa'),
@@ -125,8 +143,6 @@ def print_pedido_receipt_to_printer(pedido: Pedido, *, printer_name: str | None
         payments=payments,
     )
 
-    return _send_payload_to_printer(printer_name, payload)
-
 
 def _build_receipt_payload(
     *,
@@ -203,45 +219,6 @@ def _build_receipt_payload(
     return '\n'.join(lines)
 
 
-def _send_payload_to_printer(printer_name: str, payload: str) -> tuple[bool, str]:
-    try:
-        import win32print
-    except Exception:
-        return False, 'Modulo win32print indisponivel neste ambiente.'
-
-    try:
-        handle = win32print.OpenPrinter(printer_name)
-    except Exception as exc:
-        return False, f'Nao foi possivel abrir a impressora "{printer_name}": {exc}'
-
-    try:
-        win32print.StartDocPrinter(handle, 1, ('ERP FortTech - Recibo', None, 'RAW'))
-        win32print.StartPagePrinter(handle)
-        win32print.WritePrinter(handle, payload.encode(settings.DEFAULT_CHARSET))
-        win32print.EndPagePrinter(handle)
-        win32print.EndDocPrinter(handle)
-    except Exception as exc:
-        return False, f'Erro ao enviar impressao: {exc}'
-    finally:
-        try:
-            win32print.ClosePrinter(handle)
-        except Exception:
-            pass
-
-    return True, f'Recibo enviado para {printer_name}'
-
-
-def trigger_auto_print(record) -> tuple[bool, str]:
-    try:
-        if isinstance(record, Sales):
-            return print_sale_receipt_to_printer(record)
-        if isinstance(record, Pedido):
-            return print_pedido_receipt_to_printer(record)
-    except Exception as exc:
-        return False, f'Erro ao processar impressao automatica: {exc}'
-    return False, 'Tipo de registro nao suportado para impressao automatica.'
-
-
 def _to_decimal(value) -> Decimal:
     if isinstance(value, Decimal):
         return value
@@ -349,52 +326,70 @@ def get_open_cash_session(company) -> CashRegisterSession | None:
     )
 
 
-def register_sale_payments(sale: Sales, allocations: Sequence[dict], user) -> None:
+def register_sale_payments(sale: Sales, allocations: Sequence[dict], user, *, session=None) -> None:
     company = sale.company
-    session = get_open_cash_session(company)
+    if session is None:
+        session = get_open_cash_session(company)
 
-    with transaction.atomic():
-        for allocation in allocations:
-            payment = SalePayment.objects.create(
-                company=company,
-                sale=sale,
-                method=allocation['method'],
-                tendered_amount=allocation['tendered'],
-                applied_amount=allocation['applied'],
-                change_amount=allocation['change'],
-                recorded_by=user,
-            )
-            if not session:
-                continue
+    payments = [
+        SalePayment(
+            company=company,
+            sale=sale,
+            method=allocation['method'],
+            tendered_amount=allocation['tendered'],
+            applied_amount=allocation['applied'],
+            change_amount=allocation['change'],
+            recorded_by=user,
+        )
+        for allocation in allocations
+    ]
 
+    movements = []
+    if session:
+        for payment in payments:
             if payment.tendered_amount > Decimal('0'):
-                CashMovement.objects.create(
-                    company=company,
-                    session=session,
-                    type=CashMovement.Type.ENTRY,
-                    amount=payment.tendered_amount,
-                    payment_method=payment.method,
-                    description=f'Pagamento {sale.code}',
-                    sale=sale,
-                    recorded_by=user,
+                movements.append(
+                    CashMovement(
+                        company=company,
+                        session=session,
+                        type=CashMovement.Type.ENTRY,
+                        amount=payment.tendered_amount,
+                        payment_method=payment.method,
+                        description=f'Pagamento {sale.code}',
+                        sale=sale,
+                        recorded_by=user,
+                    )
                 )
 
             if payment.change_amount > Decimal('0'):
-                CashMovement.objects.create(
-                    company=company,
-                    session=session,
-                    type=CashMovement.Type.EXIT,
-                    amount=payment.change_amount,
-                    payment_method='DINHEIRO',
-                    description=f'Troco {sale.code}',
-                    sale=sale,
-                    recorded_by=user,
+                movements.append(
+                    CashMovement(
+                        company=company,
+                        session=session,
+                        type=CashMovement.Type.EXIT,
+                        amount=payment.change_amount,
+                        payment_method='DINHEIRO',
+                        description=f'Troco {sale.code}',
+                        sale=sale,
+                        recorded_by=user,
+                    )
                 )
 
+    with transaction.atomic():
+        if payments:
+            SalePayment.objects.bulk_create(payments)
+        if movements:
+            CashMovement.objects.bulk_create(movements)
+            apply_cash_movements(movements)
+
 
 def payment_summary_for_sale(sale: Sales) -> list[dict]:
     summary = []
-    for payment in sale.payments.all().order_by('-recorded_at'):
+    payments = sale.payments.all()
+    if 'payments' not in getattr(sale, '_prefetched_objects_cache', {}):
+        # Listagens fazem o prefetch já ordenado por recorded_at.
+        payments = payments.select_related('recorded_by').order_by('-recorded_at')
+    for payment in payments:
         summary.append(
             {
                 'method': payment.get_method_display(),
@@ -419,67 +414,119 @@ def _sanitize_pdf_text(value: str) -> str:
     return ascii_text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
 
 
-def _render_pdf_from_lines(lines: list[str]) -> bytes:
-    page_width = 595
-    page_height = 842
-    margin_left = 40
-    top = page_height - 40
-    leading = 14
+PDF_PAGE_WIDTH = 595
+PDF_PAGE_HEIGHT = 842
+PDF_MARGIN = 40
+PDF_LEADING = 14
+PDF_LINES_PER_PAGE = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // PDF_LEADING
 
-    text_commands = ['BT', '/F1 11 Tf',
-                     f'{margin_left} {top} Td', f'{leading} TL']
+
+def _wrap_pdf_lines(lines: Iterable[str]) -> Iterable[str]:
     for raw_line in lines:
         if not raw_line:
-            text_commands.append('T*')
+            yield ''
             continue
-        wrapped_lines = textwrap.wrap(
+        yield from textwrap.wrap(
             raw_line,
             width=90,
             replace_whitespace=False,
             drop_whitespace=False,
             break_long_words=False,
         ) or ['']
-        for wrapped in wrapped_lines:
-            sanitized = _sanitize_pdf_text(wrapped)
-            text_commands.append(f'({sanitized}) Tj')
-            text_commands.append('T*')
+
+
+def _pdf_page_content(page_lines: list[str]) -> bytes:
+    top = PDF_PAGE_HEIGHT - PDF_MARGIN
+    text_commands = ['BT', '/F1 11 Tf',
+                     f'{PDF_MARGIN} {top} Td', f'{PDF_LEADING} TL']
+    for line in page_lines:
+        if line:
+            text_commands.append(f'({_sanitize_pdf_text(line)}) Tj')
+        text_commands.append('T*')
     text_commands.append('ET')
-    content_stream = '\n'.join(text_commands)
-    content_bytes = content_stream.encode('latin-1')
+    return '\n'.join(text_commands).encode('latin-1')
 
-    buffer = BytesIO()
-    buffer.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
-    objects = []
-    objects.append('<< /Type /Catalog /Pages 2 0 R >>')
-    objects.append('<< /Type /Pages /Kids [3 0 R] /Count 1 >>')
-    objects.append(
-        f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width} {page_height}] /Contents 4 0 R '
-        '/Resources << /Font << /F1 5 0 R >> >> >>'
+
+def write_pdf_from_lines(lines: Iterable[str], output: BinaryIO) -> None:
+    """
+    Grava em output um PDF com as linhas de texto, em quantas páginas A4
+    forem necessárias.
+
+    Cada página é escrita assim que fica completa, então só uma página
+    fica em memória; o objeto /Pages (número 2) e a tabela xref, com uma
+    entrada por objeto de cada página, vão no final do arquivo.
+    """
+    position = 0
+    offsets: dict[int, int] = {}
+
+    def write(data: bytes) -> None:
+        nonlocal position
+        output.write(data)
+        position += len(data)
+
+    def write_object(number: int, body: bytes) -> None:
+        offsets[number] = position
+        write(f'{number} 0 obj\n'.encode('ascii') + body + b'\nendobj\n')
+
+    write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    page_numbers: list[int] = []
+    next_number = 4
+
+    def write_page(page_lines: list[str]) -> None:
+        nonlocal next_number
+        content = _pdf_page_content(page_lines)
+        content_number, page_number = next_number, next_number + 1
+        next_number += 2
+        write_object(
+            content_number,
+            f'<< /Length {len(content)} >>\nstream\n'.encode('ascii')
+            + content + b'\nendstream',
+        )
+        write_object(
+            page_number,
+            (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] '
+                f'/Contents {content_number} 0 R /Resources << /Font << /F1 3 0 R >> >> >>'
+            ).encode('ascii'),
+        )
+        page_numbers.append(page_number)
+
+    page_lines: list[str] = []
+    for line in _wrap_pdf_lines(lines):
+        page_lines.append(line)
+        if len(page_lines) == PDF_LINES_PER_PAGE:
+            write_page(page_lines)
+            page_lines = []
+    if page_lines or not page_numbers:
+        write_page(page_lines)
+
+    kids = ' '.join(f'{number} 0 R' for number in page_numbers)
+    write_object(
+        2,
+        f'<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>'.encode('ascii'),
     )
-    objects.append(
-        f'<< /Length {len(content_bytes)} >>\nstream\n{content_stream}\nendstream')
-    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
-
-    offsets = []
-    for index, obj in enumerate(objects, start=1):
-        offsets.append(buffer.tell())
-        buffer.write(f'{index} 0 obj\n'.encode('ascii'))
-        buffer.write(obj.encode('latin-1'))
-        buffer.write(b'\nendobj\n')
-
-    xref_position = buffer.tell()
-    buffer.write(f'xref\n0 {len(objects) + 1}\n'.encode('ascii'))
-    buffer.write(b'0000000000 65535 f \n')
-    for offset in offsets:
-        buffer.write(f'{offset:010d} 00000 n \n'.encode('ascii'))
-    buffer.write(b'trailer\n')
-    buffer.write(
-        f'<< /Size {len(objects) + 1} /Root 1 0 R >>\n'.encode('ascii'))
-    buffer.write(f'startxref\n{xref_position}\n%%EOF'.encode('ascii'))
+
+    xref_position = position
+    size = next_number
+    write(f'xref\n0 {size}\n'.encode('ascii'))
+    write(b'0000000000 65535 f \n')
+    for number in range(1, size):
+        write(f'{offsets[number]:010d} 00000 n \n'.encode('ascii'))
+    write(b'trailer\n')
+    write(f'<< /Size {size} /Root 1 0 R >>\n'.encode('ascii'))
+    write(f'startxref\n{xref_position}\n%%EOF'.encode('ascii'))
+
+
+def _render_pdf_from_lines(lines: Iterable[str]) -> bytes:
+    buffer = BytesIO()
+    write_pdf_from_lines(lines, buffer)
     return buffer.getvalue()
 
 
-def generate_cash_report_pdf(session: CashRegisterSession) -> bytes:
+def _cash_report_lines(session: CashRegisterSession) -> list[str]:
     lines: list[str] = []
 
     def add_line(text: str = '') -> None:
@@ -513,6 +560,17 @@ def generate_cash_report_pdf(session: CashRegisterSession) -> bytes:
         session.closing_amount) - session.expected_balance()
     add_line(f'Diferenca apurada: {_format_currency(difference)}')
 
+    method_totals = session_method_totals(session)
+    if method_totals:
+        add_line()
+        add_line('Caixa por forma de pagamento')
+        for item in method_totals:
+            add_line(
+                f"- {item['method']}: Entradas {_format_currency(item['entries'])}"
+                f"; Saidas {_format_currency(item['exits'])}"
+                f"; Saldo {_format_currency(item['balance'])}"
+            )
+
     period_start = session.opened_at
     period_end = session.closed_at or timezone.now()
     period_sales = Sales.objects.filter(
@@ -629,4 +687,13 @@ def generate_cash_report_pdf(session: CashRegisterSession) -> bytes:
         add_line('Observacoes do fechamento')
         add_line(session.closing_note)
 
-    return _render_pdf_from_lines(lines)
+    return lines
+
+
+def write_cash_report_pdf(session: CashRegisterSession, output: BinaryIO) -> None:
+    """Grava o PDF de fechamento da sessão de caixa em output."""
+    write_pdf_from_lines(_cash_report_lines(session), output)
+
+
+def generate_cash_report_pdf(session: CashRegisterSession) -> bytes:
+    return _render_pdf_from_lines(_cash_report_lines(session))
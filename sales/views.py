@@ -7,15 +7,25 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import transaction
-from django.db.models import Count, Q, Sum, F
-from django.db.models.functions import TruncDate
-from django.http import HttpResponse, JsonResponse
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
-from openpyxl import Workbook
-
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag
+
+from core.exports import (
+    EXPORT_CHUNK_SIZE,
+    export_queryset,
+    export_rows,
+    get_export_format,
+)
+from core.idempotency import idempotent
+from core.search import filter_search
 from core.utils import (
+    date_range_filter,
     generate_sale_code,
     get_date_range_from_request,
     get_report_queryset,
@@ -25,22 +35,30 @@ from core.utils import (
 from p_v_App.models import (
     CashMovement,
     CashRegisterSession,
-    Estoque,
     Pedido,
     PedidoItem,
     PedidoComboItem,
     PedidoPayment,
-    Products,
     Sales,
     SalePayment,
-    SaleComboItem,
     TableOrder,
     salesItems,
 )
 from debts.models import Debt
 from clients.models import Client
 from debts.models import Debt
+from sales.batch import BATCH_MAX_SALES, ingest_sales_batch
+from sales.cash_reports import get_closed_cash_report, store_cash_report
+from sales.cash_totals import apply_cash_movements, session_method_totals
+from sales.catalog import get_pos_catalog, get_pos_catalog_version
 from sales.forms import CashCloseForm, CashMovementForm, CashOpenForm
+from sales.combos import resolve_combo_lines
+from sales.models import DailyPaymentSales, DailyProductSales, PrintJob
+from sales.posting import build_line, load_products, post_sale
+from sales.print_queue import trigger_auto_print
+from sales.receipt_cache import cached_receipt_response
+from sales.report_cache import get_cached_report
+from sales.rollups import apply_sale_rollups
 from sales.utils import (
     allocate_payments,
     generate_cash_report_pdf,
@@ -48,14 +66,14 @@ from sales.utils import (
     get_primary_payment_method,
     parse_payment_entries,
     payment_summary_for_sale,
-    register_sale_payments,
     VALID_PAYMENT_METHODS,
-    trigger_auto_print,
 )
 
+CASHIER_MOVEMENTS_PER_PAGE = 25
+
 
 def _generate_unique_code(company):
-    return generate_sale_code(company, [Pedido.objects.filter(company=company)])
+    return generate_sale_code(company)
 
 
 @login_required
@@ -68,145 +86,37 @@ def pos(request):
 
     cash_session = get_open_cash_session(user_company)
 
-    estoque_qs = (
-        Estoque.objects.filter(
-            status=1,
-            company=user_company,
-            produto__status=1,
-            produto__is_combo=False,
-        )
-        .select_related('produto')
-    )
-    estoque_map = {estoque.produto_id: estoque for estoque in estoque_qs}
-
-    catalog_products = (
-        Products.objects.filter(
-            company=user_company,
-            status=1,
-            is_combo=False,
-        )
-        .order_by('name')
-    )
-
-    products_for_pos = [
-        {
-            'produto': product,
-            'quantidade': (
-                estoque_map[product.id].quantidade
-                if product.id in estoque_map
-                else None
-            ),
-        }
-        for product in catalog_products
-    ]
-
-    combo_products = (
-        Products.objects.filter(company=user_company, status=1, is_combo=True)
-        .prefetch_related('combo_items__component')
-        .order_by('name')
-    )
-
-    component_ids = set()
-    for combo in combo_products:
-        for item in combo.combo_items.all():
-            component_ids.add(item.component_id)
-
-    component_stocks = {}
-    if component_ids:
-        component_stocks = {
-            estoque.produto_id: estoque.quantidade
-            for estoque in Estoque.objects.filter(
-                company=user_company,
-                produto_id__in=component_ids,
-            )
-        }
-
-    product_json = []
-    for entry in products_for_pos:
-        product = entry['produto']
-        product_json.append(
-            {
-                'id': product.id,
-                'name': product.name,
-                'price': float(product.price),
-                'estoque': entry['quantidade'],
-                'code': product.code,
-                'codigo_barras': getattr(product, 'codigo_barras', product.code),
-                'barcode': getattr(product, 'barcode', product.code),
-                'product_code': product.code,
-                'is_combo': False,
-                'combo_total_quantity': None,
-                'combo_max_flavors': None,
-                'combo_items': [],
-            }
-        )
-
-    for combo in combo_products:
-        combo_items_payload = []
-        available_options = []
-        for item in combo.combo_items.all():
-            component = item.component
-            stock_qty = component_stocks.get(component.id, 0)
-            try:
-                quantity_value = float(item.quantity)
-            except (TypeError, ValueError):
-                quantity_value = 0.0
-            if quantity_value > 0:
-                available_options.append(
-                    stock_qty / quantity_value if quantity_value else 0
-                )
-            combo_items_payload.append(
-                {
-                    'component_id': component.id,
-                    'name': component.name,
-                    'code': component.code,
-                    'quantity': quantity_value,
-                    'stock': stock_qty,
-                }
-            )
-
-        available_quantity = None
-        if available_options:
-            try:
-                available_quantity = int(min(available_options))
-            except (ValueError, TypeError):
-                available_quantity = None
-
-        total_quantity = (
-            float(combo.combo_total_quantity)
-            if combo.combo_total_quantity is not None
-            else None
-        )
-
-        product_json.append(
-            {
-                'id': combo.id,
-                'name': combo.name,
-                'price': float(combo.price),
-                'estoque': available_quantity,
-                'code': combo.code,
-                'codigo_barras': getattr(combo, 'codigo_barras', combo.code),
-                'barcode': getattr(combo, 'barcode', combo.code),
-                'product_code': combo.code,
-                'is_combo': True,
-                'combo_total_quantity': total_quantity,
-                'combo_max_flavors': combo.combo_max_flavors,
-                'combo_items': combo_items_payload,
-            }
-        )
-
     context = {
         'page_title': 'Ponto de Venda',
-        'products': products_for_pos,
-        'combo_products': combo_products,
-        'product_json': json.dumps(product_json),
         'cash_session_open': bool(cash_session),
         'cash_session': cash_session,
-        'clients': Client.objects.filter(company=user_company).order_by('name'),
     }
     return render(request, 'sales/pos.html', context)
 
 
+def _pos_catalog_etag(request):
+    company = get_user_company(request)
+    if not company:
+        return None
+    return f'pos-{company.id}-{get_pos_catalog_version(company.id)}'
+
+
+@login_required
+@etag(_pos_catalog_etag)
+def pos_catalog(request):
+    """Catálogo do PDV em JSON; terminais com o ETag atual recebem 304."""
+    company = get_user_company(request)
+    if not company:
+        return JsonResponse(
+            {'status': 'failed', 'msg': 'Usuário não está associado a nenhuma empresa.'},
+            status=403,
+        )
+    version, products = get_pos_catalog(company)
+    response = JsonResponse({'version': version, 'products': products})
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
 def checkout_modal(request):
     grand_total = request.GET.get('grand_total', 0)
@@ -224,6 +134,7 @@ def checkout_modal(request):
 
 
 @login_required
+@idempotent('save_pos')
 def save_pos(request):
     resp = {'status': 'failed', 'msg': ''}
     data = request.POST
@@ -252,109 +163,32 @@ def save_pos(request):
             resp['msg'] = 'Cliente inválido informado.'
             return JsonResponse(resp)
 
-    def resolve_combo_components(product, raw_config, combo_qty):
-        if not product.is_combo:
-            return []
-
-        try:
-            qty_value = Decimal(str(combo_qty))
-        except (InvalidOperation, ValueError):
-            raise ValueError('Quantidade inválida para o combo.')
-
-        try:
-            config_entries = json.loads(raw_config) if raw_config else []
-        except json.JSONDecodeError:
-            raise ValueError('Não foi possível interpretar os itens do combo.')
-
-        combo_items = list(
-            product.combo_items.select_related('component')
-        )
-        if not combo_items:
-            raise ValueError(
-                'Configure os componentes do combo antes de realizar a venda.'
-            )
+    def build_cart_lines():
+        product_ids = data.getlist('product_id[]')
+        qtys = data.getlist('qty[]')
+        prices = data.getlist('price[]')
+        products = load_products(user_company, product_ids)
 
-        if not config_entries:
-            config_entries = [
-                {
-                    'component_id': item.component_id,
-                    'quantity': float(item.quantity),
-                }
-                for item in combo_items
-                if item.quantity and float(item.quantity) > 0
-            ]
-
-        allowed_components = {item.component_id: item for item in combo_items}
-        aggregated = {}
-        total_per_combo = Decimal('0')
-        active_flavors = 0
-
-        for entry in config_entries:
-            component_id = entry.get('component_id') or entry.get('id')
-            if component_id in (None, ''):
-                continue
+        cart = []
+        for idx, prod_id in enumerate(product_ids):
             try:
-                component_id = int(component_id)
-            except (TypeError, ValueError):
-                raise ValueError('Item inválido informado para o combo.')
-
-            if component_id not in allowed_components:
-                raise ValueError(
-                    'Um dos itens informados não pertence a este combo.')
-
+                product = products[int(prod_id)]
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('Produto inválido informado.')
             try:
-                per_combo_qty = Decimal(str(entry.get('quantity', 0)))
+                qty_decimal = Decimal(str(qtys[idx]))
             except (InvalidOperation, ValueError):
                 raise ValueError(
-                    'Quantidade inválida para um dos componentes do combo.')
-
-            if per_combo_qty < 0:
-                raise ValueError(
-                    'Quantidade do componente do combo não pode ser negativa.')
-
-            if per_combo_qty > 0:
-                active_flavors += 1
-            total_per_combo += per_combo_qty
-
-            payload = aggregated.setdefault(
-                component_id,
-                {'item': allowed_components[component_id],
-                    'per_combo': Decimal('0')},
-            )
-            payload['per_combo'] += per_combo_qty
-
-        if not aggregated:
-            raise ValueError('Informe os componentes consumidos pelo combo.')
-
-        max_flavors = product.combo_max_flavors or 0
-        if max_flavors and active_flavors > max_flavors:
-            raise ValueError(
-                'A quantidade de sabores selecionados excede o limite configurado para este combo.'
-            )
-
-        if product.combo_total_quantity is not None:
-            expected = Decimal(str(product.combo_total_quantity))
-            if expected > 0 and abs(total_per_combo - expected) > Decimal('0.0001'):
-                raise ValueError(
-                    f'A soma das quantidades dos componentes deve totalizar {expected}.'
-                )
-
-        resolved = []
-        for payload in aggregated.values():
-            total_quantity = payload['per_combo'] * qty_value
-            if total_quantity <= 0:
-                continue
-            resolved.append(
-                {
-                    'component': payload['item'].component,
-                    'total_quantity': total_quantity,
-                }
-            )
-
-        if not resolved:
-            raise ValueError('Informe os componentes consumidos pelo combo.')
-
-        return resolved
+                    'Quantidade inválida informada para um dos itens.')
+            raw_config = combo_configs[idx] if idx < len(combo_configs) else ''
+            cart.append((product, raw_config, qty_decimal))
+
+        components = resolve_combo_lines(user_company, cart)
+        return [
+            build_line(product, qty_decimal, prices[idx],
+                       components=components[idx])
+            for idx, (product, _, qty_decimal) in enumerate(cart)
+        ]
 
     try:
         sub_total_value = Decimal(str(data.get('sub_total', 0) or 0))
@@ -453,57 +287,50 @@ def save_pos(request):
                     company=user_company,
                 )
 
-                for idx, prod_id in enumerate(data.getlist('product_id[]')):
-                    product = Products.objects.get(
-                        id=prod_id, company=user_company)
-                    qty_raw = data.getlist('qty[]')[idx]
-                    try:
-                        qty_decimal = Decimal(str(qty_raw))
-                    except (InvalidOperation, ValueError):
-                        raise ValueError(
-                            'Quantidade inválida informada para um dos itens.')
-                    price = float(data.getlist('price[]')[idx])
-                    pedido_item = PedidoItem.objects.create(
-                        pedido=pedido,
-                        product=product,
-                        qty=float(qty_decimal),
-                        price=price,
-                        total=float(qty_decimal) * price,
-                    )
-
-                    if product.is_combo:
-                        raw_config = combo_configs[idx] if idx < len(
-                            combo_configs) else ''
-                        combo_components = resolve_combo_components(
-                            product, raw_config, qty_decimal
+                lines = build_cart_lines()
+                pedido_items = PedidoItem.objects.bulk_create(
+                    [
+                        PedidoItem(
+                            pedido=pedido,
+                            product=line['product'],
+                            qty=float(line['qty']),
+                            price=line['price'],
+                            total=line['total'],
                         )
-                        PedidoComboItem.objects.filter(
-                            pedido_item=pedido_item).delete()
-                        for component in combo_components:
-                            PedidoComboItem.objects.create(
-                            pedido_item=pedido_item,
-                            component=component['component'],
-                            quantity=component['total_quantity'],
-                        )
-
-                for allocation in allocations:
-                    PedidoPayment.objects.create(
-                        company=user_company,
-                        pedido=pedido,
-                        method=allocation['method'],
-                        tendered_amount=allocation['tendered'],
-                        applied_amount=allocation['applied'],
-                        change_amount=allocation['change'],
-                        recorded_by=request.user,
+                        for line in lines
+                    ]
+                )
+                combo_rows = [
+                    PedidoComboItem(
+                        pedido_item=pedido_item,
+                        component_id=component['component_id'],
+                        quantity=component['total_quantity'],
                     )
+                    for pedido_item, line in zip(pedido_items, lines)
+                    for component in line['components']
+                ]
+                if combo_rows:
+                    PedidoComboItem.objects.bulk_create(combo_rows)
+
+                PedidoPayment.objects.bulk_create(
+                    [
+                        PedidoPayment(
+                            company=user_company,
+                            pedido=pedido,
+                            method=allocation['method'],
+                            tendered_amount=allocation['tendered'],
+                            applied_amount=allocation['applied'],
+                            change_amount=allocation['change'],
+                            recorded_by=request.user,
+                        )
+                        for allocation in allocations
+                    ]
+                )
 
-                print_status = False
+                print_job = None
                 print_message = 'Impressao automatica desativada para esta empresa.'
                 if auto_open_print:
-                    try:
-                        print_status, print_message = trigger_auto_print(pedido)
-                    except Exception as print_exc:  # noqa: BLE001
-                        print_status, print_message = False, f'Falha ao acionar impressao: {print_exc}'
+                    print_job, print_message = trigger_auto_print(pedido)
 
                 resp = {
                     'status': 'success',
@@ -513,8 +340,12 @@ def save_pos(request):
                         reverse('receipt-modal') + f'?id={pedido.id}&auto_print={auto_print_flag}'
                         if auto_open_print else ''
                     ),
-                    'print_status': 'success' if print_status else 'skipped',
+                    'print_status': 'queued' if print_job else 'skipped',
                     'print_message': print_message,
+                    'print_job_url': (
+                        reverse('print-job-status', args=[print_job.id])
+                        if print_job else ''
+                    ),
                 }
         except Exception as exc:
             resp['msg'] = f'Erro ao processar pedido: {exc}'
@@ -561,7 +392,7 @@ def save_pos(request):
         debt_created = False
         debt_amount = Decimal('0')
         with transaction.atomic():
-            venda = Sales.objects.create(
+            venda = Sales(
                 code=code,
                 sub_total=float(sub_total_value),
                 tax=float(data.get('tax', 0) or 0),
@@ -577,62 +408,17 @@ def save_pos(request):
                 discount_total=float(discount_value),
                 discount_reason=discount_reason,
                 type='venda',
+                channel=Sales.Channel.COUNTER,
                 venda_a_prazo=register_debt,
                 company=user_company,
             )
 
-            for idx, prod_id in enumerate(data.getlist('product_id[]')):
-                product = Products.objects.get(
-                    id=prod_id, company=user_company)
-                qty_raw = data.getlist('qty[]')[idx]
-                try:
-                    qty_decimal = Decimal(str(qty_raw))
-                except (InvalidOperation, ValueError):
-                    raise ValueError(
-                        'Quantidade inválida informada para um dos itens.')
-                price = float(data.getlist('price[]')[idx])
-                sale_item = salesItems.objects.create(
-                    sale_id=venda,
-                    product_id=product,
-                    qty=float(qty_decimal),
-                    price=price,
-                    total=float(qty_decimal) * price,
-                )
-
-                if product.is_combo:
-                    raw_config = combo_configs[idx] if idx < len(
-                        combo_configs) else ''
-                    combo_components = resolve_combo_components(
-                        product, raw_config, qty_decimal
-                    )
-                    SaleComboItem.objects.filter(sale_item=sale_item).delete()
-                    for component in combo_components:
-                        SaleComboItem.objects.create(
-                            sale_item=sale_item,
-                            component=component['component'],
-                            quantity=component['total_quantity'],
-                        )
-                        try:
-                            estoque_item = Estoque.objects.get(
-                                produto=component['component'],
-                                company=user_company,
-                            )
-                            estoque_item.quantidade -= float(
-                                component['total_quantity'])
-                            estoque_item.save(update_fields=['quantidade'])
-                        except Estoque.DoesNotExist:
-                            pass
-                else:
-                    try:
-                        estoque_item = Estoque.objects.get(
-                            produto=product, company=user_company
-                        )
-                        estoque_item.quantidade -= float(qty_decimal)
-                        estoque_item.save(update_fields=['quantidade'])
-                    except Estoque.DoesNotExist:
-                        pass
-
-            register_sale_payments(venda, allocations, request.user)
+            post_sale(
+                venda,
+                build_cart_lines(),
+                allocations=allocations,
+                user=request.user,
+            )
 
             paid_total = sum(
                 (
@@ -671,13 +457,10 @@ def save_pos(request):
                 )
                 debt_created = True
                 debt_amount = remaining_due
-            print_status = False
+            print_job = None
             print_message = 'Impressao automatica desativada para esta empresa.'
             if auto_open_print:
-                try:
-                    print_status, print_message = trigger_auto_print(venda)
-                except Exception as print_exc:  # noqa: BLE001
-                    print_status, print_message = False, f'Falha ao acionar impressao: {print_exc}'
+                print_job, print_message = trigger_auto_print(venda)
 
             resp = {
                 'status': 'success',
@@ -687,8 +470,12 @@ def save_pos(request):
                     reverse('receipt-modal') + f'?id={venda.id}&auto_print={auto_print_flag}'
                     if auto_open_print else ''
                 ),
-                'print_status': 'success' if print_status else 'skipped',
+                'print_status': 'queued' if print_job else 'skipped',
                 'print_message': print_message,
+                'print_job_url': (
+                    reverse('print-job-status', args=[print_job.id])
+                    if print_job else ''
+                ),
                 'register_debt': register_debt,
                 'debt_created': debt_created,
                 'debt_amount': str(debt_amount.quantize(Decimal('0.01'))) if debt_amount else '0.00',
@@ -698,6 +485,75 @@ def save_pos(request):
     return JsonResponse(resp)
 
 
+@login_required
+def save_pos_batch(request):
+    """
+    Recebe em JSON um lote de vendas feitas offline pelo PDV.
+
+    Corpo: {"sales": [{"client_key", "sold_at", "client_id", "items":
+    [{"product_id", "qty", "price", "components"}], "payments":
+    [{"method", "amount"}], "tax", "tax_amount", "discount_total",
+    "discount_reason", "delivery_fee"}]}. Responde com o resultado de cada
+    venda (success, duplicate ou failed).
+    """
+    resp = {'status': 'failed', 'msg': ''}
+    if request.method != 'POST':
+        resp['msg'] = 'Método HTTP inválido.'
+        return JsonResponse(resp, status=405)
+
+    user_company = get_user_company(request)
+    if not user_company:
+        resp['msg'] = 'Usuário não está associado a nenhuma empresa.'
+        return JsonResponse(resp, status=403)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        resp['msg'] = 'JSON inválido.'
+        return JsonResponse(resp, status=400)
+
+    entries = payload.get('sales') if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        resp['msg'] = 'Informe a lista de vendas.'
+        return JsonResponse(resp, status=400)
+    if len(entries) > BATCH_MAX_SALES:
+        resp['msg'] = f'Envie no máximo {BATCH_MAX_SALES} vendas por lote.'
+        return JsonResponse(resp, status=400)
+
+    if not get_open_cash_session(user_company):
+        resp['msg'] = 'Abra o caixa para registrar vendas no PDV.'
+        return JsonResponse(resp, status=409)
+
+    results = ingest_sales_batch(user_company, entries, user=request.user)
+    return JsonResponse(
+        {
+            'status': 'success',
+            'results': results,
+            'posted': sum(1 for result in results if result['status'] == 'success'),
+            'failed': sum(1 for result in results if result['status'] == 'failed'),
+        }
+    )
+
+
+@login_required
+def print_job_status(request, job_id):
+    """Situação de um recibo na fila de impressão (consultada pelo PDV)."""
+    user_company = get_user_company(request)
+    job = get_object_or_404(PrintJob, pk=job_id, company=user_company)
+    return JsonResponse(
+        {
+            'id': job.id,
+            'label': job.label,
+            'printer': job.printer_name,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'attempts': job.attempts,
+            'last_error': job.last_error,
+            'printed_at': job.printed_at.isoformat() if job.printed_at else None,
+        }
+    )
+
+
 @login_required
 def salesList(request):
     user_company = get_user_company(request)
@@ -709,6 +565,7 @@ def salesList(request):
     start_date = request.GET.get('start_date', '').strip()
     end_date = request.GET.get('end_date', '').strip()
     payment_method = request.GET.get('payment_method', '').strip()
+    search_query = request.GET.get('q', '').strip()
     page = request.GET.get('page', 1)
 
     today = timezone.now().date()
@@ -726,20 +583,54 @@ def salesList(request):
     except ValueError:
         filter_end = today
 
-    base_qs = Sales.objects.filter(
-        (Q(type__in=['venda', 'pedido']) | Q(type__istartswith='Mesa')),
-        company=user_company,
-        date_added__date__gte=filter_start,
-        date_added__date__lte=filter_end,
-    )
+    # Uma busca sem período informado procura em todo o histórico.
+    search_all_dates = bool(search_query) and not start_date and not end_date
+    base_qs = Sales.objects.filter(company=user_company)
+    if not search_all_dates:
+        base_qs = base_qs.filter(
+            **date_range_filter('date_added', filter_start, filter_end))
 
     if payment_method:
         base_qs = base_qs.filter(forma_pagamento=payment_method)
+    if search_query:
+        base_qs = filter_search(base_qs, 'sales', search_query)
+
+    # Custo e quantidade de itens de cada venda calculados no banco, sem
+    # carregar os itens de todas as vendas do período.
+    sale_items = salesItems.objects.filter(sale_id=OuterRef('pk')).values('sale_id')
+    base_qs = base_qs.annotate(
+        total_cost=Coalesce(
+            Subquery(
+                sale_items.annotate(
+                    total=Sum(F('qty') * F('product_id__custo'))).values('total'),
+                output_field=FloatField(),
+            ),
+            0.0,
+        ),
+    )
 
     sales_qs = (
-        base_qs.select_related(
+        base_qs.annotate(
+            item_count=Coalesce(
+                Subquery(sale_items.annotate(total=Count('id')).values('total')),
+                0,
+            ),
+        )
+        .select_related(
             'table', 'table_order__table', 'table_order__waiter')
-        .prefetch_related('payments')
+        .prefetch_related(
+            Prefetch(
+                'payments',
+                queryset=SalePayment.objects.select_related('recorded_by')
+                .order_by('-recorded_at'),
+            ),
+            Prefetch(
+                'salesitems_set',
+                queryset=salesItems.objects.select_related('product_id')
+                .prefetch_related('combo_components__component'),
+                to_attr='page_items',
+            ),
+        )
         .order_by('-date_added')
     )
 
@@ -768,7 +659,7 @@ def salesList(request):
             'table_id': sale.table_id,
             'table_order_id': sale.table_order_id,
             'waiter_name': sale.table_order.waiter_name if sale.table_order else '',
-            'is_table_sale': (sale.type or '').lower().startswith('mesa'),
+            'is_table_sale': sale.channel == Sales.Channel.TABLE,
             'tendered_amount': sale.tendered_amount,
             'amount_change': sale.amount_change,
             'payments': payment_details,
@@ -777,19 +668,10 @@ def salesList(request):
             'discount_reason': sale.discount_reason,
         }
 
-        items = list(
-            salesItems.objects.filter(sale_id=sale)
-            .select_related('product_id')
-            .prefetch_related('combo_components__component')
-        )
-        record['items'] = items
-        record['item_count'] = len(items)
-        total_cost = sum(
-            item.qty * (item.product_id.custo or 0)
-            for item in items
-        )
-        record['total_cost'] = total_cost
-        record['profit'] = float(sale.grand_total) - float(total_cost)
+        record['items'] = sale.page_items
+        record['item_count'] = sale.item_count
+        record['total_cost'] = sale.total_cost
+        record['profit'] = float(sale.grand_total) - float(sale.total_cost)
         record['tax_amount'] = format(float(sale.tax_amount or 0), '.2f')
         sale_data.append(record)
 
@@ -798,16 +680,10 @@ def salesList(request):
         total_revenue=Sum('grand_total'),
         total_tax=Sum('tax_amount'),
         total_delivery=Sum('delivery_fee'),
+        period_cost=Sum('total_cost'),
     )
-
-    period_cost = 0
-    period_profit = 0
-    for sale in base_qs.prefetch_related('salesitems_set__product_id'):
-        sale_cost = sum(
-            item.qty * (item.product_id.custo or 0) for item in sale.salesitems_set.all()
-        )
-        period_cost += sale_cost
-        period_profit += float(sale.grand_total) - sale_cost
+    period_cost = stats_sales.get('period_cost') or 0
+    period_profit = float(stats_sales.get('total_revenue') or 0) - period_cost
 
     payment_methods = (
         base_qs.values_list('forma_pagamento', flat=True).distinct().order_by(
@@ -819,10 +695,11 @@ def salesList(request):
         'sale_data': sale_data,
         'sales_paginated': sales_paginated,
         'current': 'sales-page',
-        'start_date': filter_start.strftime('%Y-%m-%d'),
-        'end_date': filter_end.strftime('%Y-%m-%d'),
+        'start_date': '' if search_all_dates else filter_start.strftime('%Y-%m-%d'),
+        'end_date': '' if search_all_dates else filter_end.strftime('%Y-%m-%d'),
         'payment_method': payment_method,
         'payment_methods': payment_methods,
+        'search_query': search_query,
         'total_sales': stats_sales.get('total_sales') or 0,
         'total_revenue': float(stats_sales.get('total_revenue') or 0),
         'total_cost': period_cost,
@@ -837,6 +714,22 @@ def salesList(request):
 def receipt(request):
     sale_id = request.GET.get('id')
     auto_print = request.GET.get('auto_print') == '1'
+    # A venda finalizada não muda: reimpressões vêm do cache (ver
+    # sales.receipt_cache), invalidado quando a venda é excluída ou reaberta.
+    response = cached_receipt_response(
+        request,
+        get_user_company(request),
+        'sale',
+        sale_id,
+        lambda: _render_sale_receipt(request, sale_id, auto_print),
+        auto_print=auto_print,
+    )
+    if response is None:
+        return render(request, 'core/receipt_not_found.html', status=404)
+    return response
+
+
+def _render_sale_receipt(request, sale_id, auto_print):
     sale = (
         Sales.objects.select_related(
             'table', 'table_order__table', 'table_order__waiter')
@@ -845,7 +738,7 @@ def receipt(request):
     )
 
     if not sale:
-        return render(request, 'core/receipt_not_found.html', status=404)
+        return None
 
     payment_details = payment_summary_for_sale(sale)
 
@@ -909,6 +802,7 @@ def cashier_dashboard(request):
     close_form = CashCloseForm()
     session_movements = []
     payment_breakdown = []
+    method_totals = []
     manual_movements = []
     open_tables_count = 0
 
@@ -924,29 +818,33 @@ def cashier_dashboard(request):
         close_form = CashCloseForm(
             initial={'closing_amount': open_session.expected_balance()}
         )
-        session_movements = (
-            open_session.movements.select_related('recorded_by', 'sale')
-            .order_by('-recorded_at')
-        )
-        manual_movements = [
-            movement for movement in session_movements if movement.sale_id is None]
-        sale_ids = (
-            movement.sale_id
-            for movement in session_movements
-            if movement.sale_id is not None
+        movements_qs = (
+            open_session.movements.select_related('sale')
+            .order_by('-recorded_at', '-id')
         )
-        sale_ids = list(dict.fromkeys(sale_ids))
-        if sale_ids:
-            payment_breakdown = (
-                SalePayment.objects.filter(sale_id__in=sale_ids)
-                .values('method')
-                .annotate(
-                    total_applied=Sum('applied_amount'),
-                    total_tendered=Sum('tendered_amount'),
-                    total_change=Sum('change_amount'),
-                )
-                .order_by('method')
+        paginator = Paginator(movements_qs, CASHIER_MOVEMENTS_PER_PAGE)
+        try:
+            session_movements = paginator.page(request.GET.get('movements_page', 1))
+        except PageNotAnInteger:
+            session_movements = paginator.page(1)
+        except EmptyPage:
+            session_movements = paginator.page(paginator.num_pages)
+        manual_movements = movements_qs.filter(sale__isnull=True)
+
+        # Um único agregado com semi-join nos movimentos da sessão, em vez
+        # de carregar os movimentos para montar a lista de vendas.
+        session_sales = CashMovement.objects.filter(
+            session=open_session, sale_id=OuterRef('sale_id'))
+        payment_breakdown = (
+            SalePayment.objects.filter(Exists(session_sales))
+            .values('method')
+            .annotate(
+                total_applied=Sum('applied_amount'),
+                total_tendered=Sum('tendered_amount'),
+                total_change=Sum('change_amount'),
             )
+            .order_by('method')
+        )
         method_labels = dict(Sales.FORMA_PAGAMENTO_CHOICES)
         payment_breakdown = [
             {
@@ -958,6 +856,7 @@ def cashier_dashboard(request):
             }
             for item in payment_breakdown
         ]
+        method_totals = session_method_totals(open_session)
         entries_total = open_session.total_entries()
         exits_total = open_session.total_exits()
         expected_balance = open_session.expected_balance()
@@ -981,7 +880,7 @@ def cashier_dashboard(request):
     )
     if history_date:
         session_history_qs = session_history_qs.filter(
-            opened_at__date=history_date)
+            **date_range_filter('opened_at', history_date, history_date))
 
     history_total_count = session_history_qs.count()
     if history_date:
@@ -998,6 +897,7 @@ def cashier_dashboard(request):
         'movements': session_movements,
         'manual_movements': manual_movements,
         'payment_breakdown': payment_breakdown,
+        'method_totals': method_totals,
         'session_history': session_history,
         'entries_total': entries_total,
         'exits_total': exits_total,
@@ -1065,17 +965,19 @@ def register_cash_movement(request):
 
     form = CashMovementForm(request.POST)
     if form.is_valid():
-        movement = CashMovement.objects.create(
-            company=user_company,
-            session=session,
-            type=form.cleaned_data['type'],
-            amount=form.cleaned_data['amount'],
-            payment_method=form.cleaned_data['payment_method'],
-            description=form.cleaned_data['description'],
-            note=form.cleaned_data['note'],
-            recorded_by=request.user,
-            recorded_at=timezone.now(),
-        )
+        with transaction.atomic():
+            movement = CashMovement.objects.create(
+                company=user_company,
+                session=session,
+                type=form.cleaned_data['type'],
+                amount=form.cleaned_data['amount'],
+                payment_method=form.cleaned_data['payment_method'],
+                description=form.cleaned_data['description'],
+                note=form.cleaned_data['note'],
+                recorded_by=request.user,
+                recorded_at=timezone.now(),
+            )
+            apply_cash_movements([movement])
         if movement.type == CashMovement.Type.ENTRY:
             messages.success(request, 'Entrada registrada no caixa.')
         else:
@@ -1128,8 +1030,9 @@ def close_cash_session(request):
         session.save(update_fields=[
                      'status', 'closed_at', 'closed_by', 'closing_amount', 'closing_note'])
 
-    pdf_bytes = generate_cash_report_pdf(session)
-    pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+    report = store_cash_report(session)
+    with report.file.open('rb') as pdf_file:
+        pdf_base64 = base64.b64encode(pdf_file.read()).decode('utf-8')
 
     context = {
         'current': 'cashier',
@@ -1140,8 +1043,22 @@ def close_cash_session(request):
     return render(request, 'sales/cashier_close_report.html', context)
 
 
+def _cash_report_etag(request, session_id):
+    company = get_user_company(request)
+    if not company:
+        return None
+    session = CashRegisterSession.objects.filter(pk=session_id, company=company).first()
+    report = get_closed_cash_report(session) if session else None
+    return report.sha256 if report else None
+
+
 @login_required
+@etag(_cash_report_etag)
 def cashier_session_report(request, session_id):
+    """
+    PDF de fechamento da sessão. Sessões fechadas são servidas do arquivo
+    gravado (ETag = sha256); sessões abertas são geradas a cada acesso.
+    """
     user_company = get_user_company(request)
     if not user_company:
         messages.error(
@@ -1150,14 +1067,18 @@ def cashier_session_report(request, session_id):
 
     session = get_object_or_404(
         CashRegisterSession, pk=session_id, company=user_company)
-    pdf_bytes = generate_cash_report_pdf(session)
     download_flag = str(request.GET.get('download', '')).lower()
     should_download = download_flag in {'1', 'true', 'yes', 'download'}
     filename = f'fechamento-caixa-{session.id}.pdf'
 
-    response = HttpResponse(pdf_bytes, content_type='application/pdf')
+    report = get_closed_cash_report(session)
+    if report is not None:
+        response = FileResponse(report.file.open('rb'), content_type='application/pdf')
+    else:
+        response = HttpResponse(generate_cash_report_pdf(session), content_type='application/pdf')
     disposition = 'attachment' if should_download else 'inline'
     response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
@@ -1172,60 +1093,59 @@ def delete_sale(request):
         resp['msg'] = 'Venda não encontrada.'
         return JsonResponse(resp)
 
-    sale.delete()
+    with transaction.atomic():
+        apply_sale_rollups(sale, sign=-1)
+        sale.delete()
     messages.success(request, 'Registro de venda deletado com sucesso.')
     resp['status'] = 'success'
     return JsonResponse(resp)
 
 
-@login_required
-def sales_report(request):
-    user_company = get_user_company(request)
-    if not user_company:
-        messages.error(
-            request, 'Usuário não está associado a nenhuma empresa.')
-        return redirect('home-page')
-
-    start, end = get_date_range_from_request(request)
+def _build_sales_report(company, start, end) -> dict:
+    """
+    Calcula os totais, séries e cartões do relatório de vendas do período.
 
-    items_qs = salesItems.objects.filter(
-        (Q(sale_id__type__in=['venda', 'pedido'])
-         | Q(sale_id__type__istartswith='Mesa')),
-        sale_id__company=user_company,
-        sale_id__date_added__date__gte=start,
-        sale_id__date_added__date__lte=end,
+    O resultado fica em cache (ver sales.report_cache); o que depende da
+    data atual, como os débitos vencidos, é calculado à parte pela view.
+    """
+    # Vendas lidas dos resumos diários (sales.rollups): o custo de um
+    # relatório de um ano é o mesmo de um relatório de um dia.
+    product_rollups = DailyProductSales.objects.filter(
+        company=company,
+        day__gte=start,
+        day__lte=end,
     )
-    sales_qs = Sales.objects.filter(
-        (Q(type__in=['venda', 'pedido']) | Q(type__istartswith='Mesa')),
-        company=user_company,
-        date_added__date__gte=start,
-        date_added__date__lte=end,
+    payment_rollups = DailyPaymentSales.objects.filter(
+        company=company,
+        day__gte=start,
+        day__lte=end,
     )
 
     cash_exits_agg = (
         CashMovement.objects.filter(
-            company=user_company,
+            company=company,
             type=CashMovement.Type.EXIT,
-            recorded_at__date__gte=start,
-            recorded_at__date__lte=end,
+            **date_range_filter('recorded_at', start, end),
         ).aggregate(total=Sum('amount'))
     )
 
-    sales_aggregates = sales_qs.aggregate(
+    sales_aggregates = payment_rollups.aggregate(
+        total_tx=Sum('sales_count'),
         total_revenue=Sum('grand_total'),
         total_tax=Sum('tax_amount'),
         total_discount=Sum('discount_total'),
         total_delivery=Sum('delivery_fee'),
     )
-    items_cost_agg = items_qs.aggregate(
-        total_cost=Sum(F('qty') * F('product_id__custo'))
+    items_aggregates = product_rollups.aggregate(
+        total_quantity=Sum('quantity'),
+        total_cost=Sum(F('quantity') * F('product__custo')),
     )
     total_revenue_dec = Decimal(str(sales_aggregates.get('total_revenue') or 0))
-    total_cost_dec = Decimal(str(items_cost_agg.get('total_cost') or 0))
+    total_cost_dec = Decimal(str(items_aggregates.get('total_cost') or 0))
     totals = {
-        'total_tx': sales_qs.count(),
+        'total_tx': sales_aggregates.get('total_tx') or 0,
         'total_revenue': float(total_revenue_dec),
-        'total_quantity': items_qs.aggregate(total_quantity=Sum('qty'))['total_quantity'] or 0,
+        'total_quantity': items_aggregates.get('total_quantity') or 0,
         'total_discount': float(sales_aggregates.get('total_discount') or 0),
         'total_delivery_fee': float(sales_aggregates.get('total_delivery') or 0),
         'total_tax': float(sales_aggregates.get('total_tax') or 0),
@@ -1238,19 +1158,8 @@ def sales_report(request):
         totals['total_tx'] if totals['total_tx'] else 0
     )
 
-    raw_data = (
-        items_qs.annotate(sale_date=TruncDate('sale_id__date_added'))
-        .values(
-            'sale_date',
-            'product_id__code',
-            'product_id__name',
-            'product_id__category_id__name',
-        )
-        .annotate(total_quantity=Sum('qty'), total_revenue=Sum('total'))
-        .order_by('-sale_date', 'product_id__code')
-    )
     report_data = []
-    for rec in raw_data:
+    for rec in get_report_queryset(start, end, company):
         rec['total_quantity'] = round(rec.get('total_quantity') or 0, 2)
         report_data.append(rec)
 
@@ -1261,17 +1170,16 @@ def sales_report(request):
             'total_value': entry['total_value'] or 0,
         }
         for entry in (
-            sales_qs.values('forma_pagamento')
-            .annotate(count=Count('id'), total_value=Sum('grand_total'))
-            .order_by('forma_pagamento')
+            payment_rollups.values(forma_pagamento=F('payment_method'))
+            .annotate(count=Sum('sales_count'), total_value=Sum('grand_total'))
+            .order_by('payment_method')
         )
     ]
 
     payment_by_day = list(
-        sales_qs.annotate(sale_date=TruncDate('date_added'))
-        .values('sale_date', 'forma_pagamento')
-        .annotate(count=Count('id'), total_value=Sum('grand_total'))
-        .order_by('-sale_date', 'forma_pagamento')
+        payment_rollups.values(sale_date=F('day'), forma_pagamento=F('payment_method'))
+        .annotate(count=Sum('sales_count'), total_value=Sum('grand_total'))
+        .order_by('-day', 'payment_method')
     )
 
     chart_report_data = [
@@ -1293,25 +1201,22 @@ def sales_report(request):
     ]
 
     debt_pending_qs = Debt.objects.filter(
-        company=user_company,
+        company=company,
         status=Debt.Status.OPEN,
-        created_at__date__gte=start,
-        created_at__date__lte=end,
+        **date_range_filter('created_at', start, end),
     )
     debt_paid_qs = Debt.objects.filter(
-        company=user_company,
+        company=company,
         status=Debt.Status.PAID,
-        paid_at__date__gte=start,
-        paid_at__date__lte=end,
+        **date_range_filter('paid_at', start, end),
     )
     debt_cards = {
         'pending': {
             'total': float(
                 Debt.aggregate_total(
-                    company=user_company,
+                    company=company,
                     status=Debt.Status.OPEN,
-                    created_at__date__gte=start,
-                    created_at__date__lte=end,
+                    **date_range_filter('created_at', start, end),
                 )
             ),
             'clients': (
@@ -1320,15 +1225,13 @@ def sales_report(request):
                 .distinct()
                 .count()
             ),
-            'overdue': debt_pending_qs.filter(due_date__lt=timezone.localdate()).count(),
         },
         'paid': {
             'total': float(
                 Debt.aggregate_total(
-                    company=user_company,
+                    company=company,
                     status=Debt.Status.PAID,
-                    paid_at__date__gte=start,
-                    paid_at__date__lte=end,
+                    **date_range_filter('paid_at', start, end),
                 )
             ),
             'count': debt_paid_qs.count(),
@@ -1338,20 +1241,52 @@ def sales_report(request):
         Decimal(str(debt_cards['paid']['total'])) + Decimal(str(totals['total_profit']))
     )
 
-    context = {
-        'page_title': 'Relatório de Vendas por Produto',
-        'start_date': start.strftime('%Y-%m-%d'),
-        'end_date': end.strftime('%Y-%m-%d'),
+    return {
         'totals': totals,
         'report_data': report_data,
         'chart_report_data': chart_report_data,
-        'current': 'sales_report',
         'payment_summary': payment_summary,
         'payment_by_day': payment_by_day,
         'chart_payment_by_day': chart_payment_by_day,
         'debt_cards': debt_cards,
     }
-    return render(request, 'sales/sales_report.html', context)
+
+
+@login_required
+def sales_report(request):
+    user_company = get_user_company(request)
+    if not user_company:
+        messages.error(
+            request, 'Usuário não está associado a nenhuma empresa.')
+        return redirect('home-page')
+
+    start, end = get_date_range_from_request(request)
+    report, cache_hit = get_cached_report(
+        user_company.id, start, end,
+        lambda: _build_sales_report(user_company, start, end),
+    )
+    debt_cards = dict(report['debt_cards'])
+    debt_cards['pending'] = {
+        **debt_cards['pending'],
+        'overdue': Debt.objects.filter(
+            company=user_company,
+            status=Debt.Status.OPEN,
+            due_date__lt=timezone.localdate(),
+            **date_range_filter('created_at', start, end),
+        ).count(),
+    }
+
+    context = {
+        **report,
+        'page_title': 'Relatório de Vendas por Produto',
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'current': 'sales_report',
+        'debt_cards': debt_cards,
+    }
+    response = render(request, 'sales/sales_report.html', context)
+    response['X-Report-Cache'] = 'hit' if cache_hit else 'miss'
+    return response
 
 
 @login_required
@@ -1363,31 +1298,55 @@ def export_sales_report(request):
         return redirect('sales_report')
 
     start, end = get_date_range_from_request(request)
-    qs = get_report_queryset(start, end, user_company)
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Vendas por Produto'
-
-    ws.append(['Data', 'Código', 'Produto',
-              'Categoria', 'Quantidade', 'Receita'])
-    for rec in qs:
-        ws.append(
-            [
-                rec['sale_date'].strftime('%d/%m/%y'),
-                rec['product_id__code'],
-                rec['product_id__name'],
-                rec['product_id__category_id__name'],
-                float(rec['total_quantity'] or 0),
-                float(rec['total_revenue'] or 0),
-            ]
+    rows = (
+        (
+            rec['sale_date'],
+            rec['product_id__code'],
+            rec['product_id__name'],
+            rec['product_id__category_id__name'],
+            float(rec['total_quantity'] or 0),
+            float(rec['total_revenue'] or 0),
         )
+        for rec in get_report_queryset(start, end, user_company).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return export_rows(
+        ['Data', 'Código', 'Produto', 'Categoria', 'Quantidade', 'Receita'],
+        rows,
+        filename=f'sales_report_{user_company.name}_{start}_{end}',
+        fmt=get_export_format(request),
+        title='Vendas por Produto',
+    )
 
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+@login_required
+def export_sales_items(request):
+    """Exporta cada item vendido no período, uma linha por item."""
+    user_company = get_user_company(request)
+    if not user_company:
+        messages.error(
+            request, 'Usuário não está associado a nenhuma empresa.')
+        return redirect('sales_report')
+
+    start, end = get_date_range_from_request(request)
+    items = salesItems.objects.filter(
+        sale_id__company=user_company,
+        **date_range_filter('sale_id__date_added', start, end),
+    ).order_by('sale_id__date_added', 'id')
+    return export_queryset(
+        items,
+        [
+            ('Data', 'sale_id__date_added'),
+            ('Venda', 'sale_id__code'),
+            ('Canal', 'sale_id__channel'),
+            ('Forma de pagamento', 'sale_id__forma_pagamento'),
+            ('Código', 'product_id__code'),
+            ('Produto', 'product_id__name'),
+            ('Quantidade', 'qty'),
+            ('Preço', 'price'),
+            ('Total', 'total'),
+        ],
+        filename=f'sales_items_{user_company.name}_{start}_{end}',
+        fmt=get_export_format(request),
+        title='Itens vendidos',
     )
-    response[
-        'Content-Disposition'
-    ] = f'attachment; filename="sales_report_{user_company.name}_{start}_{end}.xlsx"'
-    wb.save(response)
-    return response
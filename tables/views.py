@@ -21,8 +21,8 @@ from sales.utils import (
     get_open_cash_session,
     get_primary_payment_method,
     parse_payment_entries,
-    trigger_auto_print,
 )
+from sales.print_queue import trigger_auto_print
 from p_v_App.models import Garcom, Products, Sales, Table, TableOrder, TableOrderItem
 from tables.forms import (
     TableForm,
@@ -441,15 +441,12 @@ def fechar_comanda(request, order_id):
         auto_open_print = getattr(user_company, 'auto_open_print', True)
         auto_print_flag = '1' if auto_open_print else '0'
         receipt_url = reverse('receipt-modal') + f'?id={sale.id}&auto_print={auto_print_flag}'
-        print_status = False
+        print_job = None
         print_message = 'Impressao automatica desativada para esta empresa.'
         if auto_open_print:
-            try:
-                print_status, print_message = trigger_auto_print(sale)
-            except Exception as exc:  # noqa: BLE001
-                print_status, print_message = False, f'Erro ao acionar impressao: {exc}'
-        if print_status:
-            messages.success(request, f'Recibo enviado para impressora padrao. {print_message}')
+            print_job, print_message = trigger_auto_print(sale)
+        if print_job:
+            messages.success(request, print_message)
         else:
             messages.info(
                 request,
@@ -516,8 +513,7 @@ def reabrir_venda_mesa(request, sale_id):
         company=user_company,
     )
 
-    sale_type = (sale.type or '').lower()
-    if not sale_type.startswith('mesa'):
+    if sale.channel != Sales.Channel.TABLE:
         messages.error(
             request, 'Apenas vendas originadas de mesas podem ser reabertas.')
         return redirect('sales-page')